@@ -3,6 +3,8 @@ from features.models import (
     FeaturesVendorsProfileModel,
     FeaturesPurchaseOrderModel,
     FeaturesHistoricalPerformanceModel,
+    FeaturesVendorMetricsAggregateModel,
+    FeaturesMetricsOutboxModel,
 )
 # Register your models here.
 
@@ -41,8 +43,31 @@ class FeaturesHistoricalPerformanceModelAdmin(admin.ModelAdmin):
     list_display = (
         "vendor_id", 
         "date",
+        "bucket",
         )
     search_fields = (
         "vendor_id", 
         "date",
     )
+
+@admin.register(FeaturesVendorMetricsAggregateModel)
+class FeaturesVendorMetricsAggregateModelAdmin(admin.ModelAdmin):
+    list_display = (
+        "vendor_id", 
+        "issued_count",
+        "completed_count",
+        )
+    search_fields = (
+        "vendor_id", 
+    )
+
+@admin.register(FeaturesMetricsOutboxModel)
+class FeaturesMetricsOutboxModelAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "vendor_id", 
+        "created_date",
+        )
+    search_fields = (
+        "vendor_id", 
+    )
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class FeaturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'features'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from features.instrumentation import install_query_wrapper
+
+        connection_created.connect(install_query_wrapper, dispatch_uid="features_query_wrapper")
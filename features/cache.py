@@ -0,0 +1,84 @@
+import threading, time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def features_cache():
+    return caches[settings.FEATURES_CACHE_ALIAS]
+
+def _version_key(vendor_id):
+    return f"features:vendor:{vendor_id}:version"
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+def cache_stats():
+    """ hit and miss counts of this process """
+    with _stats_lock:
+        return dict(_stats)
+
+def vendor_version(vendor_id):
+    """ current cache version of a vendor, started fresh if the version key was evicted """
+    cache = features_cache()
+    version = cache.get(_version_key(vendor_id))
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(_version_key(vendor_id), version, timeout=None):
+            version = cache.get(_version_key(vendor_id), version)
+    return version
+
+async def avendor_version(vendor_id):
+    """ vendor_version() through the async cache API """
+    cache = features_cache()
+    version = await cache.aget(_version_key(vendor_id))
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(_version_key(vendor_id), version, timeout=None):
+            version = await cache.aget(_version_key(vendor_id), version)
+    return version
+
+def bump_vendor_version(vendor_id):
+    """ invalidating every cached read of a vendor """
+    cache = features_cache()
+    try:
+        cache.incr(_version_key(vendor_id))
+    except ValueError:
+        cache.set(_version_key(vendor_id), time.time_ns(), timeout=None)
+
+def invalidate_vendor(vendor_id):
+    """ bumping the vendor version once the surrounding transaction commits """
+    transaction.on_commit(lambda: bump_vendor_version(vendor_id))
+
+def cached_vendor_read(vendor_id, name, loader):
+    """ read-through cache of a vendor scoped value; None results are not cached """
+    cache = features_cache()
+    key = f"features:vendor:{vendor_id}:v{vendor_version(vendor_id)}:{name}"
+    value = cache.get(key)
+    if value is not None:
+        _record("hits")
+        return value
+
+    _record("misses")
+    value = loader()
+    if value is not None:
+        cache.set(key, value, timeout=settings.FEATURES_CACHE_TIMEOUT)
+    return value
+
+async def acached_vendor_read(vendor_id, name, loader):
+    """ cached_vendor_read() for async views, loader being a coroutine function """
+    cache = features_cache()
+    key = f"features:vendor:{vendor_id}:v{await avendor_version(vendor_id)}:{name}"
+    value = await cache.aget(key)
+    if value is not None:
+        _record("hits")
+        return value
+
+    _record("misses")
+    value = await loader()
+    if value is not None:
+        await cache.aset(key, value, timeout=settings.FEATURES_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,44 @@
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+def conditional_request(request):
+    """ whether the client sent validators of a copy it already holds """
+    return "HTTP_IF_NONE_MATCH" in request.META or "HTTP_IF_MODIFIED_SINCE" in request.META
+
+def response_validators(request, version):
+    """ ETag and Last-Modified timestamp from a serializer version, (row keys, last modified date or None) """
+    keys, last_modified = version
+    digest = hashlib.md5(
+        repr((request.get_full_path(), request.META.get("HTTP_ACCEPT"), keys)).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'W/"{digest}"', int(last_modified.timestamp()) if last_modified else None
+
+def with_validators(response, request, version):
+    """ stamping a response with its validators, clients are told to revalidate rather than reuse it blindly """
+    etag, last_modified = response_validators(request, version)
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+def _not_modified(request, version):
+    etag, last_modified = response_validators(request, version)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return with_validators(response, request, version)
+
+def not_modified(request, serializer):
+    """ 304 response when the client copy is still current, else None; unconditional requests skip the lookup """
+    if not conditional_request(request):
+        return None
+    return _not_modified(request, serializer.version())
+
+async def anot_modified(request, serializer):
+    """ not_modified() for async views """
+    if not conditional_request(request):
+        return None
+    return _not_modified(request, await serializer.aversion())
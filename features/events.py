@@ -0,0 +1,168 @@
+import asyncio, json, logging, threading, time
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from vendor_management.settings import logger
+
+CHANNEL = "features_events"
+OVERFLOW_FRAME = b"event: overflow\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+class FeaturesEventSubscriber:
+    """
+    Queue of encoded event frames for one open stream, living on the event loop that serves it
+    """
+    __slots__ = ("vendor_id", "loop", "queue", "overflowed")
+
+    def __init__(self, vendor_id, loop, size):
+        self.vendor_id = vendor_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def deliver(self, frame):
+        """ runs on the subscriber's loop; a stream too slow to keep up is told to resync instead of growing """
+        if self.queue.full():
+            self.overflowed = True
+            return
+        self.queue.put_nowait(frame)
+
+
+class FeaturesEventBroker:
+    """
+    In-process fan-out of published events to the open streams of this process. With the postgres
+    backend events arrive through LISTEN on a background thread, so every worker sees every event
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesEventBroker"})
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.listener = None
+        self.listen_connection = None
+
+    def subscribe(self, vendor_id=None):
+        """ called from the event loop that will read the subscriber's queue """
+        if settings.FEATURES_EVENTS_BACKEND == "postgres":
+            self.start_listener()
+        subscriber = FeaturesEventSubscriber(
+            vendor_id, asyncio.get_running_loop(), settings.FEATURES_EVENTS_QUEUE_SIZE
+        )
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def dispatch(self, payload):
+        """ encoding the frame once and handing it to every matching subscriber, from any thread """
+        event = json.loads(payload)
+        frame = f"event: {event['type']}\ndata: {payload}\n\n".encode()
+        with self.lock:
+            subscribers = [
+                subscriber for subscriber in self.subscribers
+                if subscriber.vendor_id is None or subscriber.vendor_id == event["vendor_id"]
+            ]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, frame)
+            except RuntimeError:
+                """ the loop serving this stream is gone """
+                self.unsubscribe(subscriber)
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is not None:
+                return
+            self.listener = threading.Thread(target=self.listen, name="features-events-listener", daemon=True)
+        self.listener.start()
+
+    def stop_listener(self):
+        """ closing the LISTEN connection, which ends the blocked listener thread """
+        with self.lock:
+            listener, self.listener = self.listener, None
+        if listener is None:
+            return
+        if self.listen_connection is not None:
+            self.listen_connection.close()
+        listener.join()
+
+    def listen(self):
+        """ dispatching notifications of every worker, reconnecting after a second when the connection drops """
+        wrapper = connections["default"]
+        while self.listener is threading.current_thread():
+            try:
+                self.listen_connection = wrapper.get_new_connection(wrapper.get_connection_params())
+                try:
+                    self.listen_connection.autocommit = True
+                    self.listen_connection.execute(f"LISTEN {CHANNEL}")
+                    for notification in self.listen_connection.notifies():
+                        self.dispatch(notification.payload)
+                finally:
+                    self.listen_connection.close()
+            except Exception as e:
+                if self.listener is not threading.current_thread():
+                    return
+                self.api_logger.info(f"Exception listening for events, {str(e)}")
+                time.sleep(1)
+
+
+broker = FeaturesEventBroker()
+
+def publish_event(event_type, vendor_id, **data):
+    """ publishing an event to the streams of a vendor once the surrounding transaction commits """
+    publish_events([(event_type, vendor_id, data)])
+
+def publish_events(events):
+    """ publishing (event type, vendor id, data) events together, with a single NOTIFY query on postgres """
+    backend = settings.FEATURES_EVENTS_BACKEND
+    if not events or backend == "local" and not broker.subscribers:
+        return None
+
+    payloads = [
+        json.dumps({"type": event_type, "vendor_id": vendor_id, **data}, cls=DjangoJSONEncoder)
+        for event_type, vendor_id, data in events
+    ]
+    if backend == "postgres":
+        """ NOTIFY is transactional, listeners only receive it after commit """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload", [CHANNEL, payloads])
+    else:
+        transaction.on_commit(lambda: [broker.dispatch(payload) for payload in payloads])
+
+def purchase_order_event(event_type, po_obj):
+    """ purchase_order.status and purchase_order.acknowledged events """
+    return (
+        event_type,
+        po_obj.vendor_id,
+        {
+            "purchase_order_id": po_obj.id,
+            "po_number": po_obj.po_number,
+            "status": po_obj.status,
+            "acknowledgment_date": po_obj.acknowledgment_date,
+            "updated_date": po_obj.updated_date,
+        },
+    )
+
+def publish_purchase_order(event_type, po_obj):
+    publish_events([purchase_order_event(event_type, po_obj)])
+
+async def event_stream(subscriber):
+    """ SSE frames of a subscriber, a comment line keeping idle connections open """
+    try:
+        yield f"retry: {settings.FEATURES_EVENTS_RETRY_MS}\n\n".encode()
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscriber.queue.get(), settings.FEATURES_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE_FRAME
+                continue
+            if subscriber.overflowed:
+                yield OVERFLOW_FRAME
+                return
+            yield frame
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,283 @@
+import bisect, contextvars, logging, threading, time
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from vendor_management.settings import logger
+from features.cache import cache_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current_request = contextvars.ContextVar("features_current_request", default=None)
+
+
+class FeaturesRequestStats:
+    """
+    Database work and timings of a single request
+    """
+    __slots__ = ("started", "queries", "db_time", "statements")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+
+def features_query_wrapper(execute, sql, params, many, context):
+    """ counting and timing every statement run on behalf of the current request """
+    stats = _current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+        stats.statements[sql] += 1
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """ connection_created receiver, the same wrapper object survives reconnects so it is added once """
+    if features_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(features_query_wrapper)
+
+
+class FeaturesHistogram:
+    """
+    Cumulative histogram in the Prometheus sense, one series per label set
+    """
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+        series["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self.series.items()):
+            labels = ",".join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series["buckets"]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+            lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+class FeaturesCounter:
+    """
+    Monotonic counter, one series per label set
+    """
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = Counter()
+
+    def inc(self, label_values):
+        self.series[label_values] += 1
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.series.items()):
+            labels = ",".join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+class FeaturesRequestMetrics:
+    """
+    Per process registry of request metrics exposed at the metrics endpoint
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.duration = FeaturesHistogram(
+                "features_http_request_duration_seconds", "Wall time of requests.",
+                ("endpoint", "method", "status"), DURATION_BUCKETS,
+            )
+            self.db_duration = FeaturesHistogram(
+                "features_http_request_db_duration_seconds", "Time requests spent in database statements.",
+                ("endpoint", "method"), DURATION_BUCKETS,
+            )
+            self.queries = FeaturesHistogram(
+                "features_http_request_db_queries", "Database statements run per request.",
+                ("endpoint", "method"), QUERY_COUNT_BUCKETS,
+            )
+            self.response_size = FeaturesHistogram(
+                "features_http_response_size_bytes", "Size of response bodies.",
+                ("endpoint", "method"), SIZE_BUCKETS,
+            )
+            self.slow = FeaturesCounter(
+                "features_http_slow_requests_total", "Requests slower than FEATURES_SLOW_REQUEST_MS.",
+                ("endpoint", "method"),
+            )
+            self.n_plus_one = FeaturesCounter(
+                "features_http_n_plus_one_requests_total",
+                "Requests repeating one statement at least FEATURES_N_PLUS_ONE_THRESHOLD times.",
+                ("endpoint", "method"),
+            )
+
+    def record(self, record):
+        endpoint_method = (record["endpoint"], record["method"])
+        with self.lock:
+            self.duration.observe((*endpoint_method, str(record["status"])), record["duration_ms"] / 1000)
+            self.db_duration.observe(endpoint_method, record["db_time_ms"] / 1000)
+            self.queries.observe(endpoint_method, record["queries"])
+            if record["response_size"] is not None:
+                self.response_size.observe(endpoint_method, record["response_size"])
+            if record["slow"]:
+                self.slow.inc(endpoint_method)
+            if record["repeated_query"]:
+                self.n_plus_one.inc(endpoint_method)
+
+    def exposition(self):
+        with self.lock:
+            lines = []
+            for metric in (self.duration, self.db_duration, self.queries, self.response_size, self.slow, self.n_plus_one):
+                lines += metric.exposition()
+        cache = cache_stats()
+        lines += [
+            "# HELP features_cache_requests_total Vendor cache lookups of this process.",
+            "# TYPE features_cache_requests_total counter",
+            f'features_cache_requests_total{{outcome="hit"}} {cache["hits"]}',
+            f'features_cache_requests_total{{outcome="miss"}} {cache["misses"]}',
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = FeaturesRequestMetrics()
+
+
+class FeaturesRequestMetricsMiddleware:
+    """
+    Recording query count, database time, wall time and response size of every request,
+    logging them and feeding the histograms of the metrics endpoint
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = FeaturesRequestStats()
+        token = _current_request.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = FeaturesRequestStats()
+        token = _current_request.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        if not response.streaming:
+            self.record(request, response, stats, len(response.content))
+            return response
+
+        """ streamed bodies run their queries while being sent, the record is written once they are exhausted """
+        if response.is_async:
+            response.streaming_content = self.ameasured_stream(request, response, stats, response.streaming_content)
+        else:
+            response.streaming_content = self.measured_stream(request, response, stats, response.streaming_content)
+        return response
+
+    def measured_stream(self, request, response, stats, content):
+        content = iter(content)
+        size = 0
+        while True:
+            token = _current_request.set(stats)
+            try:
+                chunk = next(content)
+            except StopIteration:
+                break
+            finally:
+                _current_request.reset(token)
+            size += len(chunk)
+            yield chunk
+        self.record(request, response, stats, size)
+
+    async def ameasured_stream(self, request, response, stats, content):
+        """ the context is set around each chunk only, the stream may be read from tasks other than this one """
+        content = aiter(content)
+        size = 0
+        try:
+            while True:
+                token = _current_request.set(stats)
+                try:
+                    chunk = await anext(content)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_request.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            """ closing the wrapped stream right away, endless streams release what they hold on disconnect """
+            if hasattr(content, "aclose"):
+                await content.aclose()
+        self.record(request, response, stats, size)
+
+    def record(self, request, response, stats, response_size):
+        match = request.resolver_match
+        repeated_query, repeats = (stats.statements.most_common(1) or [(None, 0)])[0]
+        duration_ms = (time.perf_counter() - stats.started) * 1000
+        record = {
+            "endpoint": match.url_name if match and match.url_name else "unresolved",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 3),
+            "db_time_ms": round(stats.db_time * 1000, 3),
+            "queries": stats.queries,
+            "response_size": response_size,
+            "slow": duration_ms >= settings.FEATURES_SLOW_REQUEST_MS,
+            "repeated_query": None,
+        }
+        if repeats >= settings.FEATURES_N_PLUS_ONE_THRESHOLD:
+            record["repeated_query"] = {"sql": repeated_query, "count": repeats}
+        request_metrics.record(record)
+
+        level = logging.WARNING if record["slow"] or record["repeated_query"] else logging.INFO
+        if logger.isEnabledFor(level):
+            """ the record rides along as an attribute, the JSON log file writes it out in full """
+            api_logger = logging.LoggerAdapter(
+                logger, {"app_name": "FeaturesRequestMetricsMiddleware", "request_metrics": record}
+            )
+            api_logger.log(
+                level,
+                f"{record['method']} {record['path']} {record['status']} in {record['duration_ms']}ms, "
+                f"{record['queries']} queries in {record['db_time_ms']}ms",
+            )
+        return record
@@ -0,0 +1,97 @@
+import datetime, json, pytz, random, statistics, time
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from features.metrics import average_response_time, rebuild_vendor_aggregates
+from features.models import FeaturesVendorsProfileModel, FeaturesPurchaseOrderModel
+
+timezone = pytz.timezone("Asia/Kolkata")
+
+
+class Command(BaseCommand):
+    help = "Measure acknowledgement latency as the vendor's purchase order count grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000, 1000000])
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--metrics-mode", choices=["sync", "async"], default="sync",
+            help="sync times the aggregate update itself, async only the outbox insert",
+        )
+        parser.add_argument("--json", action="store_true", help="print results as JSON")
+
+    def handle(self, *args, **options):
+        with override_settings(FEATURES_METRICS_MODE=options["metrics_mode"]):
+            results = self.measure(options)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"metrics_mode": options["metrics_mode"], "results": results}, indent=2))
+            return
+        self.stdout.write(f"metrics mode: {options['metrics_mode']}")
+        self.stdout.write(f"{'purchase orders':>16} {'ack p50 ms':>12} {'ack max ms':>12} {'SQL avg ms':>12}")
+        for row in results:
+            self.stdout.write(
+                f"{row['purchase_orders']:>16} {row['acknowledge_p50_ms']:>12} "
+                f"{row['acknowledge_max_ms']:>12} {row['sql_average_ms']:>12}"
+            )
+
+    def measure(self, options):
+        client = Client()
+        results = []
+        for size in options["sizes"]:
+            vendor = FeaturesVendorsProfileModel.objects.create(
+                vendor_code=f"benchmark-ack-{size}-{time.time_ns()}",
+                name="Benchmark vendor",
+                contact_details=f"benchmark-ack-{size}-{time.time_ns()}",
+                address="-",
+                on_time_delivery_rate=0.0,
+                quality_rating_avg=0.0,
+                average_response_time=0.0,
+                fulfillment_rate=0.0,
+            )
+            try:
+                po_ids = self.seed_purchase_orders(vendor, size, options["batch_size"])
+                rebuild_vendor_aggregates([vendor.id])
+
+                acknowledge_timings = []
+                for po_id in random.sample(po_ids, min(options["requests"], len(po_ids))):
+                    started = time.perf_counter()
+                    response = client.post(f"/features/api/purchase_orders/{po_id}/acknowledge")
+                    acknowledge_timings.append((time.perf_counter() - started) * 1000)
+                    assert response.status_code == 200, response.content
+
+                started = time.perf_counter()
+                average_response_time(vendor.id)
+                sql_average_ms = (time.perf_counter() - started) * 1000
+            finally:
+                vendor.delete()
+
+            results.append({
+                "purchase_orders": size,
+                "acknowledge_p50_ms": round(statistics.median(acknowledge_timings), 3),
+                "acknowledge_max_ms": round(max(acknowledge_timings), 3),
+                "sql_average_ms": round(sql_average_ms, 3),
+            })
+        return results
+
+    def seed_purchase_orders(self, vendor, size, batch_size):
+        """ bulk inserting purchase orders, roughly half of them already acknowledged """
+        now = datetime.datetime.now(timezone)
+        purchase_orders = []
+        for index in range(size):
+            issue_date = now - datetime.timedelta(hours=random.randint(1, 24 * 90))
+            purchase_orders.append(FeaturesPurchaseOrderModel(
+                po_number=f"{vendor.vendor_code}-{index}",
+                vendor=vendor,
+                delivery_date=(issue_date + datetime.timedelta(days=7)).date(),
+                items={},
+                quantity=1,
+                status="pending",
+                issue_date=issue_date,
+                acknowledgment_date=issue_date + datetime.timedelta(hours=random.randint(1, 48)) if index % 2 else None,
+            ))
+            if len(purchase_orders) >= batch_size:
+                FeaturesPurchaseOrderModel.objects.bulk_create(purchase_orders)
+                purchase_orders = []
+        FeaturesPurchaseOrderModel.objects.bulk_create(purchase_orders)
+        return list(FeaturesPurchaseOrderModel.objects.filter(vendor=vendor).values_list("id", flat=True))
@@ -0,0 +1,248 @@
+import datetime, json, random, statistics, time, tracemalloc
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from features.cache import features_cache
+from features.models import FeaturesVendorsProfileModel, FeaturesPurchaseOrderModel
+
+API_PREFIX = "/features/api/"
+
+
+class Command(BaseCommand):
+    help = "Drive every features endpoint and report latency percentiles, queries per request and peak memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--memory-samples", type=int, default=5, help="extra traced requests for peak memory")
+        parser.add_argument("--endpoint", action="append", dest="endpoints", help="only run endpoints with this name, repeatable")
+        parser.add_argument("--metrics-mode", choices=["sync", "async"], default=None)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="write results as JSON to this file")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+        parser.add_argument("--json", action="store_true", help="print results as JSON")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.client = Client()
+        self.run = f"benchmark-api-{time.time_ns()}"
+        self.vendor_ids = list(FeaturesVendorsProfileModel.objects.order_by("?").values_list("id", flat=True)[:1000])
+        self.po_ids = list(FeaturesPurchaseOrderModel.objects.order_by("?").values_list("id", flat=True)[:1000])
+        if not self.vendor_ids or not self.po_ids:
+            raise CommandError("No data to read, run generate_synthetic_data first")
+
+        endpoints = self.endpoints()
+        if options["endpoints"]:
+            unknown = set(options["endpoints"]) - {name for name, *_ in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoints {', '.join(sorted(unknown))}")
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0] in options["endpoints"]]
+
+        metrics_mode = options["metrics_mode"] or settings.FEATURES_METRICS_MODE
+        results = []
+        try:
+            with override_settings(FEATURES_METRICS_MODE=metrics_mode):
+                for name, method, make_request in endpoints:
+                    results.append(self.measure(name, method, make_request, options))
+        finally:
+            """ everything the write endpoints created hangs off benchmark vendors """
+            FeaturesPurchaseOrderModel.objects.filter(po_number__startswith=self.run).delete()
+            FeaturesVendorsProfileModel.objects.filter(vendor_code__startswith=self.run).delete()
+
+        report = {
+            "created_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "metrics_mode": metrics_mode,
+            "vendors": FeaturesVendorsProfileModel.objects.count(),
+            "purchase_orders": FeaturesPurchaseOrderModel.objects.count(),
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+
+        baseline = {}
+        if options["compare"]:
+            with open(options["compare"]) as previous:
+                baseline = {row["endpoint"]: row for row in json.load(previous)["results"]}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{'endpoint':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>9}"
+            + (f" {'p50 vs base':>12}" if baseline else "")
+        )
+        for row in results:
+            line = (
+                f"{row['endpoint']:<28} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} "
+                f"{row['queries_per_request']:>8} {row['peak_memory_kib']:>9}"
+            )
+            if row["endpoint"] in baseline and baseline[row["endpoint"]]["p50_ms"]:
+                line += f" {row['p50_ms'] / baseline[row['endpoint']]['p50_ms']:>11.2f}x"
+            self.stdout.write(line)
+
+    def measure(self, name, method, make_request, options):
+        features_cache().clear()
+        for index in range(options["warmup"]):
+            self.send(method, *make_request(index))
+
+        timings, queries = [], []
+        for index in range(options["warmup"], options["warmup"] + options["requests"]):
+            path, data = make_request(index)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                self.send(method, path, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+
+        """ tracing slows requests down, so memory is sampled on separate requests """
+        peak = 0
+        offset = options["warmup"] + options["requests"]
+        for index in range(offset, offset + options["memory_samples"]):
+            path, data = make_request(index)
+            tracemalloc.start()
+            try:
+                self.send(method, path, data)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        timings.sort()
+        return {
+            "endpoint": name,
+            "requests": len(timings),
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(self.percentile(timings, 95), 3),
+            "p99_ms": round(self.percentile(timings, 99), 3),
+            "queries_per_request": round(statistics.mean(queries), 2),
+            "peak_memory_kib": round(peak / 1024, 1),
+        }
+
+    def percentile(self, timings, percent):
+        return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
+
+    def send(self, method, path, data=None):
+        if method == "get":
+            response = self.client.get(API_PREFIX + path, data)
+        else:
+            """ the write views parse a JSON body even when they take no fields """
+            response = getattr(self.client, method)(API_PREFIX + path, data or {}, content_type="application/json")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f"{method.upper()} {path} answered {response.status_code}: {response.content[:500]}")
+        return response
+
+    def create_vendor(self, index):
+        return FeaturesVendorsProfileModel.objects.create(
+            vendor_code=f"{self.run}-V{index}",
+            name="Benchmark vendor",
+            contact_details=f"{self.run}-V{index}",
+            address="-",
+            on_time_delivery_rate=0.0,
+            quality_rating_avg=0.0,
+            average_response_time=0.0,
+            fulfillment_rate=0.0,
+        )
+
+    def purchase_order_payload(self, number, vendor_id):
+        return {
+            "po_number": number,
+            "vendor_id": vendor_id,
+            "order_date": str(datetime.date.today()),
+            "delivery_date": str(datetime.date.today() + datetime.timedelta(days=14)),
+            "items": [{"name": "bolt", "quantity": 10, "unit_price": 1.5}],
+            "quantity": 10,
+            "status": "pending",
+        }
+
+    def vendor_payload(self, code):
+        return {"vendor_code": code, "name": "Benchmark vendor", "address": "-", "contact_details": code}
+
+    def endpoints(self):
+        """
+        (name, method, index -> (path, data)) for every route in features/urls.py except events/,
+        an endless event stream that has no latency to measure
+        """
+        choice = self.random.choice
+        vendor = self.create_vendor("owner")
+        """ rows the destructive endpoints consume one per request """
+        doomed_vendors = {}
+        doomed_purchase_orders = {}
+
+        def doomed_vendor(index):
+            if index not in doomed_vendors:
+                doomed_vendors[index] = self.create_vendor(f"doomed-{index}").id
+            return doomed_vendors[index]
+
+        def doomed_purchase_order(index):
+            if index not in doomed_purchase_orders:
+                doomed_purchase_orders[index] = FeaturesPurchaseOrderModel.objects.create(
+                    vendor=vendor,
+                    issue_date=datetime.datetime.now(datetime.timezone.utc),
+                    po_number=f"{self.run}-doomed-{index}",
+                    order_date=datetime.datetime.now(datetime.timezone.utc),
+                    delivery_date=datetime.date.today() + datetime.timedelta(days=14),
+                    items=[{"name": "bolt", "quantity": 10, "unit_price": 1.5}],
+                    quantity=10,
+                    status="pending",
+                ).id
+            return doomed_purchase_orders[index]
+
+        def doomed_purchase_order_batch(index):
+            return [doomed_purchase_order(f"{index}-{row}") for row in range(100)]
+
+        def prepared(make_target, make_request):
+            """ creating the target outside the timed request """
+            def make(index):
+                return make_request(make_target(index))
+            return make
+
+        return [
+            ("vendors.list", "get", lambda index: ("vendors/", {"page_size": 100})),
+            ("vendors.create", "post", lambda index: ("vendors/", self.vendor_payload(f"{self.run}-C{index}"))),
+            ("vendors.bulk", "post", lambda index: ("vendors/bulk/", [
+                self.vendor_payload(f"{self.run}-B{index}-{row}") for row in range(100)
+            ])),
+            ("vendors.ranking", "get", lambda index: ("vendors/ranking/", {"limit": 10, "min_po_count": 5})),
+            ("vendors.detail", "get", lambda index: (f"vendors/{choice(self.vendor_ids)}/", None)),
+            ("vendors.update", "put", lambda index: (f"vendors/{vendor.id}/", {"name": f"Benchmark vendor {index}"})),
+            ("vendors.delete", "delete", prepared(doomed_vendor, lambda vendor_id: (f"vendors/{vendor_id}/", None))),
+            ("vendors.performance", "get", lambda index: (f"vendors/{choice(self.vendor_ids)}/performance", None)),
+            ("purchase_orders.list", "get", lambda index: ("purchase_orders/", {"page_size": 100})),
+            ("purchase_orders.list_filtered", "get", lambda index: ("purchase_orders/", {
+                "vendor_id": choice(self.vendor_ids), "status": "pending", "fields": "id,po_number,delivery_date",
+            })),
+            ("purchase_orders.create", "post", lambda index: (
+                "purchase_orders/", self.purchase_order_payload(f"{self.run}-C{index}", vendor.id),
+            )),
+            ("purchase_orders.bulk", "post", lambda index: ("purchase_orders/bulk/", [
+                self.purchase_order_payload(f"{self.run}-B{index}-{row}", vendor.id) for row in range(100)
+            ])),
+            ("purchase_orders.export", "get", lambda index: ("purchase_orders/export/", {"vendor_id": choice(self.vendor_ids)})),
+            ("purchase_orders.detail", "get", lambda index: (f"purchase_orders/{choice(self.po_ids)}/", None)),
+            ("purchase_orders.update", "put", prepared(doomed_purchase_order, lambda po_id: (
+                f"purchase_orders/{po_id}/", {"status": "completed", "quality_rating": 4.0},
+            ))),
+            ("purchase_orders.acknowledge", "post", prepared(doomed_purchase_order, lambda po_id: (
+                f"purchase_orders/{po_id}/acknowledge", None,
+            ))),
+            ("purchase_orders.bulk_update", "put", prepared(doomed_purchase_order_batch, lambda po_ids: (
+                "purchase_orders/bulk/", [{"id": po_id, "status": "completed", "quality_rating": 4.0} for po_id in po_ids],
+            ))),
+            ("purchase_orders.acknowledge_bulk", "post", prepared(doomed_purchase_order_batch, lambda po_ids: (
+                "purchase_orders/acknowledge/", {"po_ids": po_ids},
+            ))),
+            ("purchase_orders.delete", "delete", prepared(doomed_purchase_order, lambda po_id: (
+                f"purchase_orders/{po_id}/", None,
+            ))),
+            ("changes.latest", "get", lambda index: ("changes/", {"since": "latest"})),
+            ("changes.read", "get", lambda index: ("changes/", {"since": "0-0", "limit": 100})),
+            ("metrics", "get", lambda index: ("metrics/", None)),
+            ("async.vendors.list", "get", lambda index: ("async/vendors/", {"page_size": 100})),
+            ("async.vendors.detail", "get", lambda index: (f"async/vendors/{choice(self.vendor_ids)}/", None)),
+            ("async.purchase_orders.list", "get", lambda index: ("async/purchase_orders/", {"page_size": 100})),
+            ("async.purchase_orders.detail", "get", lambda index: (f"async/purchase_orders/{choice(self.po_ids)}/", None)),
+        ]
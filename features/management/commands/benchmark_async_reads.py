@@ -0,0 +1,125 @@
+import asyncio, io, json, statistics, sys, time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+API_PREFIX = "/features/api/"
+
+
+class Command(BaseCommand):
+    help = "Compare read throughput of sync views under WSGI with sync and async views under ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="vendors/", help="read endpoint below /features/api/, e.g. purchase_orders/12/")
+        parser.add_argument("--query", default="", help="query string sent with every request")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--json", action="store_true", help="print results as JSON")
+
+    def handle(self, *args, **options):
+        sync_path = API_PREFIX + options["path"]
+        async_path = API_PREFIX + "async/" + options["path"]
+        """ handlers are driven in process, so the numbers exclude any web server overhead """
+        runs = [
+            ("WSGI sync view", lambda: self.run_wsgi(sync_path, options)),
+            ("ASGI sync view", lambda: asyncio.run(self.run_asgi(sync_path, options))),
+            ("ASGI async view", lambda: asyncio.run(self.run_asgi(async_path, options))),
+        ]
+
+        results = []
+        for name, run in runs:
+            started = time.perf_counter()
+            timings = run()
+            elapsed = time.perf_counter() - started
+            timings.sort()
+            results.append({
+                "mode": name,
+                "requests": len(timings),
+                "concurrency": options["concurrency"],
+                "requests_per_second": round(len(timings) / elapsed, 1),
+                "p50_ms": round(statistics.median(timings), 3),
+                "p99_ms": round(timings[int(len(timings) * 0.99) - 1], 3),
+            })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'mode':>16} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for row in results:
+            self.stdout.write(
+                f"{row['mode']:>16} {row['requests_per_second']:>10} {row['p50_ms']:>10} {row['p99_ms']:>10}"
+            )
+
+    def run_wsgi(self, path, options):
+        """ a threaded WSGI server, one thread per concurrent client """
+        application = get_wsgi_application()
+
+        def request(_):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": options["query"],
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "HTTP_HOST": "localhost",
+                "wsgi.url_scheme": "http",
+                "wsgi.input": io.BytesIO(),
+                "wsgi.errors": sys.stderr,
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = application(environ, lambda status, headers: statuses.append(status))
+            try:
+                b"".join(response)
+            finally:
+                response.close()
+            assert statuses[0].startswith("200"), statuses[0]
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            return list(executor.map(request, range(options["requests"])))
+
+    async def run_asgi(self, path, options):
+        """ an ASGI server multiplexing every concurrent client on one event loop """
+        application = get_asgi_application()
+        semaphore = asyncio.Semaphore(options["concurrency"])
+
+        async def request():
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": options["query"].encode(),
+                "headers": [(b"host", b"localhost")],
+                "server": ("localhost", 80),
+                "client": ("127.0.0.1", 0),
+            }
+            disconnected = asyncio.Event()
+            request_sent = False
+            statuses = []
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+                disconnected.set()
+            assert statuses[0] == 200, statuses[0]
+            return (time.perf_counter() - started) * 1000
+
+        return list(await asyncio.gather(*(request() for _ in range(options["requests"]))))
@@ -0,0 +1,87 @@
+import io, json, statistics, sys, time
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+API_PREFIX = "/features/api/"
+
+
+class Command(BaseCommand):
+    help = "Compare request latency with a new database connection per request against persistent connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="vendors/", help="endpoint below /features/api/")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--conn-max-age", type=int, default=600, help="persistent connection lifetime to compare against")
+        parser.add_argument("--json", action="store_true", help="print results as JSON")
+
+    def handle(self, *args, **options):
+        """ the test client keeps its connection open, the WSGI handler closes it like a real server """
+        application = get_wsgi_application()
+        path = API_PREFIX + options["path"]
+        configured = dict(connection.settings_dict)
+        connects = []
+        counter = lambda sender, **kwargs: connects.append(1)
+        connection_created.connect(counter)
+
+        results = []
+        try:
+            for name, conn_max_age, health_checks in (
+                ("per request", 0, False),
+                ("persistent", options["conn_max_age"], False),
+                ("persistent + health checks", options["conn_max_age"], True),
+            ):
+                """ CONN_MAX_AGE is read from settings_dict whenever a connection is opened """
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+                connection.settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+                connects.clear()
+
+                timings = []
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    status = self.request(application, path)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    assert status.startswith("200"), status
+
+                results.append({
+                    "mode": name,
+                    "requests": len(timings),
+                    "connections_opened": len(connects),
+                    "mean_ms": round(statistics.mean(timings), 3),
+                    "p50_ms": round(statistics.median(timings), 3),
+                })
+        finally:
+            connection_created.disconnect(counter)
+            connection.close()
+            connection.settings_dict.update(configured)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'mode':>28} {'connections':>12} {'mean ms':>10} {'p50 ms':>10}")
+        for row in results:
+            self.stdout.write(
+                f"{row['mode']:>28} {row['connections_opened']:>12} {row['mean_ms']:>10} {row['p50_ms']:>10}"
+            )
+
+    def request(self, application, path):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+        }
+        statuses = []
+        response = application(environ, lambda status, headers: statuses.append(status))
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        return statuses[0]
@@ -0,0 +1,74 @@
+import datetime, pytz
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import TruncDay
+from features.metrics import bucket_start
+from features.models import FeaturesHistoricalPerformanceModel
+
+timezone = pytz.timezone("Asia/Kolkata")
+
+
+class Command(BaseCommand):
+    help = "Downsample old hourly performance snapshots into daily ones and drop expired history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hourly-retention-days", type=int, default=7)
+        parser.add_argument("--daily-retention-days", type=int, default=730, help="0 keeps daily snapshots forever")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = datetime.datetime.now(timezone)
+        hourly_cutoff = bucket_start(now - datetime.timedelta(days=options["hourly_retention_days"]), "day")
+
+        with transaction.atomic():
+            compacted = self.compact(hourly_cutoff, options["batch_size"])
+            deleted_hourly, _ = FeaturesHistoricalPerformanceModel.objects.filter(
+                bucket="hour",
+                date__lt=hourly_cutoff,
+            ).delete()
+
+        deleted_daily = 0
+        if options["daily_retention_days"]:
+            daily_cutoff = bucket_start(now - datetime.timedelta(days=options["daily_retention_days"]), "day")
+            deleted_daily, _ = FeaturesHistoricalPerformanceModel.objects.filter(
+                bucket="day",
+                date__lt=daily_cutoff,
+            ).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {compacted} daily snapshots, removed {deleted_hourly} hourly and {deleted_daily} expired daily snapshots"
+        ))
+
+    def compact(self, cutoff, batch_size):
+        """ the last hourly snapshot of each vendor day becomes that day's snapshot """
+        closing_snapshots = FeaturesHistoricalPerformanceModel.objects.filter(
+            bucket="hour",
+            date__lt=cutoff,
+        ).annotate(day=TruncDay("date")).order_by("vendor_id", "day", "-date").distinct("vendor_id", "day")
+
+        compacted = 0
+        daily_snapshots = []
+        for snapshot in closing_snapshots.iterator(chunk_size=batch_size):
+            daily_snapshots.append(FeaturesHistoricalPerformanceModel(
+                vendor_id=snapshot.vendor_id,
+                bucket="day",
+                date=snapshot.day,
+                on_time_delivery_rate=snapshot.on_time_delivery_rate,
+                quality_rating_avg=snapshot.quality_rating_avg,
+                average_response_time=snapshot.average_response_time,
+                fulfillment_rate=snapshot.fulfillment_rate,
+            ))
+            if len(daily_snapshots) >= batch_size:
+                compacted += self.save_daily(daily_snapshots)
+                daily_snapshots = []
+        compacted += self.save_daily(daily_snapshots)
+        return compacted
+
+    def save_daily(self, daily_snapshots):
+        FeaturesHistoricalPerformanceModel.objects.bulk_create(
+            daily_snapshots,
+            update_conflicts=True,
+            unique_fields=["vendor", "bucket", "date"],
+            update_fields=["on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate", "updated_date"],
+        )
+        return len(daily_snapshots)
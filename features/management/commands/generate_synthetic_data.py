@@ -0,0 +1,119 @@
+import datetime, pytz, random, time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from features.metrics import rebuild_vendor_aggregates, refresh_vendor_ranking
+from features.models import FeaturesVendorsProfileModel, FeaturesPurchaseOrderModel
+
+timezone = pytz.timezone("Asia/Kolkata")
+
+STATUSES_OPEN = ("pending", "in_progress")
+ITEM_NAMES = ("bolt", "nut", "washer", "bearing", "gasket", "valve", "cable", "panel", "sensor", "relay")
+
+
+class Command(BaseCommand):
+    help = "Bulk insert realistic vendors and purchase orders for load testing and benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendors", type=int, default=100)
+        parser.add_argument("--pos-per-vendor", type=int, default=100)
+        parser.add_argument("--ack-ratio", type=float, default=0.8, help="share of purchase orders acknowledged")
+        parser.add_argument("--complete-ratio", type=float, default=0.6, help="share of acknowledged purchase orders completed")
+        parser.add_argument("--on-time-ratio", type=float, default=0.85, help="share of completed purchase orders delivered on time")
+        parser.add_argument("--days", type=int, default=180, help="issue dates are spread over this many past days")
+        parser.add_argument("--prefix", default="synthetic", help="vendor codes and po numbers start with it")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.now = datetime.datetime.now(timezone)
+        run = f"{options['prefix']}-{time.time_ns()}"
+        started = time.perf_counter()
+
+        vendor_ids = self.create_vendors(run, options)
+        po_count = self.create_purchase_orders(run, vendor_ids, options)
+
+        """ aggregates and the ranking are rebuilt once for the whole batch instead of per purchase order """
+        rebuild_vendor_aggregates(vendor_ids)
+        refresh_vendor_ranking()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(vendor_ids)} vendors and {po_count} purchase orders with prefix {run} "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def create_vendors(self, run, options):
+        vendor_ids = []
+        for start in range(0, options["vendors"], options["batch_size"]):
+            vendors = [
+                FeaturesVendorsProfileModel(
+                    vendor_code=f"{run}-V{index}",
+                    name=f"Synthetic Vendor {index}",
+                    contact_details=f"vendor{index}@{run}.example.com",
+                    address=f"{self.random.randint(1, 999)} Industrial Area, Sector {self.random.randint(1, 99)}",
+                    on_time_delivery_rate=0.0,
+                    quality_rating_avg=0.0,
+                    average_response_time=0.0,
+                    fulfillment_rate=0.0,
+                )
+                for index in range(start, min(start + options["batch_size"], options["vendors"]))
+            ]
+            FeaturesVendorsProfileModel.objects.bulk_create(vendors)
+            vendor_ids += [vendor.id for vendor in vendors]
+        return vendor_ids
+
+    def create_purchase_orders(self, run, vendor_ids, options):
+        created = 0
+        purchase_orders = []
+        for vendor_id in vendor_ids:
+            """ vendors differ in reliability, so rankings and averages are not flat """
+            reliability = self.random.betavariate(8, 2)
+            for index in range(options["pos_per_vendor"]):
+                purchase_orders.append(self.purchase_order(run, vendor_id, index, reliability, options))
+                if len(purchase_orders) >= options["batch_size"]:
+                    created += self.save(purchase_orders)
+                    purchase_orders = []
+        return created + self.save(purchase_orders)
+
+    def purchase_order(self, run, vendor_id, index, reliability, options):
+        issue_date = self.now - datetime.timedelta(minutes=self.random.randint(60, options["days"] * 24 * 60))
+        delivery_date = (issue_date + datetime.timedelta(days=self.random.randint(3, 30))).date()
+        purchase_order = FeaturesPurchaseOrderModel(
+            po_number=f"{run}-{vendor_id}-{index}",
+            vendor_id=vendor_id,
+            delivery_date=delivery_date,
+            items=[
+                {"name": self.random.choice(ITEM_NAMES), "quantity": self.random.randint(1, 500), "unit_price": round(self.random.uniform(1, 250), 2)}
+                for _ in range(self.random.randint(1, 8))
+            ],
+            quantity=self.random.randint(1, 1000),
+            status=self.random.choice(STATUSES_OPEN),
+            issue_date=issue_date,
+        )
+
+        if self.random.random() >= options["ack_ratio"]:
+            return purchase_order
+        """ response times are long tailed, most vendors answer within hours, a few take days """
+        acknowledgment_date = issue_date + datetime.timedelta(hours=self.random.lognormvariate(1.5, 1.0))
+        if acknowledgment_date > self.now:
+            return purchase_order
+        purchase_order.acknowledgment_date = acknowledgment_date
+
+        if self.random.random() >= options["complete_ratio"]:
+            return purchase_order
+        on_time = self.random.random() < options["on_time_ratio"] * (0.5 + reliability / 2)
+        delay = -self.random.randint(0, 3) if on_time else self.random.randint(1, 10)
+        completed_date = timezone.localize(
+            datetime.datetime.combine(delivery_date + datetime.timedelta(days=delay), datetime.time(12))
+        )
+        if completed_date > self.now or completed_date < purchase_order.acknowledgment_date:
+            return purchase_order
+        purchase_order.status = "completed"
+        purchase_order.completed_date = completed_date
+        purchase_order.quality_rating = round(min(5.0, max(1.0, self.random.gauss(1 + 4 * reliability, 0.7))), 1)
+        return purchase_order
+
+    def save(self, purchase_orders):
+        with transaction.atomic():
+            FeaturesPurchaseOrderModel.objects.bulk_create(purchase_orders)
+        return len(purchase_orders)
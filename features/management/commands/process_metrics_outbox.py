@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from features.metrics import outbox_lag, pending_outbox_vendors, process_vendor_outbox, refresh_vendor_ranking
+
+
+class Command(BaseCommand):
+    help = "Apply queued purchase order metric events to vendor aggregates, coalescing events per vendor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.FEATURES_METRICS_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=settings.FEATURES_METRICS_BATCH_SIZE)
+        parser.add_argument("--max-staleness", type=int, default=settings.FEATURES_METRICS_MAX_STALENESS, help="in seconds")
+        parser.add_argument("--ranking-interval", type=int, default=settings.FEATURES_RANKING_REFRESH_INTERVAL, help="in seconds")
+        parser.add_argument("--once", action="store_true", help="drain the outbox and exit")
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        max_staleness = options["max_staleness"]
+        """ polling twice per staleness window keeps queued events within the bound """
+        interval = max(max_staleness / 2, 0.1)
+
+        """ a single worker runs in the calling thread and its connection """
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        ranking_stale, ranking_refreshed = False, time.monotonic()
+        try:
+            while True:
+                lag = outbox_lag()
+                if lag > max_staleness:
+                    self.stderr.write(self.style.WARNING(f"Metrics outbox is {lag:.1f}s behind, bound is {max_staleness}s"))
+
+                processed = self.drain(executor, workers, options["batch_size"])
+                ranking_stale = ranking_stale or bool(processed)
+                """ the ranking view is rebuilt at most once per ranking interval, and only after metrics moved """
+                if ranking_stale and (options["once"] or time.monotonic() - ranking_refreshed >= options["ranking_interval"]):
+                    refresh_vendor_ranking()
+                    ranking_stale, ranking_refreshed = False, time.monotonic()
+
+                if options["once"]:
+                    self.stdout.write(self.style.SUCCESS(f"Applied {processed} metric events"))
+                    return
+                if not processed:
+                    time.sleep(interval)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def drain(self, executor, workers, batch_size):
+        """ one pass over waiting vendors, each worker thread taking its own share of them """
+        processed = 0
+        while True:
+            vendor_ids = pending_outbox_vendors(workers * batch_size)
+            if not vendor_ids:
+                return processed
+            if executor is None:
+                applied = self.process_share(vendor_ids, batch_size)
+            else:
+                shares = [share for share in (vendor_ids[index::workers] for index in range(workers)) if share]
+                applied = sum(executor.map(self.process_pooled_share, shares, [batch_size] * len(shares)))
+            if not applied:
+                """ the remaining events are locked by another worker """
+                return processed
+            processed += applied
+
+    def process_share(self, vendor_ids, batch_size):
+        return sum(process_vendor_outbox(vendor_id, batch_size) for vendor_id in vendor_ids)
+
+    def process_pooled_share(self, vendor_ids, batch_size):
+        try:
+            return self.process_share(vendor_ids, batch_size)
+        finally:
+            connection.close()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from features.metrics import rebuild_vendor_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute vendor running aggregates and performance metrics from purchase orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendor-id", type=int, action="append", dest="vendor_ids")
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_vendor_aggregates(options["vendor_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt metrics for {rebuilt} vendors"))
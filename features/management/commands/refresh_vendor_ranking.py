@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from features.metrics import refresh_vendor_ranking
+
+
+class Command(BaseCommand):
+    help = "Refresh the vendor ranking materialized view, once or on a fixed interval"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=0, help="in seconds, 0 refreshes once and exits")
+        parser.add_argument("--blocking", action="store_true", help="plain refresh, locking out ranking reads meanwhile")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            refresh_vendor_ranking(concurrently=not options["blocking"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed vendor ranking in {(time.perf_counter() - started) * 1000:.1f} ms"
+            ))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,297 @@
+import datetime, pytz
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min, Q, Sum
+from features.cache import invalidate_vendor
+from features.events import publish_event
+from features.models import (
+    FeaturesVendorsProfileModel,
+    FeaturesPurchaseOrderModel,
+    FeaturesHistoricalPerformanceModel,
+    FeaturesVendorMetricsAggregateModel,
+    FeaturesMetricsOutboxModel,
+)
+
+timezone = pytz.timezone("Asia/Kolkata")
+
+AGGREGATE_FIELDS = (
+    "issued_count",
+    "completed_count",
+    "on_time_count",
+    "fulfilled_count",
+    "quality_rating_sum",
+    "quality_rating_count",
+    "response_time_sum",
+    "response_time_count",
+)
+
+""" purchase order columns po_contribution() reads, enough to load rows only for snapshots """
+SNAPSHOT_FIELDS = (
+    "id",
+    "vendor_id",
+    "status",
+    "issue_date",
+    "acknowledgment_date",
+    "completed_date",
+    "delivery_date",
+    "quality_rating",
+)
+
+def _as_datetime(value):
+    """ date fields assigned straight from serializers are plain dates until reloaded """
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is None:
+        value = timezone.localize(value)
+    return value
+
+def _as_date(value):
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        value = value.astimezone(timezone).date()
+    return value
+
+def po_contribution(po):
+    """ counters a single purchase order adds to its vendor's aggregates """
+    contribution = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    contribution["issued_count"] = 1
+
+    if po.status == "completed":
+        contribution["completed_count"] = 1
+        if po.completed_date and _as_date(po.completed_date) <= _as_date(po.delivery_date):
+            contribution["on_time_count"] = 1
+        if po.quality_rating != 0.0:
+            contribution["fulfilled_count"] = 1
+        if po.quality_rating is not None:
+            contribution["quality_rating_sum"] = po.quality_rating
+            contribution["quality_rating_count"] = 1
+
+    if po.acknowledgment_date:
+        response_time = _as_datetime(po.acknowledgment_date) - _as_datetime(po.issue_date)
+        contribution["response_time_sum"] = response_time.total_seconds()
+        contribution["response_time_count"] = 1
+    return contribution
+
+def po_snapshot(po):
+    """ vendor and contribution of a purchase order, taken before it is modified """
+    if po is None:
+        return None
+    return po.vendor_id, po_contribution(po)
+
+def apply_po_snapshots(before, after):
+    """ moving vendor aggregates from the before snapshot to the after snapshot """
+    apply_po_transitions([(before, after)])
+
+def apply_po_transitions(transitions):
+    """ applying many (before, after) snapshot pairs, one aggregate update per vendor """
+    deltas = {}
+    for before, after in transitions:
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            vendor_id, contribution = snapshot
+            delta = deltas.setdefault(vendor_id, dict.fromkeys(AGGREGATE_FIELDS, 0))
+            for key, value in contribution.items():
+                delta[key] += sign * value
+
+    apply_vendor_deltas(deltas)
+
+def apply_po_contributions(purchase_orders, sign=1):
+    """ adding (or with sign=-1 removing) many purchase orders, one aggregate update per vendor """
+    deltas = {}
+    for po in purchase_orders:
+        delta = deltas.setdefault(po.vendor_id, dict.fromkeys(AGGREGATE_FIELDS, 0))
+        for key, value in po_contribution(po).items():
+            delta[key] += sign * value
+
+    apply_vendor_deltas(deltas)
+
+def apply_vendor_deltas(deltas):
+    """ applying per vendor deltas right away in sync mode, else queueing them for the metrics worker """
+    deltas = {vendor_id: delta for vendor_id, delta in deltas.items() if any(delta.values())}
+    if settings.FEATURES_METRICS_MODE == "sync":
+        """ locking aggregates in vendor order so writers touching the same vendors cannot deadlock """
+        for vendor_id, delta in sorted(deltas.items()):
+            apply_vendor_delta(vendor_id, delta)
+        return None
+
+    FeaturesMetricsOutboxModel.objects.bulk_create([
+        FeaturesMetricsOutboxModel(vendor_id=vendor_id, delta=delta)
+        for vendor_id, delta in deltas.items()
+    ])
+
+def apply_vendor_delta(vendor_id, delta):
+    """ adding counter deltas to a vendor's aggregates and refreshing its metrics """
+    if not any(delta.values()):
+        return None
+
+    with transaction.atomic(savepoint=False):
+        aggregate, _ = FeaturesVendorMetricsAggregateModel.objects.select_for_update().get_or_create(
+            vendor_id=vendor_id
+        )
+        for key, value in delta.items():
+            setattr(aggregate, key, getattr(aggregate, key) + value)
+        aggregate.save()
+        return refresh_vendor_metrics(aggregate)
+
+def pending_outbox_vendors(limit):
+    """ vendors with queued metric events, the longest waiting first """
+    return list(
+        FeaturesMetricsOutboxModel.objects.values("vendor_id")
+        .annotate(first_event=Min("id"))
+        .order_by("first_event")
+        .values_list("vendor_id", flat=True)[:limit]
+    )
+
+def process_vendor_outbox(vendor_id, batch_size):
+    """ folding the queued events of a vendor into a single aggregate update """
+    with transaction.atomic():
+        events = list(
+            FeaturesMetricsOutboxModel.objects.select_for_update(skip_locked=True)
+            .filter(vendor_id=vendor_id)
+            .order_by("id")
+            .values_list("id", "delta")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        delta = dict.fromkeys(AGGREGATE_FIELDS, 0)
+        for _, event_delta in events:
+            for key, value in event_delta.items():
+                delta[key] += value
+        apply_vendor_delta(vendor_id, delta)
+        FeaturesMetricsOutboxModel.objects.filter(id__in=[event_id for event_id, _ in events]).delete()
+    return len(events)
+
+def outbox_lag():
+    """ seconds the oldest queued metric event has been waiting, 0 when the outbox is empty """
+    oldest = FeaturesMetricsOutboxModel.objects.aggregate(oldest=Min("created_date"))["oldest"]
+    if oldest is None:
+        return 0.0
+    return (datetime.datetime.now(timezone) - oldest).total_seconds()
+
+def compute_metrics(aggregate):
+    """ performance metrics derived from running aggregates """
+    on_time_delivery_rate = 0.0
+    if aggregate.completed_count > 0:
+        on_time_delivery_rate = aggregate.on_time_count / aggregate.completed_count
+
+    fulfillment_rate = 0.0
+    if aggregate.issued_count > 0:
+        fulfillment_rate = aggregate.fulfilled_count / aggregate.issued_count
+
+    quality_rating_avg = 0.0
+    if aggregate.quality_rating_count > 0:
+        quality_rating_avg = aggregate.quality_rating_sum / aggregate.quality_rating_count
+
+    average_response_time = 0.0  # in hours
+    if aggregate.response_time_count > 0:
+        average_response_time = round(aggregate.response_time_sum / aggregate.response_time_count / (60 * 60), 3)
+
+    return {
+        "on_time_delivery_rate": on_time_delivery_rate,
+        "quality_rating_avg": quality_rating_avg,
+        "average_response_time": average_response_time,
+        "fulfillment_rate": fulfillment_rate,
+    }
+
+def bucket_start(value, bucket):
+    """ start of the hour or day bucket a timestamp falls in, in local time """
+    value = value.astimezone(timezone).replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        value = timezone.localize(value.replace(hour=0, tzinfo=None))
+    return value
+
+def refresh_vendor_metrics(aggregate):
+    """ writing metrics of the aggregate to vendor profile and the current hourly snapshot """
+    metrics = compute_metrics(aggregate)
+    now = datetime.datetime.now(timezone)
+
+    FeaturesHistoricalPerformanceModel.objects.update_or_create(
+        vendor_id=aggregate.vendor_id,
+        bucket="hour",
+        date=bucket_start(now, "hour"),
+        defaults=metrics,
+    )
+    FeaturesVendorsProfileModel.objects.filter(id=aggregate.vendor_id).update(
+        updated_date=now,
+        **metrics
+    )
+    invalidate_vendor(aggregate.vendor_id)
+    publish_event("vendor.metrics", aggregate.vendor_id, updated_date=now, **metrics)
+    return metrics
+
+def refresh_vendor_ranking(concurrently=True):
+    """ rebuilding the vendor ranking materialized view, concurrently so rankings stay readable meanwhile """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "REFRESH MATERIALIZED VIEW {}features_vendor_ranking".format("CONCURRENTLY " if concurrently else "")
+        )
+
+def response_time_expression():
+    """ acknowledgment delay of a purchase order computed by the database """
+    return ExpressionWrapper(F("acknowledgment_date") - F("issue_date"), output_field=DurationField())
+
+def average_response_time(vendor_id):
+    """ average response time in hours with a single SQL aggregate, bypassing running aggregates """
+    average = FeaturesPurchaseOrderModel.objects.filter(
+        vendor_id=vendor_id,
+        acknowledgment_date__isnull=False,
+    ).aggregate(average=Avg(response_time_expression()))["average"]
+    if average is None:
+        return 0.0
+    return round(average.total_seconds() / (60 * 60), 3)
+
+def rebuild_vendor_aggregates(vendor_ids=None):
+    """ recomputing running aggregates from purchase orders with one grouped query """
+    purchase_orders = FeaturesPurchaseOrderModel.objects.all()
+    if vendor_ids is None:
+        vendor_ids = FeaturesVendorsProfileModel.objects.values_list("id", flat=True)
+    else:
+        purchase_orders = purchase_orders.filter(vendor_id__in=vendor_ids)
+    vendor_ids = sorted(vendor_ids)
+
+    completed = Q(status="completed")
+    rated = completed & Q(quality_rating__isnull=False)
+    acknowledged = Q(acknowledgment_date__isnull=False)
+
+    with transaction.atomic():
+        """
+        locking every aggregate before counting: writers that are already past their purchase order
+        update wait here and add their delta on top of the rebuilt values, later ones are counted
+        """
+        FeaturesVendorMetricsAggregateModel.objects.bulk_create(
+            [FeaturesVendorMetricsAggregateModel(vendor_id=vendor_id) for vendor_id in vendor_ids],
+            ignore_conflicts=True,
+        )
+        aggregates = {
+            aggregate.vendor_id: aggregate
+            for aggregate in FeaturesVendorMetricsAggregateModel.objects.select_for_update()
+            .filter(vendor_id__in=vendor_ids)
+            .order_by("vendor_id")
+        }
+
+        totals = purchase_orders.values("vendor_id").annotate(
+            issued_count=Count("id"),
+            completed_count=Count("id", filter=completed),
+            on_time_count=Count("id", filter=completed & Q(completed_date__date__lte=F("delivery_date"))),
+            fulfilled_count=Count("id", filter=completed & ~Q(quality_rating=0.0)),
+            quality_rating_sum=Sum("quality_rating", filter=rated, default=0.0),
+            quality_rating_count=Count("id", filter=rated),
+            response_time_total=Sum(response_time_expression(), filter=acknowledged),
+            response_time_count=Count("id", filter=acknowledged),
+        ).order_by()
+        totals = {row.pop("vendor_id"): row for row in totals}
+
+        for vendor_id, aggregate in aggregates.items():
+            row = totals.get(vendor_id, {})
+            response_time_total = row.pop("response_time_total", None)
+            row["response_time_sum"] = response_time_total.total_seconds() if response_time_total else 0.0
+            for key in AGGREGATE_FIELDS:
+                setattr(aggregate, key, row.get(key, 0))
+            aggregate.save()
+            refresh_vendor_metrics(aggregate)
+    return len(aggregates)
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.3 on 2026-10-18 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+
+
+def backfill_vendor_metrics_aggregates(apps, schema_editor):
+    """ seeding running aggregates from existing purchase orders """
+    purchase_order_model = apps.get_model("features", "FeaturesPurchaseOrderModel")
+    aggregate_model = apps.get_model("features", "FeaturesVendorMetricsAggregateModel")
+
+    purchase_order_model.objects.filter(status="completed", completed_date__isnull=True).update(
+        completed_date=F("updated_date")
+    )
+
+    completed = Q(status="completed")
+    rated = completed & Q(quality_rating__isnull=False)
+    acknowledged = Q(acknowledgment_date__isnull=False)
+    totals = purchase_order_model.objects.values("vendor_id").annotate(
+        issued=Count("id"),
+        completed=Count("id", filter=completed),
+        on_time=Count("id", filter=completed & Q(completed_date__date__lte=F("delivery_date"))),
+        fulfilled=Count("id", filter=completed & ~Q(quality_rating=0.0)),
+        quality_sum=Sum("quality_rating", filter=rated),
+        quality_count=Count("id", filter=rated),
+        response_sum=Sum(
+            ExpressionWrapper(F("acknowledgment_date") - F("issue_date"), output_field=DurationField()),
+            filter=acknowledged,
+        ),
+        response_count=Count("id", filter=acknowledged),
+    )
+    aggregate_model.objects.bulk_create([
+        aggregate_model(
+            vendor_id=row["vendor_id"],
+            issued_count=row["issued"],
+            completed_count=row["completed"],
+            on_time_count=row["on_time"],
+            fulfilled_count=row["fulfilled"],
+            quality_rating_sum=row["quality_sum"] or 0.0,
+            quality_rating_count=row["quality_count"],
+            response_time_sum=row["response_sum"].total_seconds() if row["response_sum"] else 0.0,
+            response_time_count=row["response_count"],
+        )
+        for row in totals.order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0005_alter_featureshistoricalperformancemodel_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='featurespurchaseordermodel',
+            name='completed_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='FeaturesVendorMetricsAggregateModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_date', models.DateTimeField(auto_now=True, null=True)),
+                ('issued_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('fulfilled_count', models.IntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0.0)),
+                ('quality_rating_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0.0)),
+                ('response_time_count', models.IntegerField(default=0)),
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='FeaturesVendorMetricsAggregate_vendor', to='features.featuresvendorsprofilemodel')),
+            ],
+            options={
+                'verbose_name': 'Vendor Metrics Aggregate Model',
+                'verbose_name_plural': 'Vendor Metrics Aggregate Models',
+            },
+        ),
+        migrations.RunPython(backfill_vendor_metrics_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0006_vendor_metrics_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='featurespurchaseordermodel',
+            index=models.Index(models.OrderBy(models.F('updated_date'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='features_po_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='featuresvendorsprofilemodel',
+            index=models.Index(models.OrderBy(models.F('updated_date'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='features_vendor_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:10
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('features', '0007_list_keyset_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='featurespurchaseordermodel',
+            index=models.Index(fields=['vendor', 'status'], name='features_po_vendor_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='featurespurchaseordermodel',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', False)), fields=['vendor'], include=('issue_date', 'acknowledgment_date'), name='features_po_vendor_acked_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='featurespurchaseordermodel',
+            index=models.Index(fields=['issue_date'], name='features_po_issue_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='featuresvendorsprofilemodel',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['contact_details'], name='features_vendor_contact_hash'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:11
+
+from django.db import migrations, models
+from django.db.models.functions import TruncHour
+
+
+def bucket_existing_snapshots(apps, schema_editor):
+    """ aligning existing snapshots to hourly buckets, keeping the latest one per hour """
+    performance_model = apps.get_model("features", "FeaturesHistoricalPerformanceModel")
+
+    kept = set()
+    snapshots = performance_model.objects.annotate(hour=TruncHour("date")).order_by("vendor_id", "hour", "-date", "-id")
+    for snapshot in snapshots.iterator():
+        key = (snapshot.vendor_id, snapshot.hour)
+        if key in kept:
+            snapshot.delete()
+            continue
+        kept.add(key)
+        snapshot.date = snapshot.hour
+        snapshot.bucket = "hour"
+        snapshot.save(update_fields=["date", "bucket"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='featureshistoricalperformancemodel',
+            name='bucket',
+            field=models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], default='hour', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='featureshistoricalperformancemodel',
+            index=models.Index(fields=['vendor', '-date'], name='features_performance_date_idx'),
+        ),
+        migrations.RunPython(bucket_existing_snapshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='featureshistoricalperformancemodel',
+            constraint=models.UniqueConstraint(fields=('vendor', 'bucket', 'date'), name='features_performance_bucket_unique'),
+        ),
+    ]
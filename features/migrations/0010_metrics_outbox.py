@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0009_performance_time_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeaturesMetricsOutboxModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_date', models.DateTimeField(auto_now=True, null=True)),
+                ('delta', models.JSONField()),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='FeaturesMetricsOutbox_vendor', to='features.featuresvendorsprofilemodel')),
+            ],
+            options={
+                'verbose_name': 'Metrics Outbox Model',
+                'verbose_name_plural': 'Metrics Outbox Models',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+RANKING_VIEW_SQL = """
+CREATE MATERIALIZED VIEW features_vendor_ranking AS
+SELECT
+    vendor.id AS vendor_id,
+    vendor.vendor_code,
+    vendor.name,
+    vendor.on_time_delivery_rate,
+    vendor.quality_rating_avg,
+    vendor.average_response_time,
+    vendor.fulfillment_rate,
+    COALESCE(aggregate.issued_count, 0) AS po_count,
+    COALESCE(aggregate.response_time_count, 0) AS acknowledged_count,
+    now() AS refreshed_date
+FROM features_featuresvendorsprofilemodel vendor
+LEFT JOIN features_featuresvendormetricsaggregatemodel aggregate ON aggregate.vendor_id = vendor.id;
+
+CREATE UNIQUE INDEX features_ranking_vendor_idx ON features_vendor_ranking (vendor_id);
+CREATE INDEX features_ranking_on_time_idx ON features_vendor_ranking (on_time_delivery_rate DESC, vendor_id);
+CREATE INDEX features_ranking_quality_idx ON features_vendor_ranking (quality_rating_avg DESC, vendor_id);
+CREATE INDEX features_ranking_fulfillment_idx ON features_vendor_ranking (fulfillment_rate DESC, vendor_id);
+CREATE INDEX features_ranking_response_idx ON features_vendor_ranking (average_response_time, vendor_id)
+    WHERE acknowledged_count > 0;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0010_metrics_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeaturesVendorRankingModel',
+            fields=[
+                ('vendor', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='FeaturesVendorRanking_vendor', serialize=False, to='features.featuresvendorsprofilemodel')),
+                ('vendor_code', models.CharField()),
+                ('name', models.CharField(max_length=1000)),
+                ('on_time_delivery_rate', models.FloatField()),
+                ('quality_rating_avg', models.FloatField()),
+                ('average_response_time', models.FloatField()),
+                ('fulfillment_rate', models.FloatField()),
+                ('po_count', models.IntegerField()),
+                ('acknowledged_count', models.IntegerField()),
+                ('refreshed_date', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Vendor Ranking Model',
+                'verbose_name_plural': 'Vendor Ranking Models',
+                'db_table': 'features_vendor_ranking',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(RANKING_VIEW_SQL, "DROP MATERIALIZED VIEW features_vendor_ranking;"),
+    ]
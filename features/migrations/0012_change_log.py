@@ -0,0 +1,79 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:41
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+CHANGED_TABLES = {
+    "vendor": "features_featuresvendorsprofilemodel",
+    "purchase_order": "features_featurespurchaseordermodel",
+    "performance": "features_featureshistoricalperformancemodel",
+}
+
+"""
+statement level triggers reading transition tables, so bulk writes log their rows with one INSERT ... SELECT
+"""
+CHANGE_LOG_FUNCTION_SQL = """
+CREATE FUNCTION features_log_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO features_featureschangelogmodel (txid, resource, object_id, operation, data)
+        SELECT pg_current_xact_id()::text::bigint, TG_ARGV[0], old_rows.id, 'delete', NULL FROM old_rows;
+    ELSE
+        INSERT INTO features_featureschangelogmodel (txid, resource, object_id, operation, data)
+        SELECT pg_current_xact_id()::text::bigint, TG_ARGV[0], new_rows.id, lower(TG_OP), to_jsonb(new_rows)
+        FROM new_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+CHANGE_LOG_TRIGGER_SQL = """
+CREATE TRIGGER features_{resource}_insert_log AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION features_log_changes('{resource}');
+CREATE TRIGGER features_{resource}_update_log AFTER UPDATE ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION features_log_changes('{resource}');
+CREATE TRIGGER features_{resource}_delete_log AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION features_log_changes('{resource}');
+"""
+
+CHANGE_LOG_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER features_{resource}_insert_log ON {table};
+DROP TRIGGER features_{resource}_update_log ON {table};
+DROP TRIGGER features_{resource}_delete_log ON {table};
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0011_vendor_ranking_view'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeaturesChangeLogModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('txid', models.BigIntegerField()),
+                ('resource', models.CharField(max_length=32)),
+                ('object_id', models.BigIntegerField()),
+                ('operation', models.CharField(max_length=6)),
+                ('data', models.JSONField(null=True)),
+                ('created_date', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+            ],
+            options={
+                'verbose_name': 'Change Log Model',
+                'verbose_name_plural': 'Change Log Models',
+                'indexes': [models.Index(fields=['txid', 'id'], name='features_change_log_order_idx')],
+            },
+        ),
+        migrations.RunSQL(CHANGE_LOG_FUNCTION_SQL, "DROP FUNCTION features_log_changes();"),
+        *(
+            migrations.RunSQL(
+                CHANGE_LOG_TRIGGER_SQL.format(resource=resource, table=table),
+                CHANGE_LOG_TRIGGER_REVERSE_SQL.format(resource=resource, table=table),
+            )
+            for resource, table in CHANGED_TABLES.items()
+        ),
+    ]
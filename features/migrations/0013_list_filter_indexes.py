@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('features', '0012_change_log'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='featurespurchaseordermodel',
+            index=models.Index(fields=['delivery_date'], name='features_po_delivery_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='featurespurchaseordermodel',
+            index=models.Index(condition=models.Q(('quality_rating__isnull', False)), fields=['quality_rating'], name='features_po_quality_rating_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 import datetime, pytz
+from django.contrib.postgres.indexes import HashIndex
 from django.db import models
+from django.db.models.functions import Now
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -25,6 +27,14 @@ class FeaturesVendorsProfileModel(TimeStampedModel):
     class Meta:
         verbose_name = "Vendor Profile Model"
         verbose_name_plural = "Vendor Profile Models"
+        indexes = [
+            models.Index(
+                models.F("updated_date").desc(nulls_last=True),
+                models.F("id").desc(),
+                name="features_vendor_keyset_idx",
+            ),
+            HashIndex(fields=["contact_details"], name="features_vendor_contact_hash"),
+        ]
 
 
 class FeaturesPurchaseOrderModel(TimeStampedModel):
@@ -42,10 +52,32 @@ class FeaturesPurchaseOrderModel(TimeStampedModel):
     quality_rating = models.FloatField(null=True, blank=True)
     issue_date = models.DateTimeField()
     acknowledgment_date = models.DateTimeField(null=True, blank=True)
+    completed_date = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Purchase Order Model"
         verbose_name_plural = "Purchase Order Models"
+        indexes = [
+            models.Index(
+                models.F("updated_date").desc(nulls_last=True),
+                models.F("id").desc(),
+                name="features_po_keyset_idx",
+            ),
+            models.Index(fields=["vendor", "status"], name="features_po_vendor_status_idx"),
+            models.Index(
+                fields=["vendor"],
+                include=["issue_date", "acknowledgment_date"],
+                condition=models.Q(acknowledgment_date__isnull=False),
+                name="features_po_vendor_acked_idx",
+            ),
+            models.Index(fields=["issue_date"], name="features_po_issue_date_idx"),
+            models.Index(fields=["delivery_date"], name="features_po_delivery_date_idx"),
+            models.Index(
+                fields=["quality_rating"],
+                condition=models.Q(quality_rating__isnull=False),
+                name="features_po_quality_rating_idx",
+            ),
+        ]
 
 class FeaturesHistoricalPerformanceModel(TimeStampedModel):
     vendor = models.ForeignKey(
@@ -54,6 +86,7 @@ class FeaturesHistoricalPerformanceModel(TimeStampedModel):
         related_name="FeaturesHistoricalPerformanceModel_vendor"
     )
     date = models.DateTimeField()
+    bucket = models.CharField(max_length=10, choices=[("hour", "Hour"), ("day", "Day")], default="hour")
     on_time_delivery_rate = models.FloatField()
     quality_rating_avg = models.FloatField()
     average_response_time = models.FloatField()
@@ -62,3 +95,90 @@ class FeaturesHistoricalPerformanceModel(TimeStampedModel):
     class Meta:
         verbose_name = "Historical Performance Model"
         verbose_name_plural = "Historical Performance Models"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "bucket", "date"],
+                name="features_performance_bucket_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["vendor", "-date"], name="features_performance_date_idx"),
+        ]
+
+class FeaturesVendorMetricsAggregateModel(TimeStampedModel):
+    vendor = models.OneToOneField(
+        FeaturesVendorsProfileModel,
+        on_delete=models.CASCADE,
+        related_name="FeaturesVendorMetricsAggregate_vendor"
+    )
+    issued_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    fulfilled_count = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0.0)
+    quality_rating_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0.0)  # in seconds
+    response_time_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Vendor Metrics Aggregate Model"
+        verbose_name_plural = "Vendor Metrics Aggregate Models"
+
+class FeaturesMetricsOutboxModel(TimeStampedModel):
+    vendor = models.ForeignKey(
+        FeaturesVendorsProfileModel,
+        on_delete=models.CASCADE,
+        related_name="FeaturesMetricsOutbox_vendor"
+    )
+    delta = models.JSONField()
+
+    class Meta:
+        verbose_name = "Metrics Outbox Model"
+        verbose_name_plural = "Metrics Outbox Models"
+
+class FeaturesChangeLogModel(models.Model):
+    """
+    Row changes of vendors, purchase orders and performance snapshots, written by database triggers only.
+    Rows are read in (txid, id) order, see FeaturesChangeFeedSerializer.
+    The id doubles as the version of the written row, writers of one row take their ids in write order
+    """
+    txid = models.BigIntegerField()
+    resource = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(max_length=6)
+    data = models.JSONField(null=True)
+    created_date = models.DateTimeField(db_default=Now())
+
+    class Meta:
+        verbose_name = "Change Log Model"
+        verbose_name_plural = "Change Log Models"
+        indexes = [
+            models.Index(fields=["txid", "id"], name="features_change_log_order_idx"),
+        ]
+
+class FeaturesVendorRankingModel(models.Model):
+    """
+    Read only rows of the features_vendor_ranking materialized view, see refresh_vendor_ranking()
+    """
+    vendor = models.OneToOneField(
+        FeaturesVendorsProfileModel,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_constraint=False,
+        related_name="FeaturesVendorRanking_vendor"
+    )
+    vendor_code = models.CharField()
+    name = models.CharField(max_length=1000)
+    on_time_delivery_rate = models.FloatField()
+    quality_rating_avg = models.FloatField()
+    average_response_time = models.FloatField()
+    fulfillment_rate = models.FloatField()
+    po_count = models.IntegerField()
+    acknowledged_count = models.IntegerField()
+    refreshed_date = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "features_vendor_ranking"
+        verbose_name = "Vendor Ranking Model"
+        verbose_name_plural = "Vendor Ranking Models"
@@ -0,0 +1,66 @@
+import json, re, secrets
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FeaturesRawJSON:
+    """
+    JSON text that FeaturesJSONRenderer embeds as is, such as a jsonb column read as text
+    """
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return f"FeaturesRawJSON({self.text!r})"
+
+
+class FeaturesJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding through orjson when it is installed, falling back to the stdlib encoder.
+    Output matches JSONRenderer, with FeaturesRawJSON values spliced in without being decoded
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        encoder = self.encoder_class()
+        marker = secrets.token_hex(8)
+        fragments = []
+
+        def default(obj):
+            """ raw JSON is encoded as a marker string first and replaced once encoding is done """
+            if isinstance(obj, FeaturesRawJSON):
+                fragments.append(obj.text)
+                return f"{marker}:{len(fragments) - 1}"
+            return encoder.default(obj)
+
+        if orjson is not None and indent is None and self.compact:
+            ret = orjson.dumps(data, default=default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        else:
+            if indent is None:
+                separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+            else:
+                separators = INDENT_SEPARATORS
+            ret = json.dumps(
+                data, cls=self.encoder_class, default=default,
+                indent=indent, ensure_ascii=self.ensure_ascii,
+                allow_nan=not self.strict, separators=separators
+            ).encode()
+
+        if fragments:
+            ret = re.sub(
+                rb'"' + marker.encode() + rb':(\d+)"',
+                lambda match: fragments[int(match.group(1))].encode(),
+                ret,
+            )
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -1,14 +1,277 @@
-import datetime, random, pytz, logging, threading
+import base64, csv, datetime, json, random, pytz, logging, threading
 from vendor_management.settings import logger
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q, TextField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
 from rest_framework import serializers
 from features.models import (
     FeaturesVendorsProfileModel,
     FeaturesPurchaseOrderModel,
     FeaturesHistoricalPerformanceModel,
+    FeaturesVendorRankingModel,
+    FeaturesChangeLogModel,
 )
+from features.metrics import (
+    SNAPSHOT_FIELDS,
+    po_snapshot,
+    apply_po_snapshots,
+    apply_po_transitions,
+    apply_po_contributions,
+)
+from features.cache import acached_vendor_read, cached_vendor_read, invalidate_vendor
+from features.conditional import conditional_request
+from features.events import broker, event_stream, publish_events, publish_purchase_order, purchase_order_event
+from features.renderers import FeaturesRawJSON
 
 timezone = pytz.timezone("Asia/Kolkata")
 
+PURCHASE_ORDER_VALUE_FIELDS = [
+    field.attname for field in FeaturesPurchaseOrderModel._meta.concrete_fields if field.name != "items"
+]
+
+def purchase_order_values(queryset, fields=PURCHASE_ORDER_VALUE_FIELDS):
+    """ purchase order rows with items read as jsonb text, see with_raw_items() """
+    return queryset.values(*fields, raw_items=Cast("items", TextField()))
+
+def with_raw_items(purchase_order):
+    """ items handed to the renderer as the JSON text postgres sent, skipping a decode and re-encode """
+    purchase_order["items"] = FeaturesRawJSON(purchase_order.pop("raw_items"))
+    return purchase_order
+
+def encode_cursor(updated_date, pk):
+    """ opaque cursor pointing just past the given row """
+    payload = {"updated_date": updated_date.isoformat() if updated_date else None, "id": pk}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor):
+    """ (updated_date, id) of the row a cursor points past """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        updated_date = payload["updated_date"]
+        if updated_date is not None:
+            updated_date = datetime.datetime.fromisoformat(updated_date)
+        return updated_date, int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise serializers.ValidationError("Invalid cursor!")
+
+class FeaturesAsyncSerializerMixin:
+    """
+    Async is_valid()/save() for read serializers served by async views. Field validation is
+    plain python and runs inline, database access goes through avalidate() and acreate()
+    """
+
+    async def avalidate(self, data):
+        """ the object-level validate(), serializers whose validate() reads the database override this """
+        return self.validate(data)
+
+    async def ais_valid(self):
+        try:
+            self._validated_data = await self.avalidate(self.to_internal_value(self.initial_data))
+        except serializers.ValidationError as exc:
+            self._validated_data = {}
+            self._errors = serializers.as_serializer_error(exc)
+        else:
+            self._errors = {}
+        return not bool(self._errors)
+
+    async def asave(self):
+        self.instance = await self.acreate(self.validated_data)
+        return self.instance
+
+class FeaturesKeysetPaginationSerializer(FeaturesAsyncSerializerMixin, serializers.Serializer):
+    """
+    Keyset pagination on (updated_date, id), newest first, over filtered rows of a model.
+    Subclasses name the columns a client may select with fields= and the filters they accept
+    """
+    KEYSET_FIELDS = ("id", "updated_date")
+
+    model = None
+    results_name = None
+    value_fields = ()
+    default_fields = ()
+    filter_lookups = {}
+
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.JSONField(required=False)
+
+    def get_fields(self):
+        """ the projection parameter is named fields, which the serializer itself uses as an attribute """
+        fields = super().get_fields()
+        fields["fields"] = serializers.CharField(required=False)
+        return fields
+
+    def validate_cursor(self, value):
+        decode_cursor(value)
+        return value
+
+    def validate_page_size(self, value):
+        return min(value, settings.FEATURES_LIST_MAX_PAGE_SIZE)
+
+    def validate_fields(self, value):
+        fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+        unknown = [name for name in fields if name not in self.value_fields]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields {', '.join(unknown)}!")
+        if not fields:
+            raise serializers.ValidationError("No fields selected!")
+        return fields
+
+    def get_queryset(self, validated_data):
+        """ rows narrowed by the filter parameters present in the request """
+        return self.model.objects.filter(**{
+            lookup: validated_data[name] for name, lookup in self.filter_lookups.items() if name in validated_data
+        })
+
+    def project(self, queryset, fields):
+        return queryset.values(*fields)
+
+    def page_queryset(self, validated_data):
+        """ selected columns only, plus the keyset columns the cursor is built from """
+        fields = validated_data.get("fields", self.default_fields)
+        self.hidden_fields = [name for name in self.KEYSET_FIELDS if name not in fields]
+        self.present_rows = bool(self.hidden_fields)
+        return self.project(self.get_queryset(validated_data), [*fields, *self.hidden_fields])
+
+    def create(self, validated_data):
+        """ creating page of rows """
+        rows, next_cursor = self.paginate(self.page_queryset(validated_data), validated_data)
+        return self.page_data(rows, next_cursor, validated_data)
+
+    async def acreate(self, validated_data):
+        rows, next_cursor = await self.apaginate(self.page_queryset(validated_data), validated_data)
+        return self.page_data(rows, next_cursor, validated_data)
+
+    def version(self):
+        """
+        keys of the rows on the requested page and its next cursor, all a page body depends on
+        since every write stamps updated_date; read from the keyset columns alone
+        """
+        if not hasattr(self, "page_version"):
+            queryset = self.get_queryset(self.validated_data).values(*self.KEYSET_FIELDS)
+            self.set_page_version(*self.paginate(queryset, self.validated_data))
+        return self.page_version
+
+    async def aversion(self):
+        if not hasattr(self, "page_version"):
+            queryset = self.get_queryset(self.validated_data).values(*self.KEYSET_FIELDS)
+            self.set_page_version(*await self.apaginate(queryset, self.validated_data))
+        return self.page_version
+
+    def set_page_version(self, rows, next_cursor):
+        """ lists carry no Last-Modified, a deleted row does not move the newest updated_date """
+        self.page_version = ([(row["id"], row["updated_date"]) for row in rows], next_cursor), None
+
+    def page_data(self, rows, next_cursor, validated_data):
+        self.set_page_version(rows, next_cursor)
+        if self.present_rows:
+            for row in rows:
+                self.present(row)
+
+        validated_data["data"] = {
+                                self.results_name: rows,
+                                "next_cursor": next_cursor
+                            }
+        return validated_data
+
+    def present(self, row):
+        """ dropping keyset columns the client did not select, subclasses setting present_rows to reshape rows """
+        for name in self.hidden_fields:
+            del row[name]
+        return row
+
+    def page_querysets(self, queryset, validated_data):
+        """ page size, and the ordered querysets of dated and undated rows following the cursor """
+        page_size = validated_data.get("page_size", settings.FEATURES_LIST_PAGE_SIZE)
+        dated = queryset.filter(updated_date__isnull=False)
+        undated = queryset.filter(updated_date__isnull=True)
+
+        if "cursor" in validated_data:
+            updated_date, pk = decode_cursor(validated_data["cursor"])
+            if updated_date is None:
+                dated = None
+                undated = undated.filter(id__lt=pk)
+            else:
+                """ upper bound on updated_date keeps this an ordered index range scan """
+                dated = dated.filter(updated_date__lte=updated_date).filter(
+                    Q(updated_date__lt=updated_date) | Q(id__lt=pk)
+                )
+
+        if dated is not None:
+            dated = dated.order_by(F("updated_date").desc(nulls_last=True), "-id")
+        """ rows never stamped with updated_date are listed last """
+        return page_size, dated, undated.order_by("-id")
+
+    def paginate(self, queryset, validated_data):
+        """ one page of rows from the queryset and the cursor of the next page """
+        page_size, dated, undated = self.page_querysets(queryset, validated_data)
+        limit = page_size + 1
+
+        rows = []
+        if dated is not None:
+            rows = list(dated[:limit])
+        if len(rows) < limit:
+            rows += list(undated[:limit - len(rows)])
+        return self.page(rows, page_size)
+
+    async def apaginate(self, queryset, validated_data):
+        """ paginate() through the async ORM """
+        page_size, dated, undated = self.page_querysets(queryset, validated_data)
+        limit = page_size + 1
+
+        rows = []
+        if dated is not None:
+            rows = [row async for row in dated[:limit]]
+        if len(rows) < limit:
+            rows += [row async for row in undated[:limit - len(rows)]]
+        return self.page(rows, page_size)
+
+    def page(self, rows, page_size):
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1]["updated_date"], rows[-1]["id"])
+        return rows, next_cursor
+
+class FeaturesObjectResolverMixin:
+    """
+    Loads the row addressed by the url once and shares it between validate() and create()
+    """
+    lookup_model = None
+    lookup_context_key = None
+    lookup_error = "Object doesnot exists!"
+    lock_for_update = False
+
+    def get_queryset(self):
+        queryset = self.lookup_model.objects.all()
+        if self.lock_for_update:
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def get_object(self):
+        """ the addressed row, or None when it does not exist """
+        if not hasattr(self, "_resolved_object"):
+            self._resolved_object = self.get_queryset().filter(id=self.context[self.lookup_context_key]).first()
+        return self._resolved_object
+
+    def resolve_object(self):
+        """ the addressed row, raising the lookup error when it does not exist """
+        obj = self.get_object()
+        if obj is None:
+            raise serializers.ValidationError(self.lookup_error)
+        return obj
+
+    async def aresolve_object(self):
+        """ resolve_object() through the async ORM """
+        if not hasattr(self, "_resolved_object"):
+            self._resolved_object = await self.get_queryset().filter(id=self.context[self.lookup_context_key]).afirst()
+        if self._resolved_object is None:
+            raise serializers.ValidationError(self.lookup_error)
+        return self._resolved_object
+
 class FeaturesVendorCreationSerializer(serializers.Serializer):
     """
     Serializer for creating vendors
@@ -51,59 +314,215 @@ class FeaturesVendorCreationSerializer(serializers.Serializer):
         )
         return validated_data
     
-class FeaturesVendorListSerializer(serializers.Serializer):
+class FeaturesVendorBulkRowSerializer(FeaturesVendorCreationSerializer):
     """
-    Serializer for getting vendors list
+    Field validation of a single bulk vendor row
     """
-    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorListSerializer"})
 
-    data = serializers.CharField(required=False)
-    
+    def validate(self, data):
+        """ duplicate checks are done set-based for the whole batch """
+        return data
+
+class FeaturesVendorBulkUpsertSerializer(serializers.Serializer):
+    """
+    Serializer for bulk creating or updating vendors by vendor code
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorBulkUpsertSerializer"})
+
+    UPDATE_FIELDS = ["name", "address", "contact_details", "updated_date"]
+
+    vendors = serializers.ListField(child=serializers.DictField(), allow_empty=False, write_only=True)
+    batch_size = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.JSONField(required=False)
+
+    def validate_vendors(self, value):
+        if len(value) > settings.FEATURES_BULK_MAX_ROWS:
+            raise serializers.ValidationError(
+                f"At most {settings.FEATURES_BULK_MAX_ROWS} vendors per request!"
+            )
+        return value
+
+    def validate_rows(self, rows, results):
+        """
+        per-row field validation plus repeated code and contact checks. Contact ownership is resolved
+        against the batch's final state: a vendor of the batch gives up its current contact details, so
+        another row may take them over. When two rows claim the same contact details the first one wins
+        """
+        valid_rows = {}
+        row_serializer = FeaturesVendorBulkRowSerializer()
+        seen_vendor_codes = set()
+        for index, row in enumerate(rows):
+            try:
+                row = row_serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                results[index] = {"index": index, "vendor_code": row.get("vendor_code"), "status": "failed", "errors": exc.detail}
+                continue
+            if row["vendor_code"] in seen_vendor_codes:
+                results[index] = {"index": index, "vendor_code": row["vendor_code"], "status": "failed", "errors": ["Vendor code repeated in request!"]}
+                continue
+            seen_vendor_codes.add(row["vendor_code"])
+            valid_rows[index] = row
+
+        contact_owners = {}
+        for contact_details, vendor_code in FeaturesVendorsProfileModel.objects.filter(
+            contact_details__in=[row["contact_details"] for row in valid_rows.values()]
+        ).values_list("contact_details", "vendor_code"):
+            contact_owners.setdefault(contact_details, set()).add(vendor_code)
+
+        """ a failed row keeps its vendor's current contact details, which can fail other rows in turn """
+        while True:
+            batch_vendor_codes = {row["vendor_code"] for row in valid_rows.values()}
+            claimed, failed = {}, []
+            for index, row in valid_rows.items():
+                owners = contact_owners.get(row["contact_details"], set()) - batch_vendor_codes
+                if owners or claimed.setdefault(row["contact_details"], row["vendor_code"]) != row["vendor_code"]:
+                    failed.append(index)
+            if not failed:
+                return valid_rows
+            for index in failed:
+                results[index] = {
+                    "index": index,
+                    "vendor_code": valid_rows[index]["vendor_code"],
+                    "status": "failed",
+                    "errors": ["Vendor contact details already exists!"],
+                }
+                del valid_rows[index]
+
     def create(self, validated_data):
-        """ creating list of vendors """
+        """ upserting vendors in batches within one transaction """
+        rows = validated_data["vendors"]
+        batch_size = validated_data.get("batch_size", settings.FEATURES_BULK_BATCH_SIZE)
 
-        vendors = list(FeaturesVendorsProfileModel.objects.all().values().order_by("-updated_date"))
-        
-        for vendor in vendors:
-            vendor['created_date'] = str(vendor['created_date'])
-            vendor['updated_date'] = str(vendor['updated_date'])
+        """ a concurrent writer can take contact details between check and upsert, so re-check once """
+        for attempt in range(2):
+            results = {}
+            valid_rows = self.validate_rows(rows, results)
+            now = datetime.datetime.now(timezone)
+            vendors = [
+                FeaturesVendorsProfileModel(
+                    vendor_code=row["vendor_code"],
+                    name=row["name"],
+                    address=row["address"],
+                    contact_details=row["contact_details"],
+                    on_time_delivery_rate=row.get("on_time_delivery_rate", 0.0),
+                    quality_rating_avg=row.get("quality_rating_avg", 0.0),
+                    average_response_time=row.get("average_response_time", 0.0),
+                    fulfillment_rate=row.get("fulfillment_rate", 0.0),
+                    created_date=now,
+                    updated_date=now,
+                )
+                for row in valid_rows.values()
+            ]
+            try:
+                with transaction.atomic():
+                    FeaturesVendorsProfileModel.objects.bulk_create(
+                        vendors,
+                        batch_size=batch_size,
+                        update_conflicts=True,
+                        unique_fields=["vendor_code"],
+                        update_fields=self.UPDATE_FIELDS,
+                    )
+                    vendor_ids = [vendor.id for vendor in vendors]
+                    if FeaturesVendorsProfileModel.objects.filter(
+                        contact_details__in=[vendor.contact_details for vendor in vendors]
+                    ).exclude(id__in=vendor_ids).exists():
+                        raise IntegrityError("Vendor contact details taken concurrently")
+
+                    """ rows the upsert inserted have no xmax, updated ones carry this transaction's """
+                    inserted = dict(
+                        FeaturesVendorsProfileModel.objects.filter(id__in=vendor_ids)
+                        .annotate(inserted=RawSQL("xmax = 0", []))
+                        .values_list("id", "inserted")
+                    )
+                    for vendor in vendors:
+                        if not inserted[vendor.id]:
+                            invalidate_vendor(vendor.id)
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
+
+        for index, vendor in zip(valid_rows, vendors):
+            results[index] = {
+                "index": index,
+                "vendor_code": vendor.vendor_code,
+                "status": "created" if inserted[vendor.id] else "updated",
+                "id": vendor.id,
+            }
 
         validated_data["data"] = {
-                                "total_vendors": len(vendors),
-                                "vendors": vendors
-                            }
+            "created": sum(1 for result in results.values() if result["status"] == "created"),
+            "updated": sum(1 for result in results.values() if result["status"] == "updated"),
+            "failed": sum(1 for result in results.values() if result["status"] == "failed"),
+            "results": [results[index] for index in sorted(results)],
+        }
         return validated_data
 
-class FeaturesVendorGetDetailsSerializer(serializers.Serializer):
+class FeaturesVendorListSerializer(FeaturesKeysetPaginationSerializer):
+    """
+    Serializer for getting vendors list
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorListSerializer"})
+
+    model = FeaturesVendorsProfileModel
+    results_name = "vendors"
+    value_fields = default_fields = [field.attname for field in FeaturesVendorsProfileModel._meta.concrete_fields]
+
+class FeaturesVendorGetDetailsSerializer(FeaturesAsyncSerializerMixin, serializers.Serializer):
     """
     Serializer for vendor details by id
     """
     api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorGetDetailsSerializer"})
 
-    details = serializers.CharField(required=False)
+    details = serializers.JSONField(required=False)
 
     def validate(self, data):
         """ validation of vendor existence """
         vendor_id = self.context["vendor_id"]
-        if not FeaturesVendorsProfileModel.objects.filter(id=vendor_id):
+        self.vendor = cached_vendor_read(vendor_id, "details", lambda: self.load_vendor(vendor_id))
+        if self.vendor is None:
             raise serializers.ValidationError("Vendor doesnot exists!")
         return data
+
+    async def avalidate(self, data):
+        vendor_id = self.context["vendor_id"]
+        self.vendor = await acached_vendor_read(vendor_id, "details", lambda: self.aload_vendor(vendor_id))
+        if self.vendor is None:
+            raise serializers.ValidationError("Vendor doesnot exists!")
+        return data
+
+    def load_vendor(self, vendor_id):
+        return FeaturesVendorsProfileModel.objects.filter(id=vendor_id).values().first()
+
+    async def aload_vendor(self, vendor_id):
+        return await FeaturesVendorsProfileModel.objects.filter(id=vendor_id).values().afirst()
     
     def create(self, validated_data):
         """ creating details by id """
-        vendor_id = self.context["vendor_id"]
-        vendor = FeaturesVendorsProfileModel.objects.filter(id=vendor_id).values()[0]
-        vendor["created_date"] = str(vendor["created_date"])
-        vendor["updated_date"] = str(vendor["updated_date"])
-        validated_data["details"] = {"vendor_details": vendor}
+        validated_data["details"] = {"vendor_details": self.vendor}
         return validated_data
 
-class FeaturesVendorUpdateSerializer(serializers.Serializer):
+    async def acreate(self, validated_data):
+        return self.create(validated_data)
+
+    def version(self):
+        """ (row keys, last modified date) of the vendor, read from the cached details """
+        return [(self.vendor["id"], self.vendor["updated_date"])], self.vendor["updated_date"]
+
+    async def aversion(self):
+        return self.version()
+
+class FeaturesVendorUpdateSerializer(FeaturesObjectResolverMixin, serializers.Serializer):
     """
     Serializer for updating vendor
     """
     api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorUpdateSerializer"})
 
+    lookup_model = FeaturesVendorsProfileModel
+    lookup_context_key = "vendor_id"
+    lookup_error = "Vendor doesnot exists!"
+    lock_for_update = True
+
     vendor_code = serializers.CharField(required=False)
     name = serializers.CharField(required=False)
     address = serializers.CharField(required=False)
@@ -115,47 +534,46 @@ class FeaturesVendorUpdateSerializer(serializers.Serializer):
 
     def validate(self, data):
         """ validations for updating vendor """
-        vendor_id = self.context["vendor_id"]
-        if not FeaturesVendorsProfileModel.objects.filter(id=vendor_id).exists():
-            raise serializers.ValidationError("Vendor doesnot exists!")
-        
-        vendor_contact_details = FeaturesVendorsProfileModel.objects.get(id=vendor_id).contact_details
-        if "contact_details" in data and vendor_contact_details != data["contact_details"]:
+        vendor_obj = self.resolve_object()
+        if "contact_details" in data and vendor_obj.contact_details != data["contact_details"]:
             if FeaturesVendorsProfileModel.objects.filter(contact_details=data["contact_details"]).exists():
                 raise serializers.ValidationError("Vendor contact details exists!")
         return data
     
     def create(self, validated_data):
         """ updating vendor """
-        vendor_id = self.context["vendor_id"]
-        vendor_obj = FeaturesVendorsProfileModel.objects.get(id=vendor_id)
+        vendor_obj = self.get_object()
 
         for key, value in validated_data.items():
             setattr(vendor_obj, key, value)
         
         vendor_obj.updated_date = datetime.datetime.now(timezone)
         vendor_obj.save()
+        invalidate_vendor(vendor_obj.id)
 
         return validated_data
 
-class FeaturesVendorDeleteSerializer(serializers.Serializer):
+class FeaturesVendorDeleteSerializer(FeaturesObjectResolverMixin, serializers.Serializer):
     """
     Serializer for deleting vendor
     """
     api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorDeleteSerializer"})
+
+    lookup_model = FeaturesVendorsProfileModel
+    lookup_context_key = "vendor_id"
+    lookup_error = "Vendor doesnot exists!"
+    lock_for_update = True
     
     def validate(self, data):
         """ validations for deleting vendor """
-        vendor_id = self.context["vendor_id"]
-        if not FeaturesVendorsProfileModel.objects.filter(id=vendor_id).exists():
-            raise serializers.ValidationError("Vendor doesnot exists!")
-
+        self.resolve_object()
         return data
     
     def create(self, validated_data):
         """ deleting vendor """
-        vendor_id = self.context["vendor_id"]
-        FeaturesVendorsProfileModel.objects.get(id=vendor_id).delete()
+        vendor_obj = self.get_object()
+        invalidate_vendor(vendor_obj.id)
+        vendor_obj.delete()
 
         return validated_data
     
@@ -186,74 +604,332 @@ class FeaturesPurchaseOrderCreationSerializer(serializers.Serializer):
     
     def create(self, validated_data):
         """ creating purchase order """
+        status = validated_data.get("status", "pending")
 
-        FeaturesPurchaseOrderModel.objects.create(
-            po_number = validated_data["po_number"],
-            vendor_id = validated_data["vendor_id"],
-            order_date = validated_data["order_date"],
-            delivery_date = validated_data["delivery_date"],
-            items = validated_data["items"],
-            quantity = validated_data["quantity"],
-            status = validated_data.get("status", "pending"),
-            issue_date = validated_data.get("issue_date", datetime.datetime.now(timezone)),
-            created_date=datetime.datetime.now(timezone),
-            updated_date=datetime.datetime.now(timezone)
-        )
+        with transaction.atomic():
+            po_obj = FeaturesPurchaseOrderModel.objects.create(
+                po_number = validated_data["po_number"],
+                vendor_id = validated_data["vendor_id"],
+                order_date = validated_data["order_date"],
+                delivery_date = validated_data["delivery_date"],
+                items = validated_data["items"],
+                quantity = validated_data["quantity"],
+                status = status,
+                issue_date = validated_data.get("issue_date", datetime.datetime.now(timezone)),
+                completed_date = datetime.datetime.now(timezone) if status == "completed" else None,
+                created_date=datetime.datetime.now(timezone),
+                updated_date=datetime.datetime.now(timezone)
+            )
+            apply_po_snapshots(None, po_snapshot(po_obj))
+            publish_purchase_order("purchase_order.status", po_obj)
         return validated_data
     
-class FeaturesPurchaseOrderListSerializer(serializers.Serializer):
+class FeaturesPurchaseOrderBulkRowSerializer(FeaturesPurchaseOrderCreationSerializer):
     """
-    Serializer for getting purchase order list
+    Field validation of a single bulk purchase order row
     """
-    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderListSerializer"})
 
-    data = serializers.CharField(required=False)
-    
+    def validate(self, data):
+        """ existence checks are done set-based for the whole batch """
+        return data
+
+class FeaturesPurchaseOrderBulkCreationSerializer(serializers.Serializer):
+    """
+    Serializer for bulk creating purchase orders
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderBulkCreationSerializer"})
+
+    purchase_orders = serializers.ListField(child=serializers.DictField(), allow_empty=False, write_only=True)
+    batch_size = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.JSONField(required=False)
+
+    def validate_purchase_orders(self, value):
+        if len(value) > settings.FEATURES_BULK_MAX_ROWS:
+            raise serializers.ValidationError(
+                f"At most {settings.FEATURES_BULK_MAX_ROWS} purchase orders per request!"
+            )
+        return value
+
+    def validate_rows(self, rows, results):
+        """ per-row field validation plus duplicate and vendor checks with one IN query each """
+        valid_rows = {}
+        row_serializer = FeaturesPurchaseOrderBulkRowSerializer()
+        for index, row in enumerate(rows):
+            try:
+                valid_rows[index] = row_serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                results[index] = {"index": index, "po_number": row.get("po_number"), "status": "failed", "errors": exc.detail}
+
+        po_numbers = [row["po_number"] for row in valid_rows.values()]
+        existing_po_numbers = set(
+            FeaturesPurchaseOrderModel.objects.filter(po_number__in=po_numbers).values_list("po_number", flat=True)
+        )
+        existing_vendor_ids = set(
+            FeaturesVendorsProfileModel.objects.filter(
+                id__in={row["vendor_id"] for row in valid_rows.values()}
+            ).values_list("id", flat=True)
+        )
+
+        seen_po_numbers = set()
+        for index, row in list(valid_rows.items()):
+            error = None
+            if row["po_number"] in existing_po_numbers:
+                error = "PO number already exists!"
+            elif row["po_number"] in seen_po_numbers:
+                error = "PO number repeated in request!"
+            elif row["vendor_id"] not in existing_vendor_ids:
+                error = "Vendor not exists!"
+            seen_po_numbers.add(row["po_number"])
+
+            if error:
+                results[index] = {"index": index, "po_number": row["po_number"], "status": "failed", "errors": [error]}
+                del valid_rows[index]
+        return valid_rows
+
     def create(self, validated_data):
-        """ creating list of purchase order """
+        """ creating purchase orders in batches within one transaction """
+        rows = validated_data["purchase_orders"]
+        batch_size = validated_data.get("batch_size", settings.FEATURES_BULK_BATCH_SIZE)
+        results = {}
 
-        purchase_orders = list(FeaturesPurchaseOrderModel.objects.all().values().order_by("-updated_date"))
-        
-        for purchase_order in purchase_orders:
-            purchase_order['created_date'] = str(purchase_order['created_date'])
-            purchase_order['updated_date'] = str(purchase_order['updated_date'])
+        """ a concurrent writer can take a po number between check and insert, so re-check once """
+        for attempt in range(2):
+            valid_rows = self.validate_rows(rows, results)
+            now = datetime.datetime.now(timezone)
+            purchase_orders = [
+                FeaturesPurchaseOrderModel(
+                    po_number=row["po_number"],
+                    vendor_id=row["vendor_id"],
+                    order_date=row["order_date"],
+                    delivery_date=row["delivery_date"],
+                    items=row["items"],
+                    quantity=row["quantity"],
+                    status=row.get("status", "pending"),
+                    issue_date=row.get("issue_date", now),
+                    completed_date=now if row.get("status") == "completed" else None,
+                    created_date=now,
+                    updated_date=now,
+                )
+                for row in valid_rows.values()
+            ]
+            try:
+                with transaction.atomic():
+                    FeaturesPurchaseOrderModel.objects.bulk_create(purchase_orders, batch_size=batch_size)
+                    apply_po_contributions(purchase_orders)
+                    publish_events(
+                        [purchase_order_event("purchase_order.status", purchase_order) for purchase_order in purchase_orders]
+                    )
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
+
+        for index, purchase_order in zip(valid_rows, purchase_orders):
+            results[index] = {"index": index, "po_number": purchase_order.po_number, "status": "created", "id": purchase_order.id}
 
         validated_data["data"] = {
-                                "total_purchase_orders": len(purchase_orders),
-                                "purchase_orders": purchase_orders
-                            }
+            "created": len(purchase_orders),
+            "failed": len(rows) - len(purchase_orders),
+            "results": [results[index] for index in sorted(results)],
+        }
         return validated_data
 
-class FeaturesPurchaseOrderGetDetailsSerializer(serializers.Serializer):
+class FeaturesPurchaseOrderListSerializer(FeaturesKeysetPaginationSerializer):
+    """
+    Serializer for getting purchase order list, items only when selected through fields=
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderListSerializer"})
+
+    model = FeaturesPurchaseOrderModel
+    results_name = "purchase_orders"
+    value_fields = [*PURCHASE_ORDER_VALUE_FIELDS, "items"]
+    default_fields = PURCHASE_ORDER_VALUE_FIELDS
+    filter_lookups = {
+        "vendor_id": "vendor_id",
+        "status": "status",
+        "date_from": "issue_date__gte",
+        "date_to": "issue_date__lte",
+        "delivery_date_from": "delivery_date__gte",
+        "delivery_date_to": "delivery_date__lte",
+        "min_quality_rating": "quality_rating__gte",
+        "max_quality_rating": "quality_rating__lte",
+    }
+
+    vendor_id = serializers.IntegerField(required=False)
+    status = serializers.CharField(required=False)
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    delivery_date_from = serializers.DateField(required=False)
+    delivery_date_to = serializers.DateField(required=False)
+    min_quality_rating = serializers.FloatField(required=False)
+    max_quality_rating = serializers.FloatField(required=False)
+
+    def validate(self, data):
+        """ validations for list filters """
+        for lower, upper in (
+            ("date_from", "date_to"),
+            ("delivery_date_from", "delivery_date_to"),
+            ("min_quality_rating", "max_quality_rating"),
+        ):
+            if lower in data and upper in data and data[lower] > data[upper]:
+                raise serializers.ValidationError(f"{lower} must not exceed {upper}!")
+        return data
+
+    def project(self, queryset, fields):
+        if "items" not in fields:
+            return queryset.values(*fields)
+        self.present_rows = True
+        return purchase_order_values(queryset, [name for name in fields if name != "items"])
+
+    def present(self, row):
+        if "raw_items" in row:
+            with_raw_items(row)
+        return super().present(row)
+
+class FeaturesEchoBuffer:
+    """
+    File-like object handing back whatever is written, for streaming csv rows
+    """
+    def write(self, value):
+        return value
+
+class FeaturesPurchaseOrderExportSerializer(serializers.Serializer):
+    """
+    Serializer for streaming purchase order export
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderExportSerializer"})
+
+    EXPORT_FIELDS = (
+        "id", "po_number", "vendor_id", "order_date", "delivery_date", "items", "quantity", "status",
+        "quality_rating", "issue_date", "acknowledgment_date", "completed_date", "created_date", "updated_date",
+    )
+    CONTENT_TYPES = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv",
+    }
+
+    export_format = serializers.ChoiceField(choices=list(CONTENT_TYPES), required=False, default="ndjson")
+    vendor_id = serializers.IntegerField(required=False)
+    status = serializers.CharField(required=False)
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        """ validations for export filters """
+        if "date_from" in data and "date_to" in data and data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError("date_from must be before date_to!")
+        return data
+
+    def content_type(self):
+        return self.CONTENT_TYPES[self.validated_data["export_format"]]
+
+    def filename(self):
+        return f"purchase_orders.{self.validated_data['export_format']}"
+
+    def get_queryset(self):
+        """ filtered purchase orders, read through a server-side cursor """
+        filters = {}
+        if "vendor_id" in self.validated_data:
+            filters["vendor_id"] = self.validated_data["vendor_id"]
+        if "status" in self.validated_data:
+            filters["status"] = self.validated_data["status"]
+        if "date_from" in self.validated_data:
+            filters["issue_date__gte"] = self.validated_data["date_from"]
+        if "date_to" in self.validated_data:
+            filters["issue_date__lte"] = self.validated_data["date_to"]
+
+        return FeaturesPurchaseOrderModel.objects.filter(**filters).order_by("id").values_list(
+            *self.EXPORT_FIELDS
+        ).iterator(chunk_size=settings.FEATURES_EXPORT_CHUNK_SIZE)
+
+    def stream(self):
+        """ export rows encoded one at a time """
+        if self.validated_data["export_format"] == "csv":
+            return self.stream_csv()
+        return self.stream_ndjson()
+
+    def stream_ndjson(self):
+        for row in self.get_queryset():
+            yield json.dumps(dict(zip(self.EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+
+    def stream_csv(self):
+        writer = csv.writer(FeaturesEchoBuffer())
+        items_index = self.EXPORT_FIELDS.index("items")
+        yield writer.writerow(self.EXPORT_FIELDS)
+        for row in self.get_queryset():
+            row = list(row)
+            row[items_index] = json.dumps(row[items_index], cls=DjangoJSONEncoder)
+            yield writer.writerow(row)
+
+class FeaturesPurchaseOrderGetDetailsSerializer(FeaturesAsyncSerializerMixin, FeaturesObjectResolverMixin, serializers.Serializer):
     """
     Serializer for purchase order details by id
     """
     api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderGetDetailsSerializer"})
 
-    details = serializers.CharField(required=False)
+    lookup_model = FeaturesPurchaseOrderModel
+    lookup_context_key = "po_id"
+    lookup_error = "Purchase Order doesnot exists!"
+
+    details = serializers.JSONField(required=False)
+
+    def get_queryset(self):
+        return purchase_order_values(super().get_queryset())
 
     def validate(self, data):
-        """ validation of purchase order existence """
-        po_id = self.context["po_id"]
-        if not FeaturesPurchaseOrderModel.objects.filter(id=po_id):
-            raise serializers.ValidationError("Purchase Order doesnot exists!")
+        """ validation of purchase order existence, by its updated_date only when the client may hold it already """
+        if conditional_request(self.context["request"]):
+            self.set_version(self.version_queryset().first())
+        else:
+            self.resolve_object()
+        return data
+
+    async def avalidate(self, data):
+        if conditional_request(self.context["request"]):
+            self.set_version(await self.version_queryset().afirst())
+        else:
+            await self.aresolve_object()
         return data
+
+    def version_queryset(self):
+        return self.lookup_model.objects.filter(id=self.context[self.lookup_context_key]).values("id", "updated_date")
+
+    def set_version(self, row):
+        if row is None:
+            raise serializers.ValidationError(self.lookup_error)
+        self.updated_date = row["updated_date"]
     
     def create(self, validated_data):
         """ creating details by id """
-        po_id = self.context["po_id"]
-        purchase_order = FeaturesPurchaseOrderModel.objects.filter(id=po_id).values()[0]
-        purchase_order["created_date"] = str(purchase_order["created_date"])
-        purchase_order["updated_date"] = str(purchase_order["updated_date"])
-        validated_data["details"] = {"purchase_order_details": purchase_order}
+        purchase_order = self.resolve_object()
+        self.set_version(purchase_order)
+        validated_data["details"] = {"purchase_order_details": with_raw_items(dict(purchase_order))}
+        return validated_data
+
+    async def acreate(self, validated_data):
+        purchase_order = await self.aresolve_object()
+        self.set_version(purchase_order)
+        validated_data["details"] = {"purchase_order_details": with_raw_items(dict(purchase_order))}
         return validated_data
 
-class FeaturesPurchaseOrderUpdateSerializer(serializers.Serializer):
+    def version(self):
+        """ (row keys, last modified date) of the purchase order """
+        return [(self.context[self.lookup_context_key], self.updated_date)], self.updated_date
+
+    async def aversion(self):
+        return self.version()
+
+class FeaturesPurchaseOrderUpdateSerializer(FeaturesObjectResolverMixin, serializers.Serializer):
     """
     Serializer for updating purchase order
     """
     api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorUpdateSerializer"})
 
+    lookup_model = FeaturesPurchaseOrderModel
+    lookup_context_key = "po_id"
+    lookup_error = "Purchase Order doesnot exists!"
+    lock_for_update = True
+
     po_number = serializers.CharField(required=False)
     vendor_id = serializers.IntegerField(required=False)
     order_date = serializers.DateField(required=False)
@@ -266,202 +942,346 @@ class FeaturesPurchaseOrderUpdateSerializer(serializers.Serializer):
 
     def validate(self, data):
         """ validations for updating purchase order """
-        po_id = self.context["po_id"]
-        if not FeaturesPurchaseOrderModel.objects.filter(id=po_id).exists():
-            raise serializers.ValidationError("Purchase Order doesnot exists!")
+        po_obj = self.resolve_object()
         
-        if "po_number" in data and FeaturesPurchaseOrderModel.objects.filter(po_number=data["po_number"]).exists():
-            raise serializers.ValidationError("PO Number already exists!")
+        if "po_number" in data and data["po_number"] != po_obj.po_number:
+            if FeaturesPurchaseOrderModel.objects.filter(po_number=data["po_number"]).exists():
+                raise serializers.ValidationError("PO Number already exists!")
 
-        if "vendor_id" in data and not FeaturesVendorsProfileModel.objects.filter(id=data["vendor_id"]).exists():
-            raise serializers.ValidationError("Vendor doesnot exists!")
+        if "vendor_id" in data and data["vendor_id"] != po_obj.vendor_id:
+            if not FeaturesVendorsProfileModel.objects.filter(id=data["vendor_id"]).exists():
+                raise serializers.ValidationError("Vendor doesnot exists!")
 
         return data
     
     def create(self, validated_data):
         """ updating purchase order """
-        po_id = self.context["po_id"]
-        po_obj = FeaturesPurchaseOrderModel.objects.get(id=po_id)
-        for key, value in validated_data.items():
-            setattr(po_obj, key, value)
-        
-        po_obj.updated_date = datetime.datetime.now(timezone)
-        po_obj.save()
-
-        if "status" in validated_data and validated_data["status"] == "completed":
-
-            """ on time delivery rate calculation """
-            on_time_delivery_rate = 0
-            completed_pos = FeaturesPurchaseOrderModel.objects.filter(vendor=po_obj.vendor, status="completed")
-            completed_on_time_pos = completed_pos.filter(delivery_date__lte=po_obj.delivery_date).count()
-            completed_pos = completed_pos.count()
-            if completed_pos > 0:
-                on_time_delivery_rate = completed_on_time_pos / completed_pos
-            
-            """ fulfillment rate calculation """
-            fulfillment_rate = 0.0
-            issued_pos = FeaturesPurchaseOrderModel.objects.filter(vendor=po_obj.vendor)
-            successfully_fulfilled_count = issued_pos.filter(status="completed").exclude(quality_rating=0.0).count()
-            issued_pos = issued_pos.count()
-            if issued_pos > 0:
-                fulfillment_rate = successfully_fulfilled_count / issued_pos
-
-            if FeaturesHistoricalPerformanceModel.objects.filter(vendor_id=po_obj.vendor.id).exists():
-                performance_obj = FeaturesHistoricalPerformanceModel.objects.get(vendor_id=po_obj.vendor.id)
-                performance_obj.on_time_delivery_rate = on_time_delivery_rate
-                performance_obj.fulfillment_rate = fulfillment_rate
-                performance_obj.date = datetime.datetime.now(timezone)
-                performance_obj.save()
-            else:
-                FeaturesHistoricalPerformanceModel.objects.create(
-                    vendor_id=po_obj.vendor.id,
-                    date=datetime.datetime.now(timezone),
-                    average_response_time=0.0,
-                    on_time_delivery_rate=on_time_delivery_rate,
-                    quality_rating_avg=0.0,
-                    fulfillment_rate=fulfillment_rate
-                )
+        po_obj = self.get_object()
 
-            FeaturesVendorsProfileModel.objects.filter(id=po_obj.vendor.id).update(
-                on_time_delivery_rate=on_time_delivery_rate,
-                fulfillment_rate=fulfillment_rate,
-                updated_date=datetime.datetime.now(timezone)
-            )
+        with transaction.atomic(savepoint=False):
+            before = po_snapshot(po_obj)
+            before_status = po_obj.status
+            was_completed = po_obj.status == "completed"
 
-        if "quality_rating" in validated_data and validated_data["quality_rating"] not in [None, ""]:
-            completed_pos = FeaturesPurchaseOrderModel.objects.filter(vendor=po_obj.vendor, status="completed")
-            total_quality_rating = 0
-            completed_count = 0
-            average_quality_rating = 0.0
-            for completed_po in completed_pos:
-                if completed_po.quality_rating is not None:
-                    total_quality_rating += completed_po.quality_rating
-                    completed_count += 1
-
-            if completed_count > 0:
-                average_quality_rating = total_quality_rating / completed_count
-            
-            if FeaturesHistoricalPerformanceModel.objects.filter(vendor_id=po_obj.vendor.id).exists():
-                performance_obj = FeaturesHistoricalPerformanceModel.objects.get(vendor_id=po_obj.vendor.id)
-                performance_obj.quality_rating_avg = average_quality_rating
-                performance_obj.date = datetime.datetime.now(timezone)
-                performance_obj.save()
-            else:
-                FeaturesHistoricalPerformanceModel.objects.create(
-                    vendor_id=po_obj.vendor.id,
-                    date=datetime.datetime.now(timezone),
-                    average_response_time=0.0,
-                    on_time_delivery_rate=0.0,
-                    quality_rating_avg=average_quality_rating,
-                    fulfillment_rate=0.0
-                )
-            FeaturesVendorsProfileModel.objects.filter(id=po_obj.vendor.id).update(
-                quality_rating_avg=average_quality_rating,
-                updated_date=datetime.datetime.now(timezone)
+            for key, value in validated_data.items():
+                setattr(po_obj, key, value)
+
+            if po_obj.status == "completed" and not was_completed:
+                po_obj.completed_date = datetime.datetime.now(timezone)
+            elif po_obj.status != "completed":
+                po_obj.completed_date = None
+
+            po_obj.updated_date = datetime.datetime.now(timezone)
+            po_obj.save()
+
+            """ refreshing vendor metrics from running aggregates """
+            apply_po_snapshots(before, po_snapshot(po_obj))
+            if po_obj.status != before_status:
+                publish_purchase_order("purchase_order.status", po_obj)
+
+        return validated_data
+
+class FeaturesPurchaseOrderBulkUpdateRowSerializer(serializers.Serializer):
+    """
+    Field validation of a single bulk purchase order update
+    """
+    id = serializers.IntegerField(required=True)
+    status = serializers.CharField(required=False)
+    quality_rating = serializers.FloatField(required=False)
+
+    def validate(self, data):
+        if "status" not in data and "quality_rating" not in data:
+            raise serializers.ValidationError("Nothing to update!")
+        return data
+
+class FeaturesPurchaseOrderBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for updating status and quality rating of purchase orders in bulk
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderBulkUpdateSerializer"})
+
+    purchase_orders = serializers.ListField(child=serializers.DictField(), allow_empty=False, write_only=True)
+    batch_size = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.JSONField(required=False)
+
+    def validate_purchase_orders(self, value):
+        if len(value) > settings.FEATURES_BULK_MAX_ROWS:
+            raise serializers.ValidationError(
+                f"At most {settings.FEATURES_BULK_MAX_ROWS} purchase orders per request!"
             )
+        return value
 
+    def validate_rows(self, rows, results):
+        """ per-row field validation, a purchase order may only be updated once per request """
+        valid_rows = {}
+        seen_ids = set()
+        row_serializer = FeaturesPurchaseOrderBulkUpdateRowSerializer()
+        for index, row in enumerate(rows):
+            try:
+                row = row_serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                results[index] = {"index": index, "id": row.get("id"), "status": "failed", "errors": exc.detail}
+                continue
+            if row["id"] in seen_ids:
+                results[index] = {"index": index, "id": row["id"], "status": "failed", "errors": ["Purchase Order repeated in request!"]}
+                continue
+            seen_ids.add(row["id"])
+            valid_rows[index] = row
+        return valid_rows
 
+    def create(self, validated_data):
+        """ updating purchase orders with bulk_update, vendor metrics refreshed once per vendor """
+        rows = validated_data["purchase_orders"]
+        batch_size = validated_data.get("batch_size", settings.FEATURES_BULK_BATCH_SIZE)
+        results = {}
+        valid_rows = self.validate_rows(rows, results)
+
+        with transaction.atomic():
+            """ locked in id order so concurrent batches sharing purchase orders cannot deadlock """
+            purchase_orders = {
+                po_obj.id: po_obj
+                for po_obj in FeaturesPurchaseOrderModel.objects.select_for_update()
+                .filter(id__in=[row["id"] for row in valid_rows.values()])
+                .order_by("id")
+                .only(*SNAPSHOT_FIELDS, "po_number", "updated_date")
+            }
+
+            now = datetime.datetime.now(timezone)
+            updated, transitions, events = [], [], []
+            for index, row in valid_rows.items():
+                po_obj = purchase_orders.get(row["id"])
+                if po_obj is None:
+                    results[index] = {"index": index, "id": row["id"], "status": "failed", "errors": ["Purchase Order doesnot exists!"]}
+                    continue
+
+                before = po_snapshot(po_obj)
+                before_status = po_obj.status
+                was_completed = po_obj.status == "completed"
+
+                po_obj.status = row.get("status", po_obj.status)
+                po_obj.quality_rating = row.get("quality_rating", po_obj.quality_rating)
+                if po_obj.status == "completed" and not was_completed:
+                    po_obj.completed_date = now
+                elif po_obj.status != "completed":
+                    po_obj.completed_date = None
+                po_obj.updated_date = now
+
+                updated.append(po_obj)
+                transitions.append((before, po_snapshot(po_obj)))
+                if po_obj.status != before_status:
+                    events.append(purchase_order_event("purchase_order.status", po_obj))
+                results[index] = {"index": index, "id": po_obj.id, "po_number": po_obj.po_number, "status": "updated"}
+
+            FeaturesPurchaseOrderModel.objects.bulk_update(
+                updated, ["status", "quality_rating", "completed_date", "updated_date"], batch_size=batch_size
+            )
+            """ refreshing vendor metrics from running aggregates, once per affected vendor """
+            apply_po_transitions(transitions)
+            publish_events(events)
+
+        validated_data["data"] = {
+            "updated": len(updated),
+            "failed": len(rows) - len(updated),
+            "results": [results[index] for index in sorted(results)],
+        }
         return validated_data
 
-class FeaturesPurchaseOrderDeleteSerializer(serializers.Serializer):
+class FeaturesPurchaseOrderDeleteSerializer(FeaturesObjectResolverMixin, serializers.Serializer):
     """
     Serializer for deleting purchase order
     """
     api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesPurchaseOrderDeleteSerializer"})
+
+    lookup_model = FeaturesPurchaseOrderModel
+    lookup_context_key = "po_id"
+    lookup_error = "Purchase Order doesnot exists!"
+    lock_for_update = True
     
     def validate(self, data):
         """ validations for deleting purchase order """
-        po_id = self.context["po_id"]
-        if not FeaturesPurchaseOrderModel.objects.filter(id=po_id).exists():
-            raise serializers.ValidationError("Purchase Order doesnot exists!")
-
+        self.resolve_object()
         return data
     
     def create(self, validated_data):
         """ deleting purchase order """
-        po_id = self.context["po_id"]
-        FeaturesPurchaseOrderModel.objects.get(id=po_id).delete()
+        po_obj = self.get_object()
+
+        with transaction.atomic(savepoint=False):
+            before = po_snapshot(po_obj)
+            po_obj.delete()
+            apply_po_snapshots(before, None)
 
         return validated_data
 
-class FeaturesVendorAcknowledgementSerializer(serializers.Serializer):
+class FeaturesVendorAcknowledgementSerializer(FeaturesObjectResolverMixin, serializers.Serializer):
     """
     Serializer for vendor acknowledgement
     """
+    lookup_model = FeaturesPurchaseOrderModel
+    lookup_context_key = "po_id"
+    lookup_error = "Purchase Order not exists!"
+    lock_for_update = True
 
     def validate(self, data):
         """ validating po id existence """
-        po_id = self.context["po_id"]
-        if not FeaturesPurchaseOrderModel.objects.filter(id=po_id).exists():
-            raise serializers.ValidationError("Purchase Order not exists!")
+        self.resolve_object()
         return data
 
     def create(self, validated_data):
         """ creating vendor acknowledgement """
-        po_id = self.context["po_id"]
-        po_obj = FeaturesPurchaseOrderModel.objects.get(id=po_id)
+        po_obj = self.get_object()
 
-        po_obj.acknowledgment_date = datetime.datetime.now(timezone)
-        po_obj.updated_date = datetime.datetime.now(timezone)
-        po_obj.save()
+        with transaction.atomic(savepoint=False):
+            before = po_snapshot(po_obj)
 
-        response_times = []
+            po_obj.acknowledgment_date = datetime.datetime.now(timezone)
+            po_obj.updated_date = datetime.datetime.now(timezone)
+            po_obj.save()
 
-        valid_purchase_orders = FeaturesPurchaseOrderModel.objects.filter(vendor_id=po_obj.vendor.id).values()
-        for po in valid_purchase_orders:
-            if po["acknowledgment_date"]:
-                response_time = po["acknowledgment_date"] - po["issue_date"]
-                response_times.append(response_time)
+            """ average response time from running aggregates """
+            apply_po_snapshots(before, po_snapshot(po_obj))
+            publish_purchase_order("purchase_order.acknowledged", po_obj)
 
-        """Calculate the average response time"""
-        if response_times:
-            total_seconds = sum(response.total_seconds() for response in response_times)
-            avg_response_time = (total_seconds / len(response_times)) / (60 * 60)
-            avg_response_time = round(avg_response_time, 3)
+        return validated_data
 
-        else:
-            avg_response_time = 0.0
-        if FeaturesHistoricalPerformanceModel.objects.filter(vendor_id=po_obj.vendor.id).exists():
-            performance_obj = FeaturesHistoricalPerformanceModel.objects.get(vendor_id=po_obj.vendor.id)
-            performance_obj.average_response_time = avg_response_time  # in hours
-            performance_obj.date = datetime.datetime.now(timezone)
-            performance_obj.save()
-        else:
-            FeaturesHistoricalPerformanceModel.objects.create(
-                vendor_id=po_obj.vendor.id,
-                date=datetime.datetime.now(timezone),
-                average_response_time=avg_response_time,
-                on_time_delivery_rate=0.0,
-                quality_rating_avg=0.0,
-                fulfillment_rate=0.0
+class FeaturesBulkAcknowledgementSerializer(serializers.Serializer):
+    """
+    Serializer for acknowledging many purchase orders at once
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesBulkAcknowledgementSerializer"})
+
+    po_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, write_only=True)
+    vendor_id = serializers.IntegerField(required=False)
+    data = serializers.JSONField(required=False)
+
+    def validate_po_ids(self, value):
+        if len(value) > settings.FEATURES_BULK_MAX_ROWS:
+            raise serializers.ValidationError(
+                f"At most {settings.FEATURES_BULK_MAX_ROWS} purchase orders per request!"
             )
-        
-        FeaturesVendorsProfileModel.objects.filter(id=po_obj.vendor.id).update(
-            average_response_time=avg_response_time,
-            updated_date=datetime.datetime.now(timezone)
-        )
-        
+        return value
+
+    def create(self, validated_data):
+        """ locking the purchase orders, one UPDATE for all of them and one aggregate update per vendor """
+        po_ids = list(dict.fromkeys(validated_data["po_ids"]))
+        vendor_id = validated_data.get("vendor_id")
+        results = {}
+
+        with transaction.atomic(savepoint=False):
+            """ locked in id order so concurrent batches sharing purchase orders cannot deadlock """
+            purchase_orders = {
+                po_obj.id: po_obj
+                for po_obj in FeaturesPurchaseOrderModel.objects.select_for_update()
+                .filter(id__in=po_ids)
+                .order_by("id")
+                .only(*SNAPSHOT_FIELDS, "po_number", "updated_date")
+            }
+
+            acknowledged = []
+            for po_id in po_ids:
+                po_obj = purchase_orders.get(po_id)
+                if po_obj is None:
+                    results[po_id] = {"id": po_id, "status": "failed", "errors": ["Purchase Order not exists!"]}
+                elif vendor_id is not None and po_obj.vendor_id != vendor_id:
+                    results[po_id] = {"id": po_id, "status": "failed", "errors": ["Purchase Order belongs to another vendor!"]}
+                else:
+                    acknowledged.append(po_obj)
+
+            if acknowledged:
+                now = datetime.datetime.now(timezone)
+                before = [po_snapshot(po_obj) for po_obj in acknowledged]
+                FeaturesPurchaseOrderModel.objects.filter(
+                    id__in=[po_obj.id for po_obj in acknowledged]
+                ).update(acknowledgment_date=now, updated_date=now)
+
+                for po_obj in acknowledged:
+                    po_obj.acknowledgment_date = now
+                    po_obj.updated_date = now
+                    results[po_obj.id] = {"id": po_obj.id, "po_number": po_obj.po_number, "status": "acknowledged"}
+
+                """ average response times from running aggregates """
+                apply_po_transitions(zip(before, [po_snapshot(po_obj) for po_obj in acknowledged]))
+                publish_events(
+                    [purchase_order_event("purchase_order.acknowledged", po_obj) for po_obj in acknowledged]
+                )
+
+        validated_data["data"] = {
+            "acknowledged": len(acknowledged),
+            "failed": len(po_ids) - len(acknowledged),
+            "results": [results[po_id] for po_id in po_ids],
+        }
         return validated_data
 
 class FeaturesHistoricalPerformanceSerializer(serializers.Serializer):
     """
     Serializer for getting vendor performance metrics
     """
+    HISTORY_FIELDS = (
+        "date", "bucket", "on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate",
+    )
+
     data = serializers.JSONField(required=False)
+    bucket = serializers.ChoiceField(choices=["hour", "day"], required=False)
+
+    def get_fields(self):
+        """ range bounds are named after the query parameters, which are python keywords """
+        fields = super().get_fields()
+        fields["from"] = serializers.DateTimeField(required=False)
+        fields["to"] = serializers.DateTimeField(required=False)
+        return fields
 
     def validate(self, data):
         """ validating vendor existence """
         vendor_id = self.context["vendor_id"]
-        if not FeaturesHistoricalPerformanceModel.objects.filter(vendor_id=vendor_id).exists():
+        if "from" in data and "to" in data and data["from"] > data["to"]:
+            raise serializers.ValidationError("from must be before to!")
+
+        cache_name = "performance:{}:{}:{}".format(
+            data["from"].isoformat() if "from" in data else "",
+            data["to"].isoformat() if "to" in data else "",
+            data.get("bucket", ""),
+        )
+        self.performance = cached_vendor_read(vendor_id, cache_name, lambda: self.load_performance(vendor_id, data))
+        if self.performance is None:
             raise serializers.ValidationError("Vendor performance details not exists!")
         return data
 
     def create(self, validated_data):
         """ creating vendor performance metrics """
-        vendor_id = self.context["vendor_id"]
-        performance_obj = FeaturesHistoricalPerformanceModel.objects.get(vendor_id=vendor_id)
+        validated_data["data"] = self.performance
+        return validated_data
+
+    def load_performance(self, vendor_id, data):
+        """ latest snapshot, or the snapshots in the requested range """
+        if not {"from", "to", "bucket"} & data.keys():
+            latest = self.latest(vendor_id)
+            return {"performance_details" : latest} if latest else None
+
+        snapshots = FeaturesHistoricalPerformanceModel.objects.filter(vendor_id=vendor_id)
+        if "from" in data:
+            snapshots = snapshots.filter(date__gte=data["from"])
+        if "to" in data:
+            snapshots = snapshots.filter(date__lte=data["to"])
+        if "bucket" in data:
+            snapshots = snapshots.filter(bucket=data["bucket"])
 
-        obj = {
+        history = list(snapshots.order_by("date").values(*self.HISTORY_FIELDS))
+        if not history and not FeaturesHistoricalPerformanceModel.objects.filter(vendor_id=vendor_id).exists():
+            return None
+        return {
+            "vendor_id" : vendor_id,
+            "performance_history" : history,
+        }
+
+    def latest(self, vendor_id):
+        """ most recent snapshot of the vendor """
+        performance_obj = FeaturesHistoricalPerformanceModel.objects.filter(
+            vendor_id=vendor_id
+        ).select_related("vendor").order_by("-date").first()
+        if performance_obj is None:
+            return None
+
+        return {
             "id": performance_obj.id,
             "vendor_id" : vendor_id,
             "vendor_name" : performance_obj.vendor.name,
@@ -472,5 +1292,161 @@ class FeaturesHistoricalPerformanceSerializer(serializers.Serializer):
             "average_response_time" : performance_obj.average_response_time,
             "fulfillment_rate" : performance_obj.fulfillment_rate
         }
-        validated_data["data"] = {"performance_details" : obj}
+
+class FeaturesVendorRankingSerializer(serializers.Serializer):
+    """
+    Serializer for the top vendors by a performance metric, read from the vendor ranking view
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesVendorRankingSerializer"})
+
+    """ sort order of each metric, best first """
+    METRIC_ORDERING = {
+        "on_time_delivery_rate": "-on_time_delivery_rate",
+        "quality_rating_avg": "-quality_rating_avg",
+        "fulfillment_rate": "-fulfillment_rate",
+        "average_response_time": "average_response_time",
+    }
+    RANKING_FIELDS = (
+        "vendor_id", "vendor_code", "name", "on_time_delivery_rate", "quality_rating_avg",
+        "average_response_time", "fulfillment_rate", "po_count",
+    )
+
+    metric = serializers.ChoiceField(choices=list(METRIC_ORDERING), required=False, default="on_time_delivery_rate")
+    limit = serializers.IntegerField(required=False, min_value=1, default=10)
+    min_po_count = serializers.IntegerField(required=False, min_value=0, default=0)
+    data = serializers.JSONField(required=False)
+
+    def validate_limit(self, value):
+        return min(value, settings.FEATURES_RANKING_MAX_LIMIT)
+
+    def create(self, validated_data):
+        """ creating ranking of vendors """
+        metric = validated_data["metric"]
+        rankings = FeaturesVendorRankingModel.objects.filter(po_count__gte=validated_data["min_po_count"])
+        if metric == "average_response_time":
+            """ vendors that never acknowledged have no response time to rank """
+            rankings = rankings.filter(acknowledged_count__gt=0)
+        rows = list(
+            rankings.order_by(self.METRIC_ORDERING[metric], "vendor_id")
+            .values(*self.RANKING_FIELDS, "refreshed_date")[:validated_data["limit"]]
+        )
+
+        refreshed_date = None
+        for rank, row in enumerate(rows, start=1):
+            refreshed_date = row.pop("refreshed_date")
+            row["rank"] = rank
+
+        validated_data["data"] = {
+                                "metric": metric,
+                                "refreshed_date": refreshed_date,
+                                "vendors": rows
+                            }
         return validated_data
+
+class FeaturesChangeFeedSerializer(serializers.Serializer):
+    """
+    Serializer for the change feed, inserts, updates and deletes in commit safe order after a since token
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesChangeFeedSerializer"})
+
+    RESOURCES = ("vendor", "purchase_order", "performance")
+    LATEST = "latest"
+    """
+    oldest transaction still running: every change of an older transaction is committed or rolled back,
+    so changes below this horizon can be handed out in (txid, id) order without a later commit slipping in behind.
+    txid order is not commit order though, a transaction with an older txid can write a row after a newer one,
+    so every change carries its version: the change log id, drawn by the trigger while the row lock is held,
+    consumers keep the change with the highest version per resource and id
+    """
+    HORIZON_SQL = "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+    since = serializers.CharField(required=False)
+    resources = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.JSONField(required=False)
+
+    def validate_since(self, value):
+        if value == self.LATEST:
+            return value
+        try:
+            txid, change_id = (int(part) for part in value.split("-"))
+        except ValueError:
+            raise serializers.ValidationError("Invalid since token!")
+        return txid, change_id
+
+    def validate_resources(self, value):
+        resources = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+        unknown = [name for name in resources if name not in self.RESOURCES]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown resources {', '.join(unknown)}!")
+        return resources
+
+    def validate_limit(self, value):
+        return min(value, settings.FEATURES_CHANGES_MAX_PAGE_SIZE)
+
+    def create(self, validated_data):
+        """ creating page of changes """
+        since = validated_data.get("since")
+        if since == self.LATEST:
+            """ nothing yet, only the token a consumer starts from after a full download """
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT {self.HORIZON_SQL}")
+                horizon = cursor.fetchone()[0]
+            validated_data["data"] = {"changes": [], "next_since": f"{horizon - 1}-{2 ** 63 - 1}", "has_more": False}
+            return validated_data
+
+        changes = FeaturesChangeLogModel.objects.filter(txid__lt=RawSQL(self.HORIZON_SQL, []))
+        if "resources" in validated_data:
+            changes = changes.filter(resource__in=validated_data["resources"])
+        if since is not None:
+            txid, change_id = since
+            """ lower bound on txid keeps this an ordered index range scan """
+            changes = changes.filter(txid__gte=txid).filter(Q(txid__gt=txid) | Q(id__gt=change_id))
+
+        limit = validated_data.get("limit", settings.FEATURES_CHANGES_PAGE_SIZE)
+        rows = list(
+            changes.order_by("txid", "id").values(
+                "txid", "id", "resource", "object_id", "operation", "created_date",
+                raw_data=Cast("data", TextField()),
+            )[:limit + 1]
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_since = validated_data.get("since")
+        if rows:
+            next_since = (rows[-1]["txid"], rows[-1]["id"])
+        validated_data["data"] = {
+                                "changes": [
+                                    {
+                                        "resource": row["resource"],
+                                        "id": row["object_id"],
+                                        "version": row["id"],
+                                        "operation": row["operation"],
+                                        "changed_date": row["created_date"],
+                                        "data": FeaturesRawJSON(row["raw_data"]) if row["raw_data"] is not None else None,
+                                    }
+                                    for row in rows
+                                ],
+                                "next_since": "-".join(map(str, next_since)) if next_since else None,
+                                "has_more": has_more
+                            }
+        return validated_data
+
+class FeaturesEventStreamSerializer(FeaturesAsyncSerializerMixin, serializers.Serializer):
+    """
+    Serializer for the server-sent event stream of purchase order and vendor metric changes
+    """
+    api_logger = logging.LoggerAdapter(logger, {"app_name": "FeaturesEventStreamSerializer"})
+
+    vendor_id = serializers.IntegerField(required=False)
+
+    async def avalidate(self, data):
+        """ validation of vendor existence """
+        if "vendor_id" in data and not await FeaturesVendorsProfileModel.objects.filter(id=data["vendor_id"]).aexists():
+            raise serializers.ValidationError("Vendor doesnot exists!")
+        return data
+
+    def stream(self):
+        """ events of the selected vendor, or of every vendor, as SSE frames """
+        return event_stream(broker.subscribe(self.validated_data.get("vendor_id")))
@@ -1,3 +1,1752 @@
-from django.test import TestCase
+import asyncio, base64, csv, datetime, importlib, io, json, logging, pytz, queue, threading, types
+from asgiref.sync import sync_to_async
+from unittest import mock
+from django.apps import apps
+from django.core.management import call_command
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from features.cache import features_cache
+from features.events import broker, publish_event
+from features.instrumentation import request_metrics
+from features.metrics import (
+    AGGREGATE_FIELDS,
+    average_response_time,
+    bucket_start,
+    compute_metrics,
+    rebuild_vendor_aggregates,
+    refresh_vendor_metrics,
+    refresh_vendor_ranking,
+)
+from vendor_management.log import JSONFormatter, NonBlockingQueueHandler
+from features.renderers import FeaturesJSONRenderer, FeaturesRawJSON
+from features.serializers import (
+    FeaturesPurchaseOrderBulkCreationSerializer,
+    FeaturesPurchaseOrderExportSerializer,
+    FeaturesVendorBulkUpsertSerializer,
+)
+from features.models import (
+    FeaturesVendorsProfileModel,
+    FeaturesPurchaseOrderModel,
+    FeaturesHistoricalPerformanceModel,
+    FeaturesMetricsOutboxModel,
+    FeaturesVendorMetricsAggregateModel,
+)
 
-# Create your tests here.
+timezone = pytz.timezone("Asia/Kolkata")
+
+
+def frozen_datetime_module(frozen):
+    """ stand-in for a module's datetime import whose now() is fixed """
+    class FrozenDateTime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return frozen.astimezone(tz)
+
+    return types.SimpleNamespace(
+        datetime=FrozenDateTime, date=datetime.date, time=datetime.time, timedelta=datetime.timedelta
+    )
+
+
+class FeaturesTestDataMixin:
+    """
+    Shared vendor and purchase order fixtures
+    """
+
+    @classmethod
+    def create_vendor(cls, code):
+        return FeaturesVendorsProfileModel.objects.create(
+            vendor_code=code,
+            name=f"Vendor {code}",
+            contact_details=f"contact-{code}",
+            address="address",
+            on_time_delivery_rate=0.0,
+            quality_rating_avg=0.0,
+            average_response_time=0.0,
+            fulfillment_rate=0.0,
+        )
+
+    @classmethod
+    def create_purchase_order(cls, vendor, number, **kwargs):
+        return FeaturesPurchaseOrderModel.objects.create(**{
+            "po_number": number,
+            "vendor": vendor,
+            "delivery_date": datetime.date.today() + datetime.timedelta(days=7),
+            "items": {"item": 1},
+            "quantity": 1,
+            "status": "pending",
+            "issue_date": datetime.datetime.now(timezone) - datetime.timedelta(days=1),
+            **kwargs,
+        })
+
+    def assertQueriesUseIndexes(self, context):
+        """ explaining each captured read with sequential scans priced out """
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in context.captured_queries:
+                sql = query["sql"]
+                if not sql.startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                cursor.execute(f"EXPLAIN {sql}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertNotIn("Seq Scan", plan, f"{sql}\n{plan}")
+
+    def assertAggregatesMatchRebuild(self):
+        """ running aggregates, and the vendor metrics refreshed from them, equal a rebuild from the purchase orders """
+        running = {aggregate.vendor_id: aggregate for aggregate in FeaturesVendorMetricsAggregateModel.objects.all()}
+        vendors = {vendor.id: vendor for vendor in FeaturesVendorsProfileModel.objects.all()}
+        rebuild_vendor_aggregates()
+        for aggregate in FeaturesVendorMetricsAggregateModel.objects.all():
+            for key in AGGREGATE_FIELDS:
+                value = getattr(running[aggregate.vendor_id], key) if aggregate.vendor_id in running else 0
+                self.assertAlmostEqual(value, getattr(aggregate, key), places=3, msg=key)
+            if aggregate.vendor_id in running:
+                for key, value in compute_metrics(aggregate).items():
+                    self.assertAlmostEqual(getattr(vendors[aggregate.vendor_id], key), value, places=6, msg=key)
+
+    def purchase_order_payload(self, vendor, number, **kwargs):
+        return {
+            "po_number": number,
+            "vendor_id": vendor.id,
+            "order_date": "2024-05-01",
+            "delivery_date": str(datetime.date.today() + datetime.timedelta(days=7)),
+            "items": {"item": 1},
+            "quantity": 1,
+            "status": "pending",
+            **kwargs,
+        }
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesQueryPlanTests(FeaturesTestDataMixin, TestCase):
+    """
+    Every read issued by the hot endpoints must be answerable from an index
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-PLAN")
+        cls.create_vendor("V-PLAN-OTHER")
+        cls.purchase_orders = [
+            cls.create_purchase_order(cls.vendor, f"PO-PLAN-{index}")
+            for index in range(5)
+        ]
+
+    def test_vendor_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(
+                "/features/api/vendors/",
+                {"vendor_code": "V-NEW", "name": "n", "address": "a", "contact_details": "contact-V-PLAN"},
+                content_type="application/json",
+            )
+            self.client.put(
+                f"/features/api/vendors/{self.vendor.id}/",
+                {"contact_details": "contact-other"},
+                content_type="application/json",
+            )
+            self.client.post(
+                "/features/api/vendors/bulk/",
+                [{"vendor_code": "V-PLAN", "name": "n", "address": "a", "contact_details": "contact-V-PLAN"}],
+                content_type="application/json",
+            )
+            self.client.get(f"/features/api/vendors/{self.vendor.id}/")
+            self.client.get(f"/features/api/vendors/{self.vendor.id}/performance")
+        self.assertQueriesUseIndexes(context)
+
+    def test_list_queries_use_indexes(self):
+        today = datetime.date.today()
+        with CaptureQueriesContext(connection) as context:
+            for url, params in (
+                ("/features/api/vendors/", {}),
+                ("/features/api/purchase_orders/", {}),
+                ("/features/api/purchase_orders/", {
+                    "delivery_date_from": str(today), "delivery_date_to": str(today + datetime.timedelta(days=30)),
+                }),
+                ("/features/api/purchase_orders/", {"min_quality_rating": 3.0, "max_quality_rating": 5.0}),
+            ):
+                response = self.client.get(url, {"page_size": 1, **params})
+                self.assertEqual(response.status_code, 200, response.content)
+                if response.json()["next_cursor"]:
+                    self.client.get(url, {"page_size": 1, "cursor": response.json()["next_cursor"], **params})
+        self.assertQueriesUseIndexes(context)
+
+    def test_list_filters_use_their_indexes(self):
+        """ filter-only scans with sequential scans priced out pick the column's own index """
+        today = datetime.date.today()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for queryset, index in (
+                (FeaturesPurchaseOrderModel.objects.filter(delivery_date__gte=today), "features_po_delivery_date_idx"),
+                (FeaturesPurchaseOrderModel.objects.filter(quality_rating__gte=3.0), "features_po_quality_rating_idx"),
+            ):
+                self.assertIn(index, queryset.only("id").explain())
+
+    def test_purchase_order_write_queries_use_indexes(self):
+        po = self.purchase_orders[0]
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(
+                "/features/api/purchase_orders/",
+                self.purchase_order_payload(self.vendor, "PO-PLAN-NEW"),
+                content_type="application/json",
+            )
+            self.client.post(
+                "/features/api/purchase_orders/bulk/",
+                [self.purchase_order_payload(self.vendor, "PO-PLAN-BULK")],
+                content_type="application/json",
+            )
+            self.client.post(f"/features/api/purchase_orders/{po.id}/acknowledge")
+            self.client.put(
+                f"/features/api/purchase_orders/{po.id}/",
+                {"status": "completed", "quality_rating": 4.0},
+                content_type="application/json",
+            )
+            self.client.delete(f"/features/api/purchase_orders/{self.purchase_orders[1].id}/")
+        self.assertQueriesUseIndexes(context)
+
+    def test_export_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as context:
+            for params in (
+                {"vendor_id": self.vendor.id, "status": "pending"},
+                {"date_from": "2024-01-01T00:00:00Z", "date_to": "2024-02-01T00:00:00Z"},
+            ):
+                response = self.client.get("/features/api/purchase_orders/export/", params)
+                b"".join(response.streaming_content)
+        self.assertQueriesUseIndexes(context)
+
+    def test_metric_rebuild_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as context:
+            average_response_time(self.vendor.id)
+            rebuild_vendor_aggregates([self.vendor.id])
+        self.assertQueriesUseIndexes(context)
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesRunningAggregateTests(FeaturesTestDataMixin, TestCase):
+    """
+    Every purchase order transition moves the running aggregates exactly as a rebuild would count them
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-RUNNING")
+        cls.other = cls.create_vendor("V-RUNNING-OTHER")
+        rebuild_vendor_aggregates()
+
+    def write(self, method, path, data=None):
+        response = getattr(self.client, method)(f"/features/api/{path}", data or {}, content_type="application/json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertAggregatesMatchRebuild()
+
+    def counters(self, vendor):
+        aggregate = FeaturesVendorMetricsAggregateModel.objects.get(vendor=vendor)
+        return {key: getattr(aggregate, key) for key in AGGREGATE_FIELDS}
+
+    def create(self, number, **kwargs):
+        self.write("post", "purchase_orders/", self.purchase_order_payload(self.vendor, number, **kwargs))
+        return FeaturesPurchaseOrderModel.objects.get(po_number=number)
+
+    def test_transitions(self):
+        po = self.create("PO-RUNNING")
+        self.assertEqual(self.counters(self.vendor)["issued_count"], 1)
+
+        self.write("post", f"purchase_orders/{po.id}/acknowledge")
+        self.assertEqual(self.counters(self.vendor)["response_time_count"], 1)
+
+        """ completed without a rating counts as fulfilled, as exclude(quality_rating=0.0) did """
+        self.write("put", f"purchase_orders/{po.id}/", {"status": "completed"})
+        counters = self.counters(self.vendor)
+        self.assertEqual(
+            (counters["completed_count"], counters["on_time_count"], counters["fulfilled_count"], counters["quality_rating_count"]),
+            (1, 1, 1, 0),
+        )
+
+        self.write("put", f"purchase_orders/{po.id}/", {"quality_rating": 4.0})
+        self.write("put", f"purchase_orders/{po.id}/", {"quality_rating": 2.0})
+        counters = self.counters(self.vendor)
+        self.assertEqual((counters["quality_rating_sum"], counters["quality_rating_count"]), (2.0, 1))
+
+        self.write("put", f"purchase_orders/{po.id}/", {"quality_rating": 0.0})
+        self.assertEqual(self.counters(self.vendor)["fulfilled_count"], 0)
+
+        self.write("put", f"purchase_orders/{po.id}/", {"vendor_id": self.other.id})
+        self.assertEqual(self.counters(self.vendor), dict.fromkeys(AGGREGATE_FIELDS, 0))
+        self.assertEqual(self.counters(self.other)["completed_count"], 1)
+
+        self.write("put", f"purchase_orders/{po.id}/", {"status": "pending"})
+        self.assertEqual(self.counters(self.other)["completed_count"], 0)
+
+        self.write("delete", f"purchase_orders/{po.id}/")
+        self.assertEqual(self.counters(self.other), dict.fromkeys(AGGREGATE_FIELDS, 0))
+
+    def test_on_time_against_the_purchase_order_delivery_date(self):
+        self.create("PO-RUNNING-ON-TIME", status="completed")
+        late = self.create("PO-RUNNING-LATE", delivery_date=str(datetime.date.today() - datetime.timedelta(days=1)))
+        self.write("put", f"purchase_orders/{late.id}/", {"status": "completed", "quality_rating": 5.0})
+
+        counters = self.counters(self.vendor)
+        self.assertEqual((counters["completed_count"], counters["on_time_count"]), (2, 1))
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 0.5)
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesResponseTimeTests(FeaturesTestDataMixin, TestCase):
+    """
+    The SQL-side average response time agrees with the running sums
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-RESPONSE")
+        issued = datetime.datetime.now(timezone) - datetime.timedelta(days=3)
+        for index, hours in enumerate((1, 5, 30)):
+            cls.create_purchase_order(
+                cls.vendor, f"PO-RESPONSE-{index}", issue_date=issued, acknowledgment_date=issued + datetime.timedelta(hours=hours),
+            )
+        cls.pending = cls.create_purchase_order(cls.vendor, "PO-RESPONSE-PENDING", issue_date=issued)
+        rebuild_vendor_aggregates([cls.vendor.id])
+
+    def running_average(self):
+        return compute_metrics(FeaturesVendorMetricsAggregateModel.objects.get(vendor=self.vendor))["average_response_time"]
+
+    def test_sql_average_matches_running_sums(self):
+        self.assertEqual(average_response_time(self.vendor.id), 12.0)
+        self.assertEqual(self.running_average(), 12.0)
+
+        self.client.post(f"/features/api/purchase_orders/{self.pending.id}/acknowledge")
+        self.vendor.refresh_from_db()
+        self.assertAlmostEqual(average_response_time(self.vendor.id), self.running_average(), places=3)
+        self.assertEqual(self.vendor.average_response_time, self.running_average())
+        self.assertAlmostEqual(self.running_average(), (1 + 5 + 30 + 72) / 4, places=2)
+
+    def test_empty_vendor(self):
+        vendor = self.create_vendor("V-RESPONSE-EMPTY")
+        self.assertEqual(average_response_time(vendor.id), 0.0)
+
+    @override_settings(FEATURES_METRICS_MODE="async")
+    def test_benchmark_runs_in_sync_mode_by_default(self):
+        output = io.StringIO()
+        call_command("benchmark_acknowledgement", sizes=[10], requests=3, json=True, stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["metrics_mode"], "sync")
+        self.assertEqual([row["purchase_orders"] for row in report["results"]], [10])
+        self.assertFalse(FeaturesMetricsOutboxModel.objects.exists())
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesQueryCountTests(FeaturesTestDataMixin, TestCase):
+    """
+    By-ID endpoints resolve their row once per request
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-COUNT")
+        cls.purchase_order = cls.create_purchase_order(cls.vendor, "PO-COUNT")
+        rebuild_vendor_aggregates([cls.vendor.id])
+
+    def setUp(self):
+        features_cache().clear()
+
+    def test_vendor_details(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(f"/features/api/vendors/{self.vendor.id}/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(f"/features/api/vendors/{self.vendor.id}/").status_code, 200)
+
+    def test_vendor_update(self):
+        with self.assertNumQueries(4):
+            response = self.client.put(
+                f"/features/api/vendors/{self.vendor.id}/", {"name": "renamed"}, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(5):
+            response = self.client.put(
+                f"/features/api/vendors/{self.vendor.id}/", {"contact_details": "new"}, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_vendor_delete(self):
+        vendor = self.create_vendor("V-COUNT-DELETE")
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.delete(f"/features/api/vendors/{vendor.id}/").status_code, 200)
+        lookups = [query["sql"] for query in context.captured_queries if "FOR UPDATE" in query["sql"]]
+        self.assertEqual(len(lookups), 1)
+
+    def test_purchase_order_details(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/features/api/purchase_orders/{self.purchase_order.id}/")
+            self.assertEqual(response.status_code, 200)
+
+    def test_purchase_order_update_without_metric_change(self):
+        with self.assertNumQueries(4):
+            response = self.client.put(
+                f"/features/api/purchase_orders/{self.purchase_order.id}/",
+                {"quantity": 5},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_purchase_order_completion(self):
+        with self.assertNumQueries(11):
+            response = self.client.put(
+                f"/features/api/purchase_orders/{self.purchase_order.id}/",
+                {"status": "completed", "quality_rating": 4.5},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_purchase_order_acknowledgement(self):
+        with self.assertNumQueries(11):
+            response = self.client.post(f"/features/api/purchase_orders/{self.purchase_order.id}/acknowledge")
+            self.assertEqual(response.status_code, 200)
+
+    def test_purchase_order_delete(self):
+        with self.assertNumQueries(11):
+            response = self.client.delete(f"/features/api/purchase_orders/{self.purchase_order.id}/")
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_purchase_order(self):
+        with self.assertNumQueries(3):
+            response = self.client.post("/features/api/purchase_orders/0/acknowledge")
+            self.assertEqual(response.status_code, 400)
+
+    def test_vendor_performance(self):
+        self.client.post(f"/features/api/purchase_orders/{self.purchase_order.id}/acknowledge")
+        features_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/features/api/vendors/{self.vendor.id}/performance")
+            self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/features/api/vendors/{self.vendor.id}/performance")
+            self.assertEqual(response.status_code, 200)
+
+
+@override_settings(FEATURES_METRICS_MODE="async")
+class FeaturesMetricsOutboxTests(FeaturesTestDataMixin, TestCase):
+    """
+    Purchase order writes queue metric events that the worker folds into the aggregates
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-OUTBOX")
+        cls.purchase_order = cls.create_purchase_order(cls.vendor, "PO-OUTBOX")
+        rebuild_vendor_aggregates([cls.vendor.id])
+
+    def test_writes_queue_events_without_touching_aggregates(self):
+        self.client.post(f"/features/api/purchase_orders/{self.purchase_order.id}/acknowledge")
+        self.client.put(
+            f"/features/api/purchase_orders/{self.purchase_order.id}/",
+            {"status": "completed", "quality_rating": 4.0},
+            content_type="application/json",
+        )
+        self.assertEqual(FeaturesMetricsOutboxModel.objects.filter(vendor=self.vendor).count(), 2)
+        aggregate = FeaturesVendorMetricsAggregateModel.objects.get(vendor=self.vendor)
+        self.assertEqual((aggregate.completed_count, aggregate.response_time_count), (0, 0))
+
+    def test_worker_coalesces_events_per_vendor(self):
+        self.client.post(f"/features/api/purchase_orders/{self.purchase_order.id}/acknowledge")
+        self.client.put(
+            f"/features/api/purchase_orders/{self.purchase_order.id}/",
+            {"status": "completed", "quality_rating": 4.0},
+            content_type="application/json",
+        )
+        self.client.post("/features/api/purchase_orders/", self.purchase_order_payload(self.vendor, "PO-OUTBOX-NEW"), content_type="application/json")
+
+        with CaptureQueriesContext(connection) as context:
+            call_command("process_metrics_outbox", once=True, workers=1, stdout=io.StringIO())
+        aggregate_updates = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "features_featuresvendormetricsaggregatemodel"')
+        ]
+        self.assertEqual(len(aggregate_updates), 1)
+        self.assertFalse(FeaturesMetricsOutboxModel.objects.exists())
+
+        aggregate = FeaturesVendorMetricsAggregateModel.objects.get(vendor=self.vendor)
+        self.assertEqual(
+            (aggregate.issued_count, aggregate.completed_count, aggregate.quality_rating_sum, aggregate.response_time_count),
+            (2, 1, 4.0, 1),
+        )
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+        self.assertEqual(self.vendor.fulfillment_rate, 0.5)
+
+
+class FeaturesKeysetPaginationTests(FeaturesTestDataMixin, TestCase):
+    """
+    Paging through a list visits every row once, ties on updated_date and undated rows included
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-KEYSET")
+        cls.purchase_orders = [cls.create_purchase_order(cls.vendor, f"PO-KEYSET-{index}") for index in range(7)]
+        tied = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+        ids = [po.id for po in cls.purchase_orders]
+        FeaturesPurchaseOrderModel.objects.filter(id__in=ids[:3]).update(updated_date=tied)
+        FeaturesPurchaseOrderModel.objects.filter(id=ids[3]).update(updated_date=tied + datetime.timedelta(hours=1))
+        FeaturesPurchaseOrderModel.objects.filter(id=ids[4]).update(updated_date=tied - datetime.timedelta(hours=1))
+        FeaturesPurchaseOrderModel.objects.filter(id__in=ids[5:]).update(updated_date=None)
+        cls.expected = [ids[3], ids[2], ids[1], ids[0], ids[4], ids[6], ids[5]]
+
+    def walk(self, url, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"vendor_id": self.vendor.id, "page_size": page_size, "fields": "id"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            self.assertLessEqual(len(body["purchase_orders"]), page_size)
+            ids += [row["id"] for row in body["purchase_orders"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_cover_every_row_once(self):
+        for url in ("/features/api/purchase_orders/", "/features/api/async/purchase_orders/"):
+            for page_size in (1, 2, 3, 7):
+                ids, pages = self.walk(url, page_size)
+                self.assertEqual(ids, self.expected, (url, page_size))
+                self.assertEqual(pages, -(-len(self.expected) // page_size), (url, page_size))
+
+    @override_settings(FEATURES_LIST_MAX_PAGE_SIZE=3)
+    def test_page_size_cap(self):
+        response = self.client.get("/features/api/purchase_orders/", {"vendor_id": self.vendor.id, "page_size": 100})
+        self.assertEqual(len(response.json()["purchase_orders"]), 3)
+        self.assertIsNotNone(response.json()["next_cursor"])
+        self.assertEqual(self.client.get("/features/api/purchase_orders/", {"page_size": 0}).status_code, 400)
+
+    def test_malformed_cursor(self):
+        for cursor in (
+            "not a cursor",
+            base64.urlsafe_b64encode(b"[1, 2]").decode(),
+            base64.urlsafe_b64encode(b'{"updated_date": "yesterday", "id": 1}').decode(),
+            base64.urlsafe_b64encode(b'{"updated_date": null}').decode(),
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        ):
+            for url in ("/features/api/purchase_orders/", "/features/api/vendors/"):
+                response = self.client.get(url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400, (url, cursor))
+                self.assertEqual(response.json()["message"], "Invalid cursor!")
+
+
+class FeaturesPurchaseOrderExportTests(FeaturesTestDataMixin, TestCase):
+    """
+    Streamed exports carry every filtered purchase order in id order
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-EXPORT")
+        cls.other = cls.create_vendor("V-EXPORT-OTHER")
+        issued = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+        cls.first = cls.create_purchase_order(cls.vendor, "PO-EXPORT-1", issue_date=issued, items={"bolt": [1, 2]})
+        cls.second = cls.create_purchase_order(
+            cls.vendor, "PO-EXPORT-2", issue_date=issued + datetime.timedelta(days=10), status="completed"
+        )
+        cls.foreign = cls.create_purchase_order(cls.other, "PO-EXPORT-3", issue_date=issued)
+
+    def export(self, **params):
+        response = self.client.get("/features/api/purchase_orders/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def exported_numbers(self, **params):
+        _, body = self.export(**params)
+        return [json.loads(line)["po_number"] for line in body.splitlines()]
+
+    def test_ndjson(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="purchase_orders.ndjson"')
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([line["po_number"] for line in lines], ["PO-EXPORT-1", "PO-EXPORT-2", "PO-EXPORT-3"])
+        self.assertEqual(list(lines[0]), list(FeaturesPurchaseOrderExportSerializer.EXPORT_FIELDS))
+        self.assertEqual(
+            (lines[0]["id"], lines[0]["vendor_id"], lines[0]["items"], lines[0]["issue_date"]),
+            (self.first.id, self.vendor.id, {"bolt": [1, 2]}, "2024-03-01T12:00:00Z"),
+        )
+
+    def test_csv(self):
+        response, body = self.export(export_format="csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="purchase_orders.csv"')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], list(FeaturesPurchaseOrderExportSerializer.EXPORT_FIELDS))
+        self.assertEqual(len(rows), 4)
+        first = dict(zip(rows[0], rows[1]))
+        self.assertEqual((first["id"], first["po_number"], first["status"]), (str(self.first.id), "PO-EXPORT-1", "pending"))
+        self.assertEqual(json.loads(first["items"]), {"bolt": [1, 2]})
+
+    def test_filters(self):
+        self.assertEqual(self.exported_numbers(vendor_id=self.vendor.id), ["PO-EXPORT-1", "PO-EXPORT-2"])
+        self.assertEqual(self.exported_numbers(status="completed"), ["PO-EXPORT-2"])
+        self.assertEqual(
+            self.exported_numbers(date_from="2024-03-05T00:00:00Z", date_to="2024-03-31T00:00:00Z"), ["PO-EXPORT-2"]
+        )
+        self.assertEqual(self.exported_numbers(date_to="2024-03-05T00:00:00Z"), ["PO-EXPORT-1", "PO-EXPORT-3"])
+
+    def test_invalid_parameters(self):
+        for params, message in (
+            ({"date_from": "2024-03-31T00:00:00Z", "date_to": "2024-03-01T00:00:00Z"}, "date_from must be before date_to!"),
+            ({"export_format": "xml"}, '"xml" is not a valid choice.'),
+        ):
+            response = self.client.get("/features/api/purchase_orders/export/", params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json()["message"], message)
+
+
+class FeaturesPerformanceHistoryTests(FeaturesTestDataMixin, TestCase):
+    """
+    Performance snapshots are kept per hour, compacted into days and served by range
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-HISTORY")
+        cls.day = bucket_start(datetime.datetime.now(timezone) - datetime.timedelta(days=30), "day")
+
+    def setUp(self):
+        features_cache().clear()
+
+    def snapshot(self, date, bucket="hour", fulfillment_rate=0.0):
+        return FeaturesHistoricalPerformanceModel.objects.create(
+            vendor=self.vendor,
+            date=date,
+            bucket=bucket,
+            on_time_delivery_rate=0.0,
+            quality_rating_avg=0.0,
+            average_response_time=0.0,
+            fulfillment_rate=fulfillment_rate,
+        )
+
+    def history(self, bucket=None):
+        snapshots = FeaturesHistoricalPerformanceModel.objects.filter(vendor=self.vendor).order_by("bucket", "date")
+        if bucket:
+            snapshots = snapshots.filter(bucket=bucket)
+        return [(snapshot.date, snapshot.fulfillment_rate) for snapshot in snapshots]
+
+    def test_range_query(self):
+        hours = [self.day + datetime.timedelta(hours=hour) for hour in (1, 2, 3)]
+        for hour in hours:
+            self.snapshot(hour)
+        self.snapshot(self.day, bucket="day")
+
+        response = self.client.get(f"/features/api/vendors/{self.vendor.id}/performance", {
+            "from": hours[1].isoformat(), "to": hours[2].isoformat(), "bucket": "hour",
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        history = response.json()["performance_history"]
+        self.assertEqual([datetime.datetime.fromisoformat(row["date"]) for row in history], hours[1:])
+        self.assertEqual({row["bucket"] for row in history}, {"hour"})
+
+        response = self.client.get(f"/features/api/vendors/{self.vendor.id}/performance", {"bucket": "day"})
+        self.assertEqual([row["bucket"] for row in response.json()["performance_history"]], ["day"])
+
+        response = self.client.get(f"/features/api/vendors/{self.vendor.id}/performance", {
+            "from": hours[2].isoformat(), "to": hours[0].isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "from must be before to!")
+
+    def test_hourly_snapshot_upsert(self):
+        aggregate = FeaturesVendorMetricsAggregateModel.objects.create(vendor=self.vendor, issued_count=2, fulfilled_count=1)
+        for minute, hour in ((5, 10), (55, 10), (5, 11)):
+            frozen = timezone.localize(datetime.datetime(2024, 3, 1, hour, minute))
+            with mock.patch("features.metrics.datetime", frozen_datetime_module(frozen)):
+                refresh_vendor_metrics(aggregate)
+            aggregate.fulfilled_count += 1
+        self.assertEqual(self.history(), [
+            (timezone.localize(datetime.datetime(2024, 3, 1, 10)), 1.0),
+            (timezone.localize(datetime.datetime(2024, 3, 1, 11)), 1.5),
+        ])
+
+    def test_compaction(self):
+        next_day = bucket_start(self.day + datetime.timedelta(hours=36), "day")
+        for hour, fulfillment_rate in ((9, 0.1), (23, 0.5), (15, 0.3)):
+            self.snapshot(self.day + datetime.timedelta(hours=hour), fulfillment_rate=fulfillment_rate)
+        self.snapshot(next_day + datetime.timedelta(hours=1), fulfillment_rate=0.7)
+        self.snapshot(self.day, bucket="day", fulfillment_rate=0.9)
+        recent = self.snapshot(bucket_start(datetime.datetime.now(timezone), "hour"), fulfillment_rate=0.2)
+        expired = self.snapshot(self.day - datetime.timedelta(days=800), bucket="day")
+
+        call_command("compact_performance_history", stdout=io.StringIO())
+        self.assertEqual(self.history("day"), [(self.day, 0.5), (next_day, 0.7)])
+        self.assertEqual(self.history("hour"), [(recent.date, 0.2)])
+        self.assertFalse(FeaturesHistoricalPerformanceModel.objects.filter(id=expired.id).exists())
+
+        expired = self.snapshot(self.day - datetime.timedelta(days=800), bucket="day")
+        call_command("compact_performance_history", daily_retention_days=0, stdout=io.StringIO())
+        self.assertTrue(FeaturesHistoricalPerformanceModel.objects.filter(id=expired.id).exists())
+
+    def test_bucketing_migration(self):
+        hour = self.day + datetime.timedelta(hours=10)
+        for minute, fulfillment_rate in ((15, 0.1), (45, 0.4)):
+            self.snapshot(hour + datetime.timedelta(minutes=minute), fulfillment_rate=fulfillment_rate)
+        self.snapshot(hour + datetime.timedelta(hours=1, minutes=5), fulfillment_rate=0.6)
+
+        migration = importlib.import_module("features.migrations.0009_performance_time_series")
+        migration.bucket_existing_snapshots(apps, None)
+        self.assertEqual(self.history(), [(hour, 0.4), (hour + datetime.timedelta(hours=1), 0.6)])
+
+
+class FeaturesVendorBulkUpsertTests(FeaturesTestDataMixin, TestCase):
+    """
+    Bulk vendor upserts report created and updated rows and only overwrite profile fields
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-UPSERT")
+        cls.other = cls.create_vendor("V-UPSERT-OTHER")
+        FeaturesVendorsProfileModel.objects.filter(id=cls.vendor.id).update(on_time_delivery_rate=0.5, quality_rating_avg=4.0)
+
+    def setUp(self):
+        features_cache().clear()
+
+    def upsert(self, rows):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/features/api/vendors/bulk/", rows, content_type="application/json")
+
+    def row(self, code, **kwargs):
+        return {"vendor_code": code, "name": f"Vendor {code}", "address": "address", "contact_details": f"contact-{code}", **kwargs}
+
+    def test_created_and_updated_rows(self):
+        response = self.upsert([
+            self.row("V-UPSERT", name="Renamed", address="moved", on_time_delivery_rate=0.0),
+            self.row("V-UPSERT-NEW"),
+            self.row("V-UPSERT-NEW", name="Again"),
+            self.row("V-UPSERT-TAKER", contact_details="contact-V-UPSERT-OTHER"),
+            {"vendor_code": "V-UPSERT-BROKEN"},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["updated"], body["failed"]), (1, 1, 3))
+        self.assertEqual(
+            [result["status"] for result in body["results"]], ["updated", "created", "failed", "failed", "failed"]
+        )
+        self.assertEqual(body["results"][0]["id"], self.vendor.id)
+        self.assertEqual(body["results"][2]["errors"], ["Vendor code repeated in request!"])
+        self.assertEqual(body["results"][3]["errors"], ["Vendor contact details already exists!"])
+        self.assertIn("name", body["results"][4]["errors"])
+
+        self.vendor.refresh_from_db()
+        self.assertEqual((self.vendor.name, self.vendor.address), ("Renamed", "moved"))
+        self.assertEqual((self.vendor.on_time_delivery_rate, self.vendor.quality_rating_avg), (0.5, 4.0))
+        self.assertEqual(FeaturesVendorsProfileModel.objects.get(vendor_code="V-UPSERT-NEW").name, "Vendor V-UPSERT-NEW")
+
+    def test_contact_details_handed_over_within_batch(self):
+        response = self.upsert([
+            self.row("V-UPSERT-TAKER", contact_details="contact-V-UPSERT"),
+            self.row("V-UPSERT", contact_details="contact-V-UPSERT-moved"),
+        ])
+        self.assertEqual([result["status"] for result in response.json()["results"]], ["created", "updated"])
+        self.assertEqual(
+            FeaturesVendorsProfileModel.objects.get(contact_details="contact-V-UPSERT").vendor_code, "V-UPSERT-TAKER"
+        )
+
+        response = self.upsert([
+            self.row("V-UPSERT-SECOND", contact_details="contact-V-UPSERT-OTHER"),
+            self.row("V-UPSERT-OTHER", contact_details="contact-V-UPSERT-OTHER", name=""),
+        ])
+        """ the owner's row fails, so it keeps its contact details and the takeover fails with it """
+        self.assertEqual([result["status"] for result in response.json()["results"]], ["failed", "failed"])
+
+    def test_updated_vendors_leave_the_cache(self):
+        self.assertEqual(self.client.get(f"/features/api/vendors/{self.vendor.id}/").json()["vendor_details"]["name"], "Vendor V-UPSERT")
+        self.upsert([self.row("V-UPSERT", name="Renamed")])
+        self.assertEqual(self.client.get(f"/features/api/vendors/{self.vendor.id}/").json()["vendor_details"]["name"], "Renamed")
+
+    def test_concurrent_writers(self):
+        validate_rows = FeaturesVendorBulkUpsertSerializer.validate_rows
+        calls = []
+
+        def racing_validate_rows(serializer, rows, results):
+            valid_rows = validate_rows(serializer, rows, results)
+            if not calls:
+                self.create_vendor("V-UPSERT-RACE")
+                FeaturesVendorsProfileModel.objects.filter(id=self.other.id).update(contact_details="contact-V-UPSERT-CLAIM")
+            calls.append(1)
+            return valid_rows
+
+        with mock.patch.object(FeaturesVendorBulkUpsertSerializer, "validate_rows", racing_validate_rows):
+            response = self.upsert([
+                self.row("V-UPSERT-RACE", name="Raced"),
+                self.row("V-UPSERT-CLAIM"),
+            ])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual([result["status"] for result in body["results"]], ["updated", "failed"])
+        self.assertEqual(body["results"][1]["errors"], ["Vendor contact details already exists!"])
+        self.assertEqual(FeaturesVendorsProfileModel.objects.get(vendor_code="V-UPSERT-RACE").name, "Raced")
+        self.assertFalse(FeaturesVendorsProfileModel.objects.filter(vendor_code="V-UPSERT-CLAIM").exists())
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesPurchaseOrderBulkCreationTests(FeaturesTestDataMixin, TestCase):
+    """
+    Bulk purchase order creation reports every row and keeps the aggregates in step
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-BULK-PO")
+        cls.existing = cls.create_purchase_order(cls.vendor, "PO-BULK-EXISTING")
+        rebuild_vendor_aggregates([cls.vendor.id])
+
+    def create(self, data, content_type="application/json"):
+        return self.client.post("/features/api/purchase_orders/bulk/", data, content_type=content_type)
+
+    def test_per_row_results(self):
+        response = self.create([
+            self.purchase_order_payload(self.vendor, "PO-BULK-1"),
+            self.purchase_order_payload(self.vendor, "PO-BULK-EXISTING"),
+            self.purchase_order_payload(self.vendor, "PO-BULK-1"),
+            {**self.purchase_order_payload(self.vendor, "PO-BULK-2"), "vendor_id": 0},
+            {key: value for key, value in self.purchase_order_payload(self.vendor, "PO-BULK-3").items() if key != "quantity"},
+            self.purchase_order_payload(self.vendor, "PO-BULK-4"),
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (2, 4))
+        self.assertEqual([result["index"] for result in body["results"]], list(range(6)))
+        self.assertEqual(
+            [result["status"] for result in body["results"]],
+            ["created", "failed", "failed", "failed", "failed", "created"],
+        )
+        self.assertEqual(body["results"][1]["errors"], ["PO number already exists!"])
+        self.assertEqual(body["results"][2]["errors"], ["PO number repeated in request!"])
+        self.assertEqual(body["results"][3]["errors"], ["Vendor not exists!"])
+        self.assertIn("quantity", body["results"][4]["errors"])
+        self.assertEqual(
+            FeaturesPurchaseOrderModel.objects.get(po_number="PO-BULK-1").id, body["results"][0]["id"]
+        )
+        self.assertFalse(FeaturesPurchaseOrderModel.objects.filter(po_number__in=["PO-BULK-2", "PO-BULK-3"]).exists())
+
+    def test_request_bodies(self):
+        rows = [self.purchase_order_payload(self.vendor, f"PO-BULK-BODY-{index}") for index in range(3)]
+        self.assertEqual(self.create([rows[0]]).json()["created"], 1)
+        self.assertEqual(self.create({"purchase_orders": [rows[1]], "batch_size": 1}).json()["created"], 1)
+        response = self.create("\n".join(json.dumps(row) for row in rows[2:]) + "\n", "application/x-ndjson")
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(FeaturesPurchaseOrderModel.objects.filter(po_number__startswith="PO-BULK-BODY-").count(), 3)
+
+    @override_settings(FEATURES_BULK_MAX_ROWS=2)
+    def test_row_cap(self):
+        response = self.create([self.purchase_order_payload(self.vendor, f"PO-BULK-CAP-{index}") for index in range(3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FeaturesPurchaseOrderModel.objects.filter(po_number__startswith="PO-BULK-CAP-").exists())
+
+    def test_aggregates_after_insert(self):
+        self.create([
+            self.purchase_order_payload(self.vendor, "PO-BULK-DONE", status="completed"),
+            self.purchase_order_payload(self.vendor, "PO-BULK-OPEN"),
+        ])
+        aggregate = FeaturesVendorMetricsAggregateModel.objects.get(vendor=self.vendor)
+        self.assertEqual(
+            (aggregate.issued_count, aggregate.completed_count, aggregate.on_time_count, aggregate.fulfilled_count),
+            (3, 1, 1, 1),
+        )
+        self.vendor.refresh_from_db()
+        self.assertEqual((self.vendor.on_time_delivery_rate, self.vendor.fulfillment_rate), (1.0, 1 / 3))
+        self.assertAggregatesMatchRebuild()
+
+    def test_po_number_taken_between_check_and_insert(self):
+        validate_rows = FeaturesPurchaseOrderBulkCreationSerializer.validate_rows
+        calls = []
+
+        def racing_validate_rows(serializer, rows, results):
+            valid_rows = validate_rows(serializer, rows, results)
+            if not calls:
+                self.create_purchase_order(self.vendor, "PO-BULK-RACE")
+            calls.append(1)
+            return valid_rows
+
+        with mock.patch.object(FeaturesPurchaseOrderBulkCreationSerializer, "validate_rows", racing_validate_rows):
+            response = self.create([
+                self.purchase_order_payload(self.vendor, "PO-BULK-RACE"),
+                self.purchase_order_payload(self.vendor, "PO-BULK-CALM"),
+            ])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (1, 1))
+        self.assertEqual(body["results"][0]["errors"], ["PO number already exists!"])
+        self.assertEqual(body["results"][1]["status"], "created")
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesBulkAcknowledgementTests(FeaturesTestDataMixin, TestCase):
+    """
+    Acknowledging a batch costs the same queries however many purchase orders it holds
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendors = [cls.create_vendor(f"V-BULK-ACK-{index}") for index in range(2)]
+        cls.purchase_orders = [
+            cls.create_purchase_order(vendor, f"PO-BULK-ACK-{vendor.id}-{index}")
+            for vendor in cls.vendors
+            for index in range(10)
+        ]
+        rebuild_vendor_aggregates([vendor.id for vendor in cls.vendors])
+
+    def acknowledge(self, data):
+        return self.client.post("/features/api/purchase_orders/acknowledge/", data, content_type="application/json")
+
+    def test_query_count_independent_of_batch_size(self):
+        counts = []
+        for batch in (self.purchase_orders[8:10] + self.purchase_orders[18:20], self.purchase_orders[:8] + self.purchase_orders[10:18]):
+            with CaptureQueriesContext(connection) as context:
+                response = self.acknowledge({"po_ids": [po.id for po in batch]})
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response.json()["acknowledged"], len(batch))
+            counts.append(len(context.captured_queries))
+            updates = [
+                query["sql"] for query in context.captured_queries
+                if query["sql"].startswith('UPDATE "features_featurespurchaseordermodel"')
+            ]
+            self.assertEqual(len(updates), 1)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_aggregates_match_rebuild(self):
+        self.acknowledge([po.id for po in self.purchase_orders])
+        self.assertFalse(FeaturesPurchaseOrderModel.objects.filter(acknowledgment_date__isnull=True).exists())
+
+        current = {
+            aggregate.vendor_id: [getattr(aggregate, key) for key in AGGREGATE_FIELDS]
+            for aggregate in FeaturesVendorMetricsAggregateModel.objects.all()
+        }
+        rebuild_vendor_aggregates()
+        for aggregate in FeaturesVendorMetricsAggregateModel.objects.all():
+            self.assertEqual(aggregate.response_time_count, 10)
+            for key, value, rebuilt in zip(AGGREGATE_FIELDS, current[aggregate.vendor_id], [getattr(aggregate, key) for key in AGGREGATE_FIELDS]):
+                self.assertAlmostEqual(value, rebuilt, places=3, msg=key)
+
+    def test_per_purchase_order_results(self):
+        own, foreign = self.purchase_orders[0], self.purchase_orders[10]
+        response = self.acknowledge({"po_ids": [own.id, 0, foreign.id, own.id], "vendor_id": self.vendors[0].id})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["acknowledged"], body["failed"]), (1, 2))
+        self.assertEqual([result["status"] for result in body["results"]], ["acknowledged", "failed", "failed"])
+        foreign.refresh_from_db()
+        self.assertIsNone(foreign.acknowledgment_date)
+
+    def test_empty_batch(self):
+        self.assertEqual(self.acknowledge({"po_ids": []}).status_code, 400)
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesBulkUpdateTests(FeaturesTestDataMixin, TestCase):
+    """
+    Bulk status transitions write with bulk_update and refresh each vendor once
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendors = [cls.create_vendor(f"V-BULK-UPDATE-{index}") for index in range(2)]
+        cls.purchase_orders = [
+            cls.create_purchase_order(vendor, f"PO-BULK-UPDATE-{vendor.id}-{index}")
+            for vendor in cls.vendors
+            for index in range(10)
+        ]
+        rebuild_vendor_aggregates([vendor.id for vendor in cls.vendors])
+
+    def update(self, rows):
+        return self.client.put("/features/api/purchase_orders/bulk/", rows, content_type="application/json")
+
+    def test_vendor_metrics_refreshed_once_per_vendor(self):
+        rows = [{"id": po.id, "status": "completed", "quality_rating": 4.0} for po in self.purchase_orders]
+        with CaptureQueriesContext(connection) as context:
+            response = self.update(rows)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.json()["updated"], response.json()["failed"]), (20, 0))
+
+        statements = [query["sql"] for query in context.captured_queries]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "features_featurespurchaseordermodel"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "features_featuresvendorsprofilemodel"')]), 2)
+
+        current = {
+            aggregate.vendor_id: [getattr(aggregate, key) for key in AGGREGATE_FIELDS]
+            for aggregate in FeaturesVendorMetricsAggregateModel.objects.all()
+        }
+        rebuild_vendor_aggregates()
+        for aggregate in FeaturesVendorMetricsAggregateModel.objects.all():
+            self.assertEqual((aggregate.completed_count, aggregate.quality_rating_sum), (10, 40.0))
+            for key, value, rebuilt in zip(AGGREGATE_FIELDS, current[aggregate.vendor_id], [getattr(aggregate, key) for key in AGGREGATE_FIELDS]):
+                self.assertAlmostEqual(value, rebuilt, places=3, msg=key)
+        for vendor in self.vendors:
+            vendor.refresh_from_db()
+            self.assertEqual((vendor.quality_rating_avg, vendor.on_time_delivery_rate), (4.0, 1.0))
+
+    def test_query_count_independent_of_batch_size(self):
+        counts = []
+        for batch in (self.purchase_orders[8:10] + self.purchase_orders[18:20], self.purchase_orders[:8] + self.purchase_orders[10:18]):
+            with CaptureQueriesContext(connection) as context:
+                response = self.update([{"id": po.id, "status": "completed"} for po in batch])
+            self.assertEqual(response.status_code, 200, response.content)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_per_purchase_order_results(self):
+        completed = self.create_purchase_order(
+            self.vendors[0], "PO-BULK-UPDATE-DONE",
+            status="completed", quality_rating=3.0, completed_date=datetime.datetime.now(timezone) - datetime.timedelta(hours=1),
+        )
+        response = self.update([
+            {"id": self.purchase_orders[0].id, "status": "in_progress"},
+            {"id": 0, "status": "completed"},
+            {"id": self.purchase_orders[0].id, "status": "completed"},
+            {"id": self.purchase_orders[1].id},
+            {"id": completed.id, "quality_rating": 5.0},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["updated"], body["failed"]), (2, 3))
+        self.assertEqual(
+            [result["status"] for result in body["results"]], ["updated", "failed", "failed", "failed", "updated"]
+        )
+        completed_date = FeaturesPurchaseOrderModel.objects.get(id=completed.id).completed_date
+        self.assertEqual(completed_date, completed.completed_date)
+
+
+class FeaturesAsyncReadTests(FeaturesTestDataMixin, TestCase):
+    """
+    Async read endpoints answer exactly like their sync counterparts
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-ASYNC")
+        cls.create_vendor("V-ASYNC-OTHER")
+        cls.purchase_order = cls.create_purchase_order(cls.vendor, "PO-ASYNC")
+        cls.create_purchase_order(cls.vendor, "PO-ASYNC-OTHER")
+
+    def setUp(self):
+        features_cache().clear()
+
+    async def test_lists_match_sync_endpoints(self):
+        for resource in ("vendors", "purchase_orders"):
+            expected = (await self.async_client.get(f"/features/api/{resource}/", {"page_size": 1})).json()
+            response = await self.async_client.get(f"/features/api/async/{resource}/", {"page_size": 1})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+
+            expected = await self.async_client.get(f"/features/api/{resource}/", {"cursor": expected["next_cursor"]})
+            response = await self.async_client.get(f"/features/api/async/{resource}/", {"cursor": response.json()["next_cursor"]})
+            self.assertEqual(response.json(), expected.json())
+
+    async def test_details_match_sync_endpoints(self):
+        for path in (f"vendors/{self.vendor.id}/", f"purchase_orders/{self.purchase_order.id}/"):
+            expected = await self.async_client.get(f"/features/api/{path}")
+            response = await self.async_client.get(f"/features/api/async/{path}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected.json())
+
+    async def test_invalid_requests_are_rejected(self):
+        for path, params in (
+            ("vendors/0/", {}),
+            ("purchase_orders/0/", {}),
+            ("vendors/", {"cursor": "bogus"}),
+            ("purchase_orders/", {"date_from": "2024-03-31T00:00:00Z", "date_to": "2024-03-01T00:00:00Z"}),
+            ("purchase_orders/", {"min_quality_rating": 4.0, "max_quality_rating": 2.0}),
+        ):
+            expected = await self.async_client.get(f"/features/api/{path}", params)
+            response = await self.async_client.get(f"/features/api/async/{path}", params)
+            self.assertEqual(response.status_code, 400, (path, params))
+            self.assertEqual(response.json(), expected.json())
+
+
+class FeaturesRendererTests(FeaturesTestDataMixin, TestCase):
+    """
+    The fast renderer matches JSONRenderer and passes purchase order items through untouched
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-RENDER")
+        cls.purchase_order = cls.create_purchase_order(
+            cls.vendor, "PO-RENDER", items={"sku": "A-1", "name": "caf\u00e9 \u2028", "lines": [1, 2.5, None]}
+        )
+
+    def test_output_matches_stdlib_encoder(self):
+        data = {
+            "now": datetime.datetime(2024, 5, 1, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            "local": datetime.datetime.now(timezone),
+            "day": datetime.date(2024, 5, 1),
+            "text": "caf\u00e9 \u2028",
+            "rows": [{"id": 1, "rate": 0.5}, None, True],
+        }
+        with mock.patch("features.renderers.orjson", None):
+            expected = FeaturesJSONRenderer().render(data)
+        self.assertEqual(FeaturesJSONRenderer().render(data), expected)
+
+    def test_raw_json_is_embedded(self):
+        data = {"items": FeaturesRawJSON('{"a": [1, 2]}'), "label": "x"}
+        expected = b'{"items":{"a": [1, 2]},"label":"x"}'
+        self.assertEqual(FeaturesJSONRenderer().render(data), expected)
+        with mock.patch("features.renderers.orjson", None):
+            self.assertEqual(FeaturesJSONRenderer().render(data), expected)
+
+    def test_purchase_order_items_round_trip(self):
+        for path, params in (
+            (f"/features/api/purchase_orders/{self.purchase_order.id}/", {}),
+            ("/features/api/purchase_orders/", {"fields": "id,items"}),
+        ):
+            response = self.client.get(path, params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            purchase_order = body.get("purchase_order_details") or body["purchase_orders"][0]
+            self.assertEqual(purchase_order["items"], self.purchase_order.items)
+
+
+class FeaturesListFilterTests(FeaturesTestDataMixin, TestCase):
+    """
+    List filters narrow the rows and fields= narrows the columns, across pages
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-FILTER")
+        cls.other_vendor = cls.create_vendor("V-FILTER-OTHER")
+        now = datetime.datetime.now(timezone)
+        for index in range(6):
+            cls.create_purchase_order(
+                cls.vendor if index % 2 else cls.other_vendor,
+                f"PO-FILTER-{index}",
+                status="completed" if index % 3 == 0 else "pending",
+                quality_rating=float(index),
+                issue_date=now - datetime.timedelta(days=index),
+            )
+
+    def list_purchase_orders(self, params):
+        rows, cursor = [], None
+        while True:
+            page_params = {**params, "page_size": 1, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get("/features/api/purchase_orders/", page_params)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            rows += body["purchase_orders"]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return rows
+
+    def test_filters(self):
+        since = (datetime.datetime.now(timezone) - datetime.timedelta(days=3, hours=12)).isoformat()
+        rows = self.list_purchase_orders({"vendor_id": self.vendor.id, "status": "pending", "date_from": since})
+        self.assertEqual(sorted(row["po_number"] for row in rows), ["PO-FILTER-1"])
+
+        rows = self.list_purchase_orders({"min_quality_rating": 2, "max_quality_rating": 4})
+        self.assertEqual(sorted(row["po_number"] for row in rows), ["PO-FILTER-2", "PO-FILTER-3", "PO-FILTER-4"])
+
+    def test_projection(self):
+        rows = self.list_purchase_orders({"fields": "po_number,status"})
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(all(row.keys() == {"po_number", "status"} for row in rows))
+
+        rows = self.list_purchase_orders({})
+        self.assertNotIn("items", rows[0])
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/features/api/purchase_orders/", {"fields": "po_number"})
+        self.assertNotIn('"items"', context.captured_queries[0]["sql"])
+
+    def test_invalid_parameters(self):
+        for params in ({"fields": "po_number,secret"}, {"min_quality_rating": 4, "max_quality_rating": 2}):
+            self.assertEqual(self.client.get("/features/api/purchase_orders/", params).status_code, 400)
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesConcurrentWriteTests(FeaturesTestDataMixin, TransactionTestCase):
+    """
+    Concurrent writes against the same vendors lose no aggregate update and create no duplicate snapshot
+    """
+
+    def setUp(self):
+        features_cache().clear()
+        self.vendors = [self.create_vendor("V-STRESS-A"), self.create_vendor("V-STRESS-B")]
+        self.purchase_orders = [
+            self.create_purchase_order(self.vendors[index % 2], f"PO-STRESS-{index}")
+            for index in range(40)
+        ]
+        rebuild_vendor_aggregates()
+
+    def request(self, method, path, data=None):
+        try:
+            response = getattr(Client(), method)(path, data, content_type="application/json")
+            return response.status_code, response.content
+        finally:
+            connection.close()
+
+    def rebuild(self):
+        try:
+            return 200, rebuild_vendor_aggregates()
+        finally:
+            connection.close()
+
+    def test_concurrent_writes(self):
+        tasks = []
+        for index, po in enumerate(self.purchase_orders):
+            url = f"/features/api/purchase_orders/{po.id}/"
+            tasks.append((self.request, "post", f"{url}acknowledge"))
+            tasks.append((self.request, "put", url, {"status": "completed", "quality_rating": float(index % 5)}))
+            if index < 10:
+                """ moving orders both ways between the vendors locks their aggregates in opposite order """
+                tasks.append((self.request, "put", url, {"vendor_id": self.vendors[(index + 1) % 2].id}))
+        tasks += [(self.request, "post", f"/features/api/purchase_orders/{self.purchase_orders[0].id}/acknowledge")] * 5
+        tasks += [(self.rebuild,)] * 3
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda task: task[0](*task[1:]), tasks))
+        self.assertEqual([result for result in results if result[0] != 200], [])
+
+        current = {
+            aggregate.vendor_id: [getattr(aggregate, key) for key in AGGREGATE_FIELDS]
+            for aggregate in FeaturesVendorMetricsAggregateModel.objects.all()
+        }
+        rebuild_vendor_aggregates()
+        for aggregate in FeaturesVendorMetricsAggregateModel.objects.all():
+            expected = [getattr(aggregate, key) for key in AGGREGATE_FIELDS]
+            for key, value, rebuilt in zip(AGGREGATE_FIELDS, current[aggregate.vendor_id], expected):
+                self.assertAlmostEqual(value, rebuilt, places=3, msg=key)
+            vendor = FeaturesVendorsProfileModel.objects.get(id=aggregate.vendor_id)
+            for key, value in compute_metrics(aggregate).items():
+                self.assertAlmostEqual(getattr(vendor, key), value, places=6, msg=key)
+
+        duplicates = FeaturesHistoricalPerformanceModel.objects.values("vendor_id", "bucket", "date").annotate(
+            rows=Count("id")
+        ).filter(rows__gt=1)
+        self.assertFalse(duplicates.exists())
+
+
+class FeaturesVendorRankingTests(FeaturesTestDataMixin, TestCase):
+    """
+    Top vendors come from the ranking view through its sort indexes
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendors = {}
+        for code, on_time, response_time, po_count, acknowledged in (
+            ("V-RANK-A", 0.9, 5.0, 10, 10),
+            ("V-RANK-B", 0.95, 0.0, 2, 0),
+            ("V-RANK-C", 0.5, 2.0, 20, 5),
+        ):
+            vendor = cls.create_vendor(code)
+            FeaturesVendorsProfileModel.objects.filter(id=vendor.id).update(
+                on_time_delivery_rate=on_time, average_response_time=response_time
+            )
+            FeaturesVendorMetricsAggregateModel.objects.create(
+                vendor=vendor, issued_count=po_count, response_time_count=acknowledged
+            )
+            cls.vendors[code] = vendor
+        refresh_vendor_ranking()
+
+    def ranked_codes(self, params):
+        response = self.client.get("/features/api/vendors/ranking/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertIsNotNone(body["refreshed_date"])
+        self.assertEqual([row["rank"] for row in body["vendors"]], list(range(1, len(body["vendors"]) + 1)))
+        return [row["vendor_code"] for row in body["vendors"]]
+
+    def test_ranking(self):
+        self.assertEqual(self.ranked_codes({}), ["V-RANK-B", "V-RANK-A", "V-RANK-C"])
+        self.assertEqual(self.ranked_codes({"limit": 1}), ["V-RANK-B"])
+        self.assertEqual(self.ranked_codes({"min_po_count": 5}), ["V-RANK-A", "V-RANK-C"])
+        self.assertEqual(self.ranked_codes({"metric": "average_response_time"}), ["V-RANK-C", "V-RANK-A"])
+
+    def test_refresh_picks_up_metric_changes(self):
+        FeaturesVendorsProfileModel.objects.filter(id=self.vendors["V-RANK-C"].id).update(on_time_delivery_rate=1.0)
+        self.assertEqual(self.ranked_codes({"limit": 1}), ["V-RANK-B"])
+        refresh_vendor_ranking()
+        self.assertEqual(self.ranked_codes({"limit": 1}), ["V-RANK-C"])
+
+    def test_ranking_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as context:
+            for metric in ("on_time_delivery_rate", "quality_rating_avg", "fulfillment_rate", "average_response_time"):
+                self.client.get("/features/api/vendors/ranking/", {"metric": metric, "min_po_count": 5})
+        self.assertQueriesUseIndexes(context)
+
+
+class FeaturesBenchmarkCommandTests(TestCase):
+    """
+    The data generator and the API benchmark keep working against the current endpoints
+    """
+
+    def test_generate_and_benchmark(self):
+        call_command(
+            "generate_synthetic_data", vendors=3, pos_per_vendor=20, seed=1, prefix="T-SYN", stdout=io.StringIO()
+        )
+        vendors = FeaturesVendorsProfileModel.objects.filter(vendor_code__startswith="T-SYN")
+        self.assertEqual(vendors.count(), 3)
+        self.assertEqual(FeaturesPurchaseOrderModel.objects.filter(vendor__in=vendors).count(), 60)
+        self.assertEqual(FeaturesVendorMetricsAggregateModel.objects.filter(vendor__in=vendors, issued_count=20).count(), 3)
+        self.assertFalse(FeaturesPurchaseOrderModel.objects.filter(
+            completed_date__gt=datetime.datetime.now(pytz.utc)
+        ).exists())
+
+        output = io.StringIO()
+        call_command("benchmark_api", requests=2, warmup=1, memory_samples=1, metrics_mode="sync", stdout=output)
+        self.assertIn("purchase_orders.acknowledge", output.getvalue())
+        self.assertIn("async.vendors.detail", output.getvalue())
+        for endpoint in ("changes.latest", "changes.read", "metrics"):
+            self.assertIn(endpoint, output.getvalue())
+        """ rows the write endpoints created are gone again """
+        self.assertEqual(FeaturesVendorsProfileModel.objects.count(), 3)
+        self.assertEqual(FeaturesPurchaseOrderModel.objects.count(), 60)
+
+
+class FeaturesRequestMetricsTests(FeaturesTestDataMixin, TestCase):
+    """
+    Every request is measured, logged and counted on the metrics endpoint
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-INSTR")
+        for index in range(3):
+            cls.create_purchase_order(cls.vendor, f"PO-INSTR-{index}")
+
+    def setUp(self):
+        request_metrics.reset()
+
+    def request_records(self, path, params=None):
+        with self.assertLogs("vendor_management.settings", level="INFO") as logs:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(path, params)
+        records = [log.request_metrics for log in logs.records if hasattr(log, "request_metrics")]
+        self.assertEqual(len(records), 1)
+        return response, records[0], len(context.captured_queries)
+
+    def test_request_record(self):
+        response, record, queries = self.request_records(f"/features/api/vendors/{self.vendor.id}/")
+        self.assertEqual(record["endpoint"], "FeaturesVendorByIDAPIView")
+        self.assertEqual((record["method"], record["status"]), ("GET", 200))
+        self.assertEqual(record["queries"], queries)
+        self.assertEqual(record["response_size"], len(response.content))
+        self.assertFalse(record["slow"])
+        self.assertIsNone(record["repeated_query"])
+
+        response, record, queries = self.request_records("/features/api/async/purchase_orders/")
+        self.assertEqual(record["endpoint"], "FeaturesAsyncPurchaseOrderAPIView")
+        self.assertEqual(record["queries"], queries)
+
+        response, record, _ = self.request_records("/features/api/nowhere/")
+        self.assertEqual((record["endpoint"], record["status"]), ("unresolved", 404))
+
+    def test_streamed_response_is_recorded_once_sent(self):
+        response = self.client.get("/features/api/purchase_orders/export/", {"vendor_id": self.vendor.id})
+        with self.assertLogs("vendor_management.settings", level="INFO") as logs:
+            body = b"".join(response.streaming_content)
+        (record,) = [log.request_metrics for log in logs.records if hasattr(log, "request_metrics")]
+        self.assertEqual(record["endpoint"], "FeaturesPurchaseOrderExportAPIView")
+        self.assertEqual(record["response_size"], len(body))
+        self.assertGreaterEqual(record["queries"], 1)
+
+    @override_settings(FEATURES_SLOW_REQUEST_MS=0, FEATURES_N_PLUS_ONE_THRESHOLD=1)
+    def test_thresholds(self):
+        with self.assertLogs("vendor_management.settings", level="WARNING") as logs:
+            self.client.get("/features/api/purchase_orders/")
+        (record,) = [log.request_metrics for log in logs.records if hasattr(log, "request_metrics")]
+        self.assertTrue(record["slow"])
+        self.assertEqual(record["repeated_query"]["count"], 1)
+
+        body = self.client.get("/features/api/metrics/").content.decode()
+        self.assertIn('features_http_slow_requests_total{endpoint="FeaturesPurchaseOrderAPIView",method="GET"} 1', body)
+        self.assertIn('features_http_n_plus_one_requests_total{endpoint="FeaturesPurchaseOrderAPIView",method="GET"} 1', body)
+
+    def test_metrics_endpoint(self):
+        for _ in range(2):
+            self.client.get("/features/api/vendors/", {"page_size": 2})
+        response = self.client.get("/features/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE features_http_request_duration_seconds histogram", body)
+        self.assertIn(
+            'features_http_request_duration_seconds_count{endpoint="FeaturesVendorsAPIView",method="GET",status="200"} 2',
+            body,
+        )
+        self.assertIn(
+            'features_http_request_db_queries_bucket{endpoint="FeaturesVendorsAPIView",method="GET",le="+Inf"} 2', body
+        )
+        self.assertIn('features_cache_requests_total{outcome="hit"}', body)
+
+
+class FeaturesLoggingTests(TestCase):
+    """
+    Log records are only enqueued on the calling thread and written as JSON lines by the listener
+    """
+
+    def test_queue_handler_and_json_lines(self):
+        records = queue.SimpleQueue()
+        test_logger = logging.getLogger("features.tests.logging")
+        test_logger.propagate = False
+        test_logger.addHandler(NonBlockingQueueHandler(records))
+        api_logger = logging.LoggerAdapter(test_logger, {"app_name": "FeaturesLoggingTests", "request_metrics": {"queries": 2}})
+        try:
+            try:
+                raise ValueError("broken")
+            except ValueError:
+                api_logger.exception("failed for %s", "vendor")
+        finally:
+            test_logger.handlers.clear()
+
+        record = records.get_nowait()
+        self.assertTrue(records.empty())
+        self.assertEqual((record.msg, record.args, record.exc_info), ("failed for vendor", None, None))
+
+        line = json.loads(JSONFormatter().format(record))
+        self.assertEqual(line["level"], "ERROR")
+        self.assertEqual(line["message"], "failed for vendor")
+        self.assertEqual(line["app_name"], "FeaturesLoggingTests")
+        self.assertEqual(line["request_metrics"], {"queries": 2})
+        self.assertIn("ValueError: broken", line["exception"])
+
+
+class FeaturesConditionalGetTests(FeaturesTestDataMixin, TestCase):
+    """
+    Clients holding a current copy get a 304 after a single key lookup
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-COND")
+        cls.purchase_orders = [cls.create_purchase_order(cls.vendor, f"PO-COND-{index}") for index in range(3)]
+
+    def setUp(self):
+        features_cache().clear()
+
+    def revalidate(self, path, params=None, queries=1, **headers):
+        """ a fresh read, then the same read made conditional on its validators """
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(queries):
+            revalidated = self.client.get(path, params, **headers or {"HTTP_IF_NONE_MATCH": response["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], response["ETag"])
+        self.assertEqual(revalidated.content, b"")
+        return response
+
+    def test_vendor_details(self):
+        for path in (f"/features/api/vendors/{self.vendor.id}/", f"/features/api/async/vendors/{self.vendor.id}/"):
+            """ the version comes with the cached details """
+            response = self.revalidate(path, queries=0)
+            self.assertIn("Last-Modified", response)
+
+        path = f"/features/api/vendors/{self.vendor.id}/"
+        etag = self.client.get(path)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(path, {"name": "Renamed"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200, response.content)
+        changed = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.json()["vendor_details"]["name"], "Renamed")
+
+    def test_purchase_order_details(self):
+        po = self.purchase_orders[0]
+        for path in (f"/features/api/purchase_orders/{po.id}/", f"/features/api/async/purchase_orders/{po.id}/"):
+            response = self.revalidate(path)
+            self.revalidate(path, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+        path = f"/features/api/purchase_orders/{po.id}/"
+        etag = self.client.get(path)["ETag"]
+        FeaturesPurchaseOrderModel.objects.get(id=po.id).save()
+        with self.assertNumQueries(2):
+            changed = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.json()["purchase_order_details"]["id"], po.id)
+
+        missing = self.client.get("/features/api/purchase_orders/0/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(missing.status_code, 400)
+
+    def test_lists(self):
+        for path, queries in (
+            ("/features/api/purchase_orders/", 1),
+            ("/features/api/async/purchase_orders/", 1),
+            ("/features/api/vendors/", 2),  # a short last page looks for rows without updated_date too
+        ):
+            response = self.revalidate(path, {"page_size": 2}, queries=queries)
+            self.assertNotIn("Last-Modified", response)
+
+        path = "/features/api/purchase_orders/"
+        etag = self.client.get(path, {"page_size": 2})["ETag"]
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(path, {"page_size": 2, "vendor_id": self.vendor.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertQueriesUseIndexes(context)
+        self.assertNotEqual(etag, self.client.get(path, {"page_size": 2, "fields": "id"})["ETag"])
+
+        """ dropping a row of the page changes the page, though no updated_date moved """
+        FeaturesPurchaseOrderModel.objects.filter(id=self.purchase_orders[-1].id).delete()
+        changed = self.client.get(path, {"page_size": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()["purchase_orders"]), 2)
+        self.assertEqual(changed["ETag"], self.client.get(path, {"page_size": 2})["ETag"])
+
+
+@override_settings(FEATURES_METRICS_MODE="async")
+class FeaturesChangeFeedTests(FeaturesTestDataMixin, TransactionTestCase):
+    """
+    Writes show up in the change feed in commit safe order, deletes as tombstones
+    """
+
+    def feed(self, since, **params):
+        """ every change after since, following next_since page by page """
+        changes = []
+        while True:
+            response = self.client.get("/features/api/changes/", {"since": since, **params})
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            changes += body["changes"]
+            since = body["next_since"]
+            if not body["has_more"]:
+                return changes, since
+
+    def test_changes_and_tombstones(self):
+        _, since = self.feed("latest")
+        vendor = self.create_vendor("V-FEED")
+        response = self.client.post(
+            "/features/api/purchase_orders/",
+            self.purchase_order_payload(vendor, "PO-FEED"),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        po = FeaturesPurchaseOrderModel.objects.get(po_number="PO-FEED")
+        self.client.put(f"/features/api/purchase_orders/{po.id}/", {"quantity": 5}, content_type="application/json")
+        self.client.delete(f"/features/api/vendors/{vendor.id}/", {}, content_type="application/json")
+
+        changes, since = self.feed(since, limit=2, resources="vendor,purchase_order")
+        self.assertEqual(
+            [(change["resource"], change["id"], change["operation"]) for change in changes],
+            [
+                ("vendor", vendor.id, "insert"),
+                ("purchase_order", po.id, "insert"),
+                ("purchase_order", po.id, "update"),
+                ("purchase_order", po.id, "delete"),
+                ("vendor", vendor.id, "delete"),
+            ],
+        )
+        self.assertEqual(changes[2]["data"]["quantity"], 5)
+        self.assertIsNone(changes[3]["data"])
+        self.assertEqual(self.feed(since)[0], [])
+
+        response = self.client.get("/features/api/changes/", {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_open_transactions_hold_back_later_commits(self):
+        _, since = self.feed("latest")
+        written, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    self.create_vendor("V-FEED-SLOW")
+                    written.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow = executor.submit(slow_writer)
+            written.wait(10)
+            """ committed after the slow transaction began, so it may only be handed out behind it """
+            self.create_vendor("V-FEED-FAST")
+            self.assertEqual(self.feed(since, resources="vendor")[0], [])
+            release.set()
+            slow.result()
+
+        changes, _ = self.feed(since, resources="vendor")
+        self.assertEqual([change["data"]["vendor_code"] for change in changes], ["V-FEED-SLOW", "V-FEED-FAST"])
+
+    def test_versions_follow_write_order(self):
+        vendor = self.create_vendor("V-FEED-VERSION")
+        _, since = self.feed("latest")
+        started, release = threading.Event(), threading.Event()
+
+        def older_writer():
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_current_xact_id()")
+                    started.set()
+                    release.wait(10)
+                    FeaturesVendorsProfileModel.objects.filter(pk=vendor.pk).update(name="older txid, written last")
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            older = executor.submit(older_writer)
+            started.wait(10)
+            """ newer txid, writes and commits the vendor before the older transaction does """
+            FeaturesVendorsProfileModel.objects.filter(pk=vendor.pk).update(name="newer txid, written first")
+            release.set()
+            older.result()
+
+        changes, _ = self.feed(since, resources="vendor")
+        self.assertEqual(
+            [change["data"]["name"] for change in changes],
+            ["older txid, written last", "newer txid, written first"],
+        )
+        self.assertGreater(changes[0]["version"], changes[1]["version"])
+        latest = {}
+        for change in changes:
+            key = (change["resource"], change["id"])
+            if key not in latest or change["version"] > latest[key]["version"]:
+                latest[key] = change
+        self.assertEqual(latest[("vendor", vendor.id)]["data"]["name"], "older txid, written last")
+
+
+@override_settings(FEATURES_METRICS_MODE="sync")
+class FeaturesEventStreamTests(FeaturesTestDataMixin, TestCase):
+    """
+    Open event streams receive the acknowledgements and status changes of their vendor
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = cls.create_vendor("V-EVENTS")
+        cls.other_vendor = cls.create_vendor("V-EVENTS-OTHER")
+        cls.po = cls.create_purchase_order(cls.vendor, "PO-EVENTS")
+        cls.other_po = cls.create_purchase_order(cls.other_vendor, "PO-EVENTS-OTHER")
+        rebuild_vendor_aggregates()
+
+    def write(self, method, path, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(path, data or {}, content_type="application/json")
+        self.assertEqual(response.status_code, 200, response.content)
+
+    async def next_event(self, stream):
+        frame = (await asyncio.wait_for(anext(stream), 5)).decode()
+        event_type, data = frame.strip().split("\n")
+        return event_type.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+    async def test_vendor_stream(self):
+        response = await self.async_client.get("/features/api/events/", {"vendor_id": self.vendor.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+        self.assertEqual(len(broker.subscribers), 1)
+
+        await sync_to_async(self.write)("post", f"/features/api/purchase_orders/{self.other_po.id}/acknowledge")
+        await sync_to_async(self.write)("post", f"/features/api/purchase_orders/{self.po.id}/acknowledge")
+        event_type, data = await self.next_event(stream)
+        self.assertEqual(event_type, "vendor.metrics")
+        self.assertEqual(data["vendor_id"], self.vendor.id)
+        event_type, data = await self.next_event(stream)
+        self.assertEqual(event_type, "purchase_order.acknowledged")
+        self.assertEqual((data["purchase_order_id"], data["status"]), (self.po.id, "pending"))
+        self.assertIsNotNone(data["acknowledgment_date"])
+
+        """ only status changes of an update are published """
+        await sync_to_async(self.write)("put", f"/features/api/purchase_orders/{self.po.id}/", {"quantity": 3})
+        await sync_to_async(self.write)("put", f"/features/api/purchase_orders/{self.po.id}/", {"status": "completed", "quality_rating": 4.0})
+        self.assertEqual((await self.next_event(stream))[0], "vendor.metrics")
+        event_type, data = await self.next_event(stream)
+        self.assertEqual((event_type, data["status"]), ("purchase_order.status", "completed"))
+
+        """ a client disconnect cancels the task reading the stream """
+        reader = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+        self.assertEqual(len(broker.subscribers), 0)
+
+    async def test_bulk_created_purchase_orders(self):
+        response = await self.async_client.get("/features/api/events/", {"vendor_id": self.vendor.id})
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+
+        await sync_to_async(self.write)("post", "/features/api/purchase_orders/bulk/", [
+            self.purchase_order_payload(self.vendor, "PO-EVENTS-BULK-1"),
+            self.purchase_order_payload(self.other_vendor, "PO-EVENTS-BULK-OTHER"),
+            self.purchase_order_payload(self.vendor, "PO-EVENTS-BULK-2", status="completed"),
+        ])
+        self.assertEqual((await self.next_event(stream))[0], "vendor.metrics")
+        events = [await self.next_event(stream) for _ in range(2)]
+        self.assertEqual(
+            [(event_type, data["po_number"], data["status"]) for event_type, data in events],
+            [
+                ("purchase_order.status", "PO-EVENTS-BULK-1", "pending"),
+                ("purchase_order.status", "PO-EVENTS-BULK-2", "completed"),
+            ],
+        )
+        self.assertIsNotNone(events[0][1]["purchase_order_id"])
+
+        reader = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+
+    @override_settings(FEATURES_EVENTS_QUEUE_SIZE=1, FEATURES_EVENTS_HEARTBEAT=0.01)
+    async def test_keepalive_and_overflow(self):
+        response = await self.async_client.get("/features/api/events/")
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        self.assertEqual(await anext(stream), b": keepalive\n\n")
+
+        for _ in range(3):
+            broker.dispatch(json.dumps({"type": "vendor.metrics", "vendor_id": self.vendor.id}))
+        await asyncio.sleep(0)
+        self.assertEqual(await anext(stream), b"event: overflow\ndata: {}\n\n")
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(len(broker.subscribers), 0)
+
+    def test_validation(self):
+        response = self.client.get("/features/api/events/")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ASGI", response.json()["message"])
+
+    async def test_unknown_vendor(self):
+        response = await self.async_client.get("/features/api/events/", {"vendor_id": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(FEATURES_METRICS_MODE="async", FEATURES_EVENTS_BACKEND="postgres")
+class FeaturesEventFanOutTests(FeaturesTestDataMixin, TransactionTestCase):
+    """
+    With the postgres backend events travel through NOTIFY, committed writes only
+    """
+
+    def tearDown(self):
+        broker.stop_listener()
+
+    async def test_notify_fan_out(self):
+        vendor = await sync_to_async(self.create_vendor)("V-FANOUT")
+        po = await sync_to_async(self.create_purchase_order)(vendor, "PO-FANOUT")
+
+        response = await self.async_client.get("/features/api/events/", {"vendor_id": vendor.id})
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        await asyncio.sleep(0.5)  # the listener thread connecting
+
+        def publish_and_roll_back():
+            try:
+                with transaction.atomic():
+                    publish_event("purchase_order.status", vendor.id, status="in_progress")
+                    raise RuntimeError("rolled back")
+            except RuntimeError:
+                pass
+
+        await sync_to_async(publish_and_roll_back)()
+        response = await sync_to_async(self.client.post)(
+            f"/features/api/purchase_orders/{po.id}/acknowledge", {}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        frame = (await asyncio.wait_for(anext(stream), 5)).decode()
+        self.assertTrue(frame.startswith("event: purchase_order.acknowledged"), frame)
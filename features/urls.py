@@ -1,11 +1,23 @@
 from django.urls import path
 from features.views import (
     FeaturesVendorsAPI,
+    FeaturesVendorBulkAPI,
     FeaturesVendorByIDAPI,
     FeaturesPurchaseOrderAPI,
+    FeaturesPurchaseOrderBulkAPI,
+    FeaturesPurchaseOrderExportAPI,
     FeaturesPurchaseOrderByIDAPI,
     FeaturesPOAcknowledgementAPI,
+    FeaturesPOBulkAcknowledgementAPI,
     FeaturesHistoricalPerformanceAPI,
+    FeaturesVendorRankingAPI,
+    FeaturesChangeFeedAPI,
+    FeaturesAsyncVendorsAPI,
+    FeaturesAsyncVendorByIDAPI,
+    FeaturesAsyncPurchaseOrderAPI,
+    FeaturesAsyncPurchaseOrderByIDAPI,
+    FeaturesEventStreamAPI,
+    FeaturesRequestMetricsAPI,
 )
 
 urlpatterns = [
@@ -14,6 +26,16 @@ urlpatterns = [
         FeaturesVendorsAPI.as_view(),
         name="FeaturesVendorsAPIView"
     ),
+    path(
+        "vendors/bulk/",
+        FeaturesVendorBulkAPI.as_view(),
+        name="FeaturesVendorBulkAPIView"
+    ),
+    path(
+        "vendors/ranking/",
+        FeaturesVendorRankingAPI.as_view(),
+        name="FeaturesVendorRankingAPIView"
+    ),
     path(
         "vendors/<int:vendor_id>/",
         FeaturesVendorByIDAPI.as_view(),
@@ -24,6 +46,21 @@ urlpatterns = [
         FeaturesPurchaseOrderAPI.as_view(),
         name="FeaturesPurchaseOrderAPIView"
     ),
+    path(
+        "purchase_orders/bulk/",
+        FeaturesPurchaseOrderBulkAPI.as_view(),
+        name="FeaturesPurchaseOrderBulkAPIView"
+    ),
+    path(
+        "purchase_orders/export/",
+        FeaturesPurchaseOrderExportAPI.as_view(),
+        name="FeaturesPurchaseOrderExportAPIView"
+    ),
+    path(
+        "purchase_orders/acknowledge/",
+        FeaturesPOBulkAcknowledgementAPI.as_view(),
+        name="FeaturesPOBulkAcknowledgementAPIView"
+    ),
     path(
         "purchase_orders/<int:po_id>/",
         FeaturesPurchaseOrderByIDAPI.as_view(),
@@ -39,4 +76,39 @@ urlpatterns = [
         FeaturesHistoricalPerformanceAPI.as_view(),
         name="FeaturesHistoricalPerformanceAPIView"
     ),
+    path(
+        "changes/",
+        FeaturesChangeFeedAPI.as_view(),
+        name="FeaturesChangeFeedAPIView"
+    ),
+    path(
+        "async/vendors/",
+        FeaturesAsyncVendorsAPI.as_view(),
+        name="FeaturesAsyncVendorsAPIView"
+    ),
+    path(
+        "async/vendors/<int:vendor_id>/",
+        FeaturesAsyncVendorByIDAPI.as_view(),
+        name="FeaturesAsyncVendorByIDAPIView"
+    ),
+    path(
+        "async/purchase_orders/",
+        FeaturesAsyncPurchaseOrderAPI.as_view(),
+        name="FeaturesAsyncPurchaseOrderAPIView"
+    ),
+    path(
+        "async/purchase_orders/<int:po_id>/",
+        FeaturesAsyncPurchaseOrderByIDAPI.as_view(),
+        name="FeaturesAsyncPurchaseOrderByIDAPIView"
+    ),
+    path(
+        "events/",
+        FeaturesEventStreamAPI.as_view(),
+        name="FeaturesEventStreamAPIView"
+    ),
+    path(
+        "metrics/",
+        FeaturesRequestMetricsAPI.as_view(),
+        name="FeaturesRequestMetricsAPIView"
+    ),
 ]
\ No newline at end of file
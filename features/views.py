@@ -1,21 +1,38 @@
 import logging
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser
 from rest_framework import status
 from rest_framework.response import Response
 from vendor_management.settings import logger
+from features.conditional import anot_modified, not_modified, with_validators
+from features.instrumentation import request_metrics
+from features.parsers import FeaturesNDJSONParser
+from features.renderers import FeaturesJSONRenderer
 from features.serializers import (
     FeaturesVendorCreationSerializer,
+    FeaturesVendorBulkUpsertSerializer,
     FeaturesVendorListSerializer,
     FeaturesVendorGetDetailsSerializer,
     FeaturesVendorUpdateSerializer,
     FeaturesVendorDeleteSerializer,
     FeaturesPurchaseOrderCreationSerializer,
+    FeaturesPurchaseOrderBulkCreationSerializer,
     FeaturesPurchaseOrderListSerializer,
+    FeaturesPurchaseOrderExportSerializer,
     FeaturesPurchaseOrderGetDetailsSerializer,
     FeaturesPurchaseOrderUpdateSerializer,
+    FeaturesPurchaseOrderBulkUpdateSerializer,
     FeaturesPurchaseOrderDeleteSerializer,
     FeaturesVendorAcknowledgementSerializer,
+    FeaturesBulkAcknowledgementSerializer,
     FeaturesHistoricalPerformanceSerializer,
+    FeaturesVendorRankingSerializer,
+    FeaturesChangeFeedSerializer,
+    FeaturesEventStreamSerializer,
 )
 
 class FeaturesVendorsAPI(APIView):
@@ -66,6 +83,56 @@ class FeaturesVendorsAPI(APIView):
                 data=request.GET.dict(),
                 context={"request": request},
             )
+            if serializer.is_valid():
+                response = not_modified(request, serializer)
+                if response is not None:
+                    return response
+                serializer.save()
+                return with_validators(
+                    Response(
+                        serializer.data["data"],
+                        status=status.HTTP_200_OK,
+                    ),
+                    request,
+                    serializer.version(),
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting vendors, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+class FeaturesVendorBulkAPI(APIView):
+    """
+    APIView to create or update vendors in bulk
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesVendorBulkAPI"})
+    parser_classes = [JSONParser, FeaturesNDJSONParser]
+
+    def post(self,request):
+        """
+        Upserting vendors by vendor code from a JSON list or NDJSON stream
+        """
+        try:
+            data = request.data
+            if isinstance(data, list):
+                data = {"vendors": data}
+            serializer = FeaturesVendorBulkUpsertSerializer(
+                data={**request.GET.dict(), **data},
+                context={"request": request},
+            )
             if serializer.is_valid():
                 serializer.save()
                 return Response(
@@ -84,12 +151,12 @@ class FeaturesVendorsAPI(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
         except Exception as e:
-            self.api_logger.info(f"Exception getting vendors, {str(e)}")
+            self.api_logger.info(f"Exception bulk upserting vendors, {str(e)}")
             return Response(
                 {"message": "Something went wrong", "data": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        
+
 class FeaturesVendorByIDAPI(APIView):
     """
     APIView to perform GET,PUT,DELETE operations for vendor by ID
@@ -108,10 +175,17 @@ class FeaturesVendorByIDAPI(APIView):
                 context={"request": request,"vendor_id":vendor_id},
             )
             if serializer.is_valid():
+                response = not_modified(request, serializer)
+                if response is not None:
+                    return response
                 serializer.save()
-                return Response(
-                    serializer.data["details"],
-                    status=status.HTTP_200_OK,
+                return with_validators(
+                    Response(
+                        serializer.data["details"],
+                        status=status.HTTP_200_OK,
+                    ),
+                    request,
+                    serializer.version(),
                 )
             else:
                 for key in serializer.errors.keys():
@@ -131,6 +205,7 @@ class FeaturesVendorByIDAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
     
+    @transaction.atomic
     def put(self,request,vendor_id=None):
         """
         Updating vendor
@@ -165,6 +240,7 @@ class FeaturesVendorByIDAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @transaction.atomic
     def delete(self,request,vendor_id=None):
         """
         Deleting vendor
@@ -247,6 +323,56 @@ class FeaturesPurchaseOrderAPI(APIView):
                 data=request.GET.dict(),
                 context={"request": request},
             )
+            if serializer.is_valid():
+                response = not_modified(request, serializer)
+                if response is not None:
+                    return response
+                serializer.save()
+                return with_validators(
+                    Response(
+                        serializer.data["data"],
+                        status=status.HTTP_200_OK,
+                    ),
+                    request,
+                    serializer.version(),
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting purchase orders, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+class FeaturesPurchaseOrderBulkAPI(APIView):
+    """
+    APIView to create and update purchase orders in bulk
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesPurchaseOrderBulkAPI"})
+    parser_classes = [JSONParser, FeaturesNDJSONParser]
+
+    def post(self,request):
+        """
+        Creating purchase orders from a JSON list or NDJSON stream
+        """
+        try:
+            data = request.data
+            if isinstance(data, list):
+                data = {"purchase_orders": data}
+            serializer = FeaturesPurchaseOrderBulkCreationSerializer(
+                data={**request.GET.dict(), **data},
+                context={"request": request},
+            )
             if serializer.is_valid():
                 serializer.save()
                 return Response(
@@ -265,7 +391,83 @@ class FeaturesPurchaseOrderAPI(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
         except Exception as e:
-            self.api_logger.info(f"Exception getting purchase orders, {str(e)}")
+            self.api_logger.info(f"Exception bulk creating purchase orders, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    def put(self,request):
+        """
+        Updating status and quality rating of purchase orders from a JSON list or NDJSON stream
+        """
+        try:
+            data = request.data
+            if isinstance(data, list):
+                data = {"purchase_orders": data}
+            serializer = FeaturesPurchaseOrderBulkUpdateSerializer(
+                data={**request.GET.dict(), **data},
+                context={"request": request},
+            )
+            if serializer.is_valid():
+                serializer.save()
+                return Response(
+                    serializer.data["data"],
+                    status=status.HTTP_200_OK,
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception bulk updating purchase orders, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+class FeaturesPurchaseOrderExportAPI(APIView):
+    """
+    APIView to stream export of purchase orders
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesPurchaseOrderExportAPI"})
+
+    def get(self,request):
+        """
+        Streaming purchase orders as NDJSON or CSV
+        """
+        try:
+            serializer = FeaturesPurchaseOrderExportSerializer(
+                data=request.GET.dict(),
+                context={"request": request},
+            )
+            if serializer.is_valid():
+                response = StreamingHttpResponse(
+                    serializer.stream(),
+                    content_type=serializer.content_type(),
+                )
+                response["Content-Disposition"] = f'attachment; filename="{serializer.filename()}"'
+                return response
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception exporting purchase orders, {str(e)}")
             return Response(
                 {"message": "Something went wrong", "data": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -289,10 +491,17 @@ class FeaturesPurchaseOrderByIDAPI(APIView):
                 context={"request": request,"po_id":po_id},
             )
             if serializer.is_valid():
+                response = not_modified(request, serializer)
+                if response is not None:
+                    return response
                 serializer.save()
-                return Response(
-                    serializer.data["details"],
-                    status=status.HTTP_200_OK,
+                return with_validators(
+                    Response(
+                        serializer.data["details"],
+                        status=status.HTTP_200_OK,
+                    ),
+                    request,
+                    serializer.version(),
                 )
             else:
                 for key in serializer.errors.keys():
@@ -312,6 +521,7 @@ class FeaturesPurchaseOrderByIDAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
     
+    @transaction.atomic
     def put(self,request,po_id=None):
         """
         Updating purchase orders
@@ -346,6 +556,7 @@ class FeaturesPurchaseOrderByIDAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @transaction.atomic
     def delete(self,request,po_id=None):
         """
         Deleting purchase order
@@ -387,6 +598,7 @@ class FeaturesPOAcknowledgementAPI(APIView):
     api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesPOAcknowledgementAPI"})
 
 
+    @transaction.atomic
     def post(self,request,po_id=None):
         """
         Acknowledgement of purchase orders by id
@@ -421,6 +633,50 @@ class FeaturesPOAcknowledgementAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+class FeaturesPOBulkAcknowledgementAPI(APIView):
+    """
+    APIView to acknowledge purchase orders in bulk
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesPOBulkAcknowledgementAPI"})
+
+
+    @transaction.atomic
+    def post(self,request):
+        """
+        Acknowledgement of a list of purchase orders by id, in one transaction
+        """
+        try:
+            data = request.data
+            if isinstance(data, list):
+                data = {"po_ids": data}
+            serializer = FeaturesBulkAcknowledgementSerializer(
+                data=data,
+                context={"request": request},
+            )
+            if serializer.is_valid():
+                serializer.save()
+                return Response(
+                    serializer.data["data"],
+                    status=status.HTTP_200_OK,
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception bulk acknowledging purchase orders, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
 class FeaturesHistoricalPerformanceAPI(APIView):
     """
     APIView to getting performance metrics of vendors
@@ -460,4 +716,350 @@ class FeaturesHistoricalPerformanceAPI(APIView):
             return Response(
                 {"message": "Something went wrong", "data": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
-            )
\ No newline at end of file
+            )
+
+
+class FeaturesVendorRankingAPI(APIView):
+    """
+    APIView to getting top vendors by a performance metric
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesVendorRankingAPI"})
+
+
+    def get(self,request):
+        """
+        Ranking of vendors
+        """
+        try:
+            serializer = FeaturesVendorRankingSerializer(
+                data=request.GET.dict(),
+                context={"request": request},
+            )
+            if serializer.is_valid():
+                serializer.save()
+                return Response(
+                    serializer.data["data"],
+                    status=status.HTTP_200_OK,
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting vendor ranking, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class FeaturesChangeFeedAPI(APIView):
+    """
+    APIView to getting changes of vendors, purchase orders and performance snapshots since a token
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesChangeFeedAPI"})
+
+    def get(self,request):
+        """
+        Changes since token
+        """
+        try:
+            serializer = FeaturesChangeFeedSerializer(
+                data=request.GET.dict(),
+                context={"request": request},
+            )
+            if serializer.is_valid():
+                serializer.save()
+                return Response(
+                    serializer.data["data"],
+                    status=status.HTTP_200_OK,
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return Response(
+                    {"message": error, "data": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting changes, {str(e)}")
+            return Response(
+                {"message": "Something went wrong", "data": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class FeaturesAsyncVendorsAPI(View):
+    """
+    Async View to perform GET operation for all vendors, served without a thread hop under ASGI
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesAsyncVendorsAPI"})
+
+    async def get(self,request):
+        """
+        List of all vendors
+        """
+        try:
+            serializer = FeaturesVendorListSerializer(
+                data=request.GET.dict(),
+                context={"request": request},
+            )
+            if await serializer.ais_valid():
+                response = await anot_modified(request, serializer)
+                if response is not None:
+                    return response
+                await serializer.asave()
+                return with_validators(
+                    HttpResponse(
+                        FeaturesJSONRenderer().render(serializer.data["data"]),
+                        status=status.HTTP_200_OK,
+                        content_type="application/json",
+                    ),
+                    request,
+                    await serializer.aversion(),
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return HttpResponse(
+                    FeaturesJSONRenderer().render({"message": error, "data": serializer.errors}),
+                    status=status.HTTP_400_BAD_REQUEST,
+                    content_type="application/json",
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting vendors, {str(e)}")
+            return HttpResponse(
+                FeaturesJSONRenderer().render({"message": "Something went wrong", "data": str(e)}),
+                status=status.HTTP_400_BAD_REQUEST,
+                content_type="application/json",
+            )
+
+
+class FeaturesAsyncVendorByIDAPI(View):
+    """
+    Async View to perform GET operation for vendor by ID, served without a thread hop under ASGI
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesAsyncVendorByIDAPI"})
+
+    async def get(self,request,vendor_id=None):
+        """
+        Details of vendor by ID
+        """
+        try:
+            vendor_id = self.kwargs.get("vendor_id")
+            serializer = FeaturesVendorGetDetailsSerializer(
+                data=request.GET.dict(),
+                context={"request": request,"vendor_id":vendor_id},
+            )
+            if await serializer.ais_valid():
+                response = await anot_modified(request, serializer)
+                if response is not None:
+                    return response
+                await serializer.asave()
+                return with_validators(
+                    HttpResponse(
+                        FeaturesJSONRenderer().render(serializer.data["details"]),
+                        status=status.HTTP_200_OK,
+                        content_type="application/json",
+                    ),
+                    request,
+                    await serializer.aversion(),
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return HttpResponse(
+                    FeaturesJSONRenderer().render({"message": error, "data": serializer.errors}),
+                    status=status.HTTP_400_BAD_REQUEST,
+                    content_type="application/json",
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting vendor details, {str(e)}")
+            return HttpResponse(
+                FeaturesJSONRenderer().render({"message": "Something went wrong", "data": str(e)}),
+                status=status.HTTP_400_BAD_REQUEST,
+                content_type="application/json",
+            )
+
+
+class FeaturesAsyncPurchaseOrderAPI(View):
+    """
+    Async View to perform GET operation for all purchase orders, served without a thread hop under ASGI
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesAsyncPurchaseOrderAPI"})
+
+    async def get(self,request):
+        """
+        List of all purchase orders
+        """
+        try:
+            serializer = FeaturesPurchaseOrderListSerializer(
+                data=request.GET.dict(),
+                context={"request": request},
+            )
+            if await serializer.ais_valid():
+                response = await anot_modified(request, serializer)
+                if response is not None:
+                    return response
+                await serializer.asave()
+                return with_validators(
+                    HttpResponse(
+                        FeaturesJSONRenderer().render(serializer.data["data"]),
+                        status=status.HTTP_200_OK,
+                        content_type="application/json",
+                    ),
+                    request,
+                    await serializer.aversion(),
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return HttpResponse(
+                    FeaturesJSONRenderer().render({"message": error, "data": serializer.errors}),
+                    status=status.HTTP_400_BAD_REQUEST,
+                    content_type="application/json",
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting purchase orders, {str(e)}")
+            return HttpResponse(
+                FeaturesJSONRenderer().render({"message": "Something went wrong", "data": str(e)}),
+                status=status.HTTP_400_BAD_REQUEST,
+                content_type="application/json",
+            )
+
+
+class FeaturesAsyncPurchaseOrderByIDAPI(View):
+    """
+    Async View to perform GET operation for purchase order by ID, served without a thread hop under ASGI
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesAsyncPurchaseOrderByIDAPI"})
+
+    async def get(self,request,po_id=None):
+        """
+        Details of purchase order by ID
+        """
+        try:
+            po_id = self.kwargs.get("po_id")
+            serializer = FeaturesPurchaseOrderGetDetailsSerializer(
+                data=request.GET.dict(),
+                context={"request": request,"po_id":po_id},
+            )
+            if await serializer.ais_valid():
+                response = await anot_modified(request, serializer)
+                if response is not None:
+                    return response
+                await serializer.asave()
+                return with_validators(
+                    HttpResponse(
+                        FeaturesJSONRenderer().render(serializer.data["details"]),
+                        status=status.HTTP_200_OK,
+                        content_type="application/json",
+                    ),
+                    request,
+                    await serializer.aversion(),
+                )
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return HttpResponse(
+                    FeaturesJSONRenderer().render({"message": error, "data": serializer.errors}),
+                    status=status.HTTP_400_BAD_REQUEST,
+                    content_type="application/json",
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception getting purchase order details, {str(e)}")
+            return HttpResponse(
+                FeaturesJSONRenderer().render({"message": "Something went wrong", "data": str(e)}),
+                status=status.HTTP_400_BAD_REQUEST,
+                content_type="application/json",
+            )
+
+
+class FeaturesEventStreamAPI(View):
+    """
+    Async View streaming purchase order status, acknowledgement and vendor metric events as server-sent events
+    """
+    api_logger = logging.LoggerAdapter(logger,{"app_name":"FeaturesEventStreamAPI"})
+
+    async def get(self,request):
+        """
+        Event stream, of one vendor when vendor_id is given
+        """
+        try:
+            if not isinstance(request, ASGIRequest):
+                """ a WSGI worker would be held by each open stream """
+                return HttpResponse(
+                    FeaturesJSONRenderer().render({"message": "Event streams are served by the ASGI application only", "data": {}}),
+                    status=status.HTTP_400_BAD_REQUEST,
+                    content_type="application/json",
+                )
+            serializer = FeaturesEventStreamSerializer(
+                data=request.GET.dict(),
+                context={"request": request},
+            )
+            if await serializer.ais_valid():
+                response = StreamingHttpResponse(
+                    serializer.stream(),
+                    content_type="text/event-stream",
+                )
+                response["Cache-Control"] = "no-cache"
+                response["X-Accel-Buffering"] = "no"
+                return response
+            else:
+                for key in serializer.errors.keys():
+                    error = serializer.errors[key]
+                    if type(error) == type([]):
+                        error = error[0]
+                    else:
+                        error = serializer.errors
+                return HttpResponse(
+                    FeaturesJSONRenderer().render({"message": error, "data": serializer.errors}),
+                    status=status.HTTP_400_BAD_REQUEST,
+                    content_type="application/json",
+                )
+        except Exception as e:
+            self.api_logger.info(f"Exception streaming events, {str(e)}")
+            return HttpResponse(
+                FeaturesJSONRenderer().render({"message": "Something went wrong", "data": str(e)}),
+                status=status.HTTP_400_BAD_REQUEST,
+                content_type="application/json",
+            )
+
+
+class FeaturesRequestMetricsAPI(View):
+    """
+    View exposing request histograms of this process in the Prometheus text format
+    """
+
+    def get(self,request):
+        return HttpResponse(
+            request_metrics.exposition(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
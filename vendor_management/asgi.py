@@ -13,4 +13,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vendor_management.settings')
 
+# sync ORM calls run on per-request threads under ASGI, a persistent connection would be left open on each
+os.environ['DB_CONN_MAX_AGE'] = '0'
+
 application = get_asgi_application()
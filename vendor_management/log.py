@@ -0,0 +1,39 @@
+import copy, datetime, json, logging
+from logging.handlers import QueueHandler
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line, carrying the app_name and request_metrics extras when present
+    """
+
+    def format(self, record):
+        line = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("app_name", "request_metrics"):
+            if hasattr(record, key):
+                line[key] = getattr(record, key)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line["exception"] = record.exc_text
+        return json.dumps(line, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands records over unformatted, so formatting happens on the listener thread too
+    """
+
+    def prepare(self, record):
+        """ only what cannot travel safely is resolved here: message arguments and the traceback """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
@@ -9,9 +9,11 @@ https://docs.djangoproject.com/en/5.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
-import os, logging
+import os, atexit, logging, logging.handlers, queue
 from pathlib import Path
 from decouple import config
+from logging.handlers import QueueListener
+from vendor_management.log import JSONFormatter, NonBlockingQueueHandler
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,16 +33,42 @@ CORS_ORIGIN_ALLOW_ALL = True
 
 
 # Logger settings
+# handlers only enqueue records, a background listener formats and writes them
+LOG_LEVEL = config("LOG_LEVEL", default="DEBUG")
+LOG_FILE = config("LOG_FILE", default="app.log")
+LOG_ROTATE_WHEN = config("LOG_ROTATE_WHEN", default="")  # e.g. "midnight" rotates by time instead of size
+LOG_MAX_BYTES = config("LOG_MAX_BYTES", default=10 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = config("LOG_BACKUP_COUNT", default=5, cast=int)
+
 logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+if LOG_ROTATE_WHEN:
+    log_file_handler = logging.handlers.TimedRotatingFileHandler(
+        LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+else:
+    log_file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+log_file_handler.setFormatter(JSONFormatter())
+
 syslog = logging.StreamHandler()
 formatter = logging.Formatter(
     "INFO => AT: %(asctime)s API/FUNC: %(app_name)s MSG: %(message)s"
 )
 syslog.setFormatter(formatter)
-logger.addHandler(syslog)
+syslog.addFilter(logging.Filter(__name__))  # the console only shows app records, as before
 
-logging.basicConfig(filename="app.log")
-logger.setLevel(logging.DEBUG)
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, log_file_handler, syslog, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+"""
+on the root logger like basicConfig(filename="app.log") was, so django's own warnings land in the file too
+"""
+logging.getLogger().addHandler(NonBlockingQueueHandler(log_queue))
 
 # Application definition
 THIRD_PARTY_APPS = [
@@ -62,6 +90,7 @@ INSTALLED_APPS += THIRD_PARTY_APPS
 
 
 MIDDLEWARE = [
+    "features.instrumentation.FeaturesRequestMetricsMiddleware",  # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -104,11 +133,13 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD"),
         "HOST": config("DB_HOST"),
         "PORT": config("DB_PORT"),
+        # persistent connections for WSGI workers, vendor_management/asgi.py turns them off
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
     }
 }
 
 
-
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -140,9 +171,28 @@ USE_I18N = True
 USE_TZ = True
 
 
+# CACHE SETTINGS
+# local memory by default, any Redis compatible server when REDIS_URL is set (needs the redis package)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "vendor-management",
+    }
+}
+if config("REDIS_URL", default=""):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REDIS_URL"),
+    }
+
+
 # REST FRAMEWORK SETTINGS
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "features.renderers.FeaturesJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PARSER_CLASSES": (
         "rest_framework.parsers.JSONParser",
         "rest_framework.parsers.MultiPartParser",
@@ -150,6 +200,29 @@ REST_FRAMEWORK = {
     ),
 }
 
+# FEATURES APP SETTINGS
+FEATURES_LIST_PAGE_SIZE = config("FEATURES_LIST_PAGE_SIZE", default=100, cast=int)
+FEATURES_LIST_MAX_PAGE_SIZE = config("FEATURES_LIST_MAX_PAGE_SIZE", default=1000, cast=int)
+FEATURES_EXPORT_CHUNK_SIZE = config("FEATURES_EXPORT_CHUNK_SIZE", default=2000, cast=int)
+FEATURES_BULK_BATCH_SIZE = config("FEATURES_BULK_BATCH_SIZE", default=1000, cast=int)
+FEATURES_BULK_MAX_ROWS = config("FEATURES_BULK_MAX_ROWS", default=10000, cast=int)
+FEATURES_CACHE_ALIAS = "default"
+FEATURES_CACHE_TIMEOUT = config("FEATURES_CACHE_TIMEOUT", default=300, cast=int)
+FEATURES_METRICS_MODE = config("FEATURES_METRICS_MODE", default="sync")  # "async" queues metric updates for process_metrics_outbox
+FEATURES_METRICS_MAX_STALENESS = config("FEATURES_METRICS_MAX_STALENESS", default=30, cast=int)  # in seconds
+FEATURES_METRICS_WORKERS = config("FEATURES_METRICS_WORKERS", default=4, cast=int)
+FEATURES_METRICS_BATCH_SIZE = config("FEATURES_METRICS_BATCH_SIZE", default=500, cast=int)
+FEATURES_RANKING_REFRESH_INTERVAL = config("FEATURES_RANKING_REFRESH_INTERVAL", default=60, cast=int)  # in seconds
+FEATURES_RANKING_MAX_LIMIT = config("FEATURES_RANKING_MAX_LIMIT", default=100, cast=int)
+FEATURES_CHANGES_PAGE_SIZE = config("FEATURES_CHANGES_PAGE_SIZE", default=500, cast=int)
+FEATURES_CHANGES_MAX_PAGE_SIZE = config("FEATURES_CHANGES_MAX_PAGE_SIZE", default=5000, cast=int)
+FEATURES_EVENTS_BACKEND = config("FEATURES_EVENTS_BACKEND", default="local")  # "postgres" fans out across workers with LISTEN/NOTIFY
+FEATURES_EVENTS_HEARTBEAT = config("FEATURES_EVENTS_HEARTBEAT", default=15, cast=int)  # in seconds
+FEATURES_EVENTS_QUEUE_SIZE = config("FEATURES_EVENTS_QUEUE_SIZE", default=1000, cast=int)  # per stream
+FEATURES_EVENTS_RETRY_MS = config("FEATURES_EVENTS_RETRY_MS", default=3000, cast=int)
+FEATURES_SLOW_REQUEST_MS = config("FEATURES_SLOW_REQUEST_MS", default=500, cast=int)  # slower requests are logged as warnings
+FEATURES_N_PLUS_ONE_THRESHOLD = config("FEATURES_N_PLUS_ONE_THRESHOLD", default=10, cast=int)  # repeats of one statement per request
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 